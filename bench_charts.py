@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark chart rendering for doc_add_piechart against the old pyplot flow.
+
+The old flow built a new pyplot figure per chart, saved it to a PNG file and
+read it back into the document. The new one reuses Agg figures through
+ChartRenderer and hands in-memory PNGs to python-docx, optionally rendering
+in a process pool and reading unchanged charts from a ChartCache. All build
+the same document of alternating pie and bar
+charts with the same data.
+
+Usage:
+    python bench_charts.py --charts 100 --workers 4
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+from docx import Document
+from docx.shared import Inches
+
+from chart_cache import ChartCache
+from doc_add_piechart import ChartRenderer, ChartSpec, random_chart_specs, render_charts
+
+
+def legacy_chart(path: Path, kind: str, data: List[int], labels: List[str], title: str) -> None:
+    """The pre-refactor rendering: a fresh pyplot figure per chart."""
+    if kind == 'pie':
+        fig, ax = plt.subplots(figsize=(8, 6))
+        ax.pie(data, labels=labels, colors=plt.cm.Pastel1(range(len(data))),
+               autopct='%1.1f%%', startangle=90)
+        ax.axis('equal')
+    else:
+        fig, ax = plt.subplots(figsize=(10, 6))
+        bars = ax.bar(labels, data, color=plt.cm.viridis(np.linspace(0.2, 0.9, len(labels))))
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height + 1,
+                    f'{height:.0f}', ha='center', va='bottom')
+        ax.set_ylabel('Values')
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.set_title(title)
+    plt.tight_layout()
+    fig.savefig(path, dpi=100, bbox_inches='tight')
+    plt.close()
+
+
+def legacy_document(charts: List[ChartSpec], image_dir: Path) -> Document:
+    doc = Document()
+    for i, (kind, data, labels, title) in enumerate(charts):
+        path = image_dir / f'{kind}_chart_{i+1}.png'
+        legacy_chart(path, kind, data, labels, title)
+        doc.add_picture(str(path), width=Inches(6))
+        os.remove(path)
+    return doc
+
+
+def renderer_document(charts: List[ChartSpec], workers: int,
+                      renderer: ChartRenderer, cache: Optional[ChartCache] = None) -> Document:
+    doc = Document()
+    for image in render_charts(charts, workers, renderer, cache):
+        doc.add_picture(io.BytesIO(image), width=Inches(6))
+    return doc
+
+
+def charts_per_second(build: Callable[[], Document], count: int) -> float:
+    start = time.perf_counter()
+    build().save(io.BytesIO())
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--charts', type=int, default=100, help='Charts per document')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processes for the parallel run (default: CPU count)')
+    args = parser.parse_args()
+
+    charts = random_chart_specs(args.charts, seed=0)
+    renderer = ChartRenderer()
+    with tempfile.TemporaryDirectory() as tmp:
+        before = charts_per_second(lambda: legacy_document(charts, Path(tmp)), args.charts)
+        after = charts_per_second(lambda: renderer_document(charts, 1, renderer), args.charts)
+        parallel = charts_per_second(lambda: renderer_document(charts, args.workers, renderer),
+                                     args.charts)
+        cache = ChartCache(Path(tmp) / 'cache')
+        renderer_document(charts, 1, renderer, cache)
+        cached = charts_per_second(lambda: renderer_document(charts, 1, renderer, cache),
+                                   args.charts)
+
+    print(f"Document with {args.charts} charts")
+    print(f"{'':14}{'charts/s':>10}")
+    print(f"{'before':14}{before:10.1f}")
+    print(f"{'after':14}{after:10.1f}")
+    print(f"{f'{args.workers} workers':14}{parallel:10.1f}")
+    print(f"{'cached':14}{cached:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark document size and save time with and without ImagePreprocessor.
+
+A doc_create_again-style template (a logo, a stretched photo and a table
+of frameworks with one logo each) is generated in a temporary directory
+together with camera-sized images, and rendered with full-resolution
+images, with preprocessed images, and again with the preprocessed images
+read from the disk cache.
+
+Usage:
+    python bench_images.py --dpi 150
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from docx import Document
+from docxtpl import DocxTemplate
+from PIL import Image, ImageDraw
+
+from doc_create_again import FRAMEWORKS, build_context
+from docx_images import ImagePreprocessor
+
+
+def make_template(directory: Path) -> Path:
+    doc = Document()
+    doc.add_paragraph('{{ myimage }}')
+    doc.add_paragraph('{{ myimageratio }}')
+    table = doc.add_table(rows=3, cols=2)
+    table.cell(0, 0).text = '{%tr for fw in frameworks %}'
+    table.cell(1, 0).text = '{{ fw.image }}'
+    table.cell(1, 1).text = '{{ fw.desc }}'
+    table.cell(2, 0).text = '{%tr endfor %}'
+    path = directory / 'inline_image_tpl.docx'
+    doc.save(str(path))
+    return path
+
+
+def make_images(directory: Path, size: Tuple[int, int]) -> None:
+    rng = random.Random(0)
+    photo = Image.effect_noise(size, 60).convert('RGB')
+    ImageDraw.Draw(photo).ellipse((0, 0, size[0] // 2, size[1] // 2), fill=(200, 120, 40))
+    photo.save(directory / 'python_jpeg.jpg', quality=95)
+
+    logo = Image.new('RGBA', (size[1], size[1]))
+    draw = ImageDraw.Draw(logo)
+    for _ in range(200):
+        x, y = rng.randrange(size[1]), rng.randrange(size[1])
+        draw.ellipse((x, y, x + 200, y + 200),
+                     fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256), 255))
+    logo.save(directory / 'python_logo.png')
+    # The framework logos repeat the same image under different names
+    for name, _ in FRAMEWORKS:
+        (directory / f'{name.lower()}.png').write_bytes((directory / 'python_logo.png').read_bytes())
+
+
+def build(template_path: Path, image_dir: Path, output: Path,
+          images: Optional[ImagePreprocessor]) -> Tuple[float, float, int]:
+    """Seconds to prepare the images and render, seconds to save, output size."""
+    start = time.perf_counter()
+    template = DocxTemplate(template_path)
+    template.render(build_context(template, FRAMEWORKS, image_dir, images))
+    rendered = time.perf_counter()
+    template.save(output)
+    saved = time.perf_counter()
+    return rendered - start, saved - rendered, output.stat().st_size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--dpi', type=int, default=150, help='Target resolution')
+    parser.add_argument('--width', type=int, default=4000, help='Source photo width in pixels')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        template = make_template(tmp)
+        make_images(tmp, (args.width, args.width * 3 // 4))
+
+        rows = {
+            'before': build(template, tmp, tmp / 'before.docx', None),
+            'after': build(template, tmp, tmp / 'after.docx',
+                           ImagePreprocessor(dpi=args.dpi, cache_dir=tmp / 'cache')),
+            'cached': build(template, tmp, tmp / 'cached.docx',
+                            ImagePreprocessor(dpi=args.dpi, cache_dir=tmp / 'cache')),
+        }
+
+    print(f"{'':10}{'render s':>10}{'save s':>10}{'size KB':>10}")
+    for name, (render, save, size) in rows.items():
+        print(f"{name:10}{render:10.3f}{save:10.3f}{size / 1024:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark transaction categorization: banken.kategorisera row by row with
+Series.apply against kategorisering.Categorizer, without and with its
+category cache.
+
+The synthetic export draws rows from a few thousand merchant strings with a
+skewed distribution, like a real one where the same store shows up
+thousands of times. All approaches must agree on every row.
+
+Usage:
+    python bench_kategorisering.py --rows 1000000 --merchants 5000
+"""
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from banken import kategorier, kategorisera
+from kategorisering import Categorizer
+
+NOISE = ['AB', 'SOLNA', 'STOCKHOLM', 'SUNDBYBERG', 'K*', 'KORTKÖP', 'SWISH', 'AUTOGIRO', 'LÖN']
+
+
+def make_descriptions(rows: int, merchants: int, seed: int = 0) -> pd.Series:
+    rng = random.Random(seed)
+    keywords = [keyword for words in kategorier.values() for keyword in words]
+    pool = []
+    for i in range(merchants):
+        words = [rng.choice(NOISE), f'{rng.randrange(10000):04d}']
+        # Roughly a third of the merchants are not in the keyword table
+        if rng.random() < 0.7:
+            words.insert(rng.randrange(3), rng.choice(keywords).upper())
+        else:
+            words.insert(0, f'BUTIK {i}')
+        pool.append(' '.join(words))
+    weights = 1 / np.arange(1, merchants + 1)
+    choices = np.random.default_rng(seed).choice(merchants, size=rows, p=weights / weights.sum())
+    return pd.Series(np.array(pool, dtype=object)[choices], name='Text')
+
+
+def timed(label: str, rows: int, categorize, quiet: bool = False) -> pd.Series:
+    start = time.perf_counter()
+    if quiet:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = categorize()
+    else:
+        result = categorize()
+    elapsed = time.perf_counter() - start
+    print(f"{label:22}{elapsed:10.2f}{rows / elapsed:14,.0f}")
+    return pd.Series(list(result))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Transactions')
+    parser.add_argument('--merchants', type=int, default=5000, help='Distinct descriptions')
+    args = parser.parse_args()
+
+    texts = make_descriptions(args.rows, args.merchants)
+    categorizer = Categorizer(kategorier)
+    print(f"{args.rows:,} rows, {texts.nunique():,} distinct descriptions")
+    print(f"{'':22}{'seconds':>10}{'rows/s':>14}")
+    # kategorisera prints every unmatched description
+    before = timed('apply(kategorisera)', args.rows, lambda: texts.apply(kategorisera),
+                   quiet=True)
+    vectorized = timed('vectorized', args.rows,
+                       lambda: categorizer.categorize_series(texts, dedup=False))
+    after = timed('vectorized + dedup', args.rows, lambda: categorizer.categorize_series(texts))
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = Path(tmp) / 'kategorier.sqlite'
+        with Categorizer(kategorier, cache_path=cache_path) as cold:
+            first_run = timed('cache, first run', args.rows,
+                              lambda: cold.categorize_series(texts))
+        with Categorizer(kategorier, cache_path=cache_path) as warm:
+            repeat = timed('cache, repeat run', args.rows,
+                           lambda: warm.categorize_series(texts))
+            print(f"cache hits {warm.cache.hits:,}, misses {warm.cache.misses:,}")
+    assert all(before.equals(result) for result in (vectorized, after, first_run, repeat)), \
+        'categorizations differ'
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDFAnalyzer.analyze_pdf against the old open-twice implementation.
+
+A corpus of multi-hundred-page text PDFs is generated in a temporary
+directory, then every file is analyzed with both implementations. Reported
+numbers are mean seconds per file and peak traced memory per file.
+
+Usage:
+    python bench_pdf_analysis.py --files 4 --pages 300
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import PyPDF2
+
+from pdf_samples import write_text_pdf
+from sort_pdf_files import IMPORTANT_TERMS, PDFAnalyzer
+
+WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing',
+         'elit', 'sed', 'do', 'eiusmod', 'tempor'] + IMPORTANT_TERMS
+
+
+def legacy_analyze(analyzer: PDFAnalyzer, pdf_path: Path) -> Dict:
+    """The pre-refactor flow: one reader for metadata, a second for text."""
+    with pdf_path.open('rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        metadata = reader.metadata
+        with pdf_path.open('rb') as text_file:
+            text_reader = PyPDF2.PdfReader(text_file)
+            text = ''
+            for page in text_reader.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    text += page_text + '\n'
+        return {
+            'metadata': metadata,
+            'page_count': len(reader.pages),
+            'found_terms': sorted(set(term for term, _ in analyzer.matcher.find(text)))
+        }
+
+
+def make_corpus(directory: Path, files: int, pages: int, seed: int = 0) -> List[Path]:
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(files):
+        page_texts = [
+            '\n'.join(' '.join(rng.choices(WORDS, k=12)) for _ in range(40))
+            for _ in range(pages)
+        ]
+        corpus.append(write_text_pdf(directory / f'report_{i}.pdf', page_texts))
+    return corpus
+
+
+def measure(fn: Callable[[Path], object], corpus: List[Path]) -> Dict[str, float]:
+    timings = []
+    for pdf_path in corpus:
+        start = time.perf_counter()
+        fn(pdf_path)
+        timings.append(time.perf_counter() - start)
+
+    peaks = []
+    for pdf_path in corpus:
+        tracemalloc.start()
+        fn(pdf_path)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        'seconds_per_file': statistics.mean(timings),
+        'peak_mb_per_file': statistics.mean(peaks) / (1024 * 1024),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--files', type=int, default=4, help='PDFs in the corpus')
+    parser.add_argument('--pages', type=int, default=300, help='Pages per PDF')
+    args = parser.parse_args()
+
+    analyzer = PDFAnalyzer()
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = make_corpus(Path(tmp), args.files, args.pages)
+        before = measure(lambda p: legacy_analyze(analyzer, p), corpus)
+        after = measure(analyzer.analyze_pdf, corpus)
+
+    print(f"Corpus: {args.files} files x {args.pages} pages")
+    print(f"{'':10}{'s/file':>10}{'peak MB':>10}")
+    for label, row in (('before', before), ('after', after)):
+        print(f"{label:10}{row['seconds_per_file']:10.3f}{row['peak_mb_per_file']:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Measure sort_pdf_files cold-start cost.
+
+Runs each scenario in a fresh interpreter several times and reports the median
+wall-clock time next to a bare ``python -c pass``, then lists the slowest
+imports from ``python -X importtime``. The no-op scenarios (``--help`` and a
+scan of an empty directory) must stay within TARGET_OVERHEAD_MS of the bare
+interpreter and must not import the modules listed in DEFERRED_MODULES.
+
+Usage:
+    python bench_startup.py --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+HERE = Path(__file__).resolve().parent
+SCRIPT = str(HERE / 'sort_pdf_files.py')
+
+# Budget for the no-op paths on top of interpreter startup
+TARGET_OVERHEAD_MS = 50.0
+
+# Heavy modules the no-op paths must not pull in
+DEFERRED_MODULES = ['PyPDF2', 'concurrent.futures.process', 'sqlite3']
+
+
+def time_command(cmd: List[str], runs: int) -> float:
+    """Median wall-clock milliseconds of ``cmd`` over ``runs`` runs."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def import_times(args: List[str]) -> List[Tuple[str, int]]:
+    """(module, cumulative microseconds) from ``-X importtime`` for a run."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=HERE,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(cumulative)))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10, help='Runs per scenario')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as empty_dir:
+        output = os.path.join(empty_dir, 'report.txt')
+        scenarios = {
+            'python -c pass': [sys.executable, '-c', 'pass'],
+            'import sort_pdf_files': [sys.executable, '-c', 'import sort_pdf_files'],
+            '--help': [sys.executable, SCRIPT, '--help'],
+            'empty directory scan': [sys.executable, SCRIPT, empty_dir, '-o', output],
+        }
+        results = {name: time_command(cmd, args.runs) for name, cmd in scenarios.items()}
+        noop_imports = {name for name, _ in import_times([SCRIPT, empty_dir, '-o', output])}
+
+    baseline = results['python -c pass']
+    print(f"{'scenario':<24}{'median ms':>10}{'overhead':>10}")
+    for name, ms in results.items():
+        print(f"{name:<24}{ms:>10.1f}{ms - baseline:>10.1f}")
+
+    print("\nSlowest imports for `import sort_pdf_files` (cumulative ms):")
+    rows = import_times(['-c', 'import sort_pdf_files'])
+    for name, us in sorted(rows, key=lambda row: row[1], reverse=True)[:10]:
+        print(f"  {name:<40}{us / 1000:>8.1f}")
+
+    failures = [f"{name} overhead {results[name] - baseline:.1f} ms > {TARGET_OVERHEAD_MS} ms"
+                for name in ('--help', 'empty directory scan')
+                if results[name] - baseline > TARGET_OVERHEAD_MS]
+    failures += [f"no-op scan imported {module}" for module in DEFERRED_MODULES
+                 if module in noop_imports]
+    print()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"OK: no-op paths within {TARGET_OVERHEAD_MS} ms of interpreter startup")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark building large Word tables: python-docx add_row, a docxtpl
+``{%tr for %}`` loop (as in kolumner.py) and the bulk XML of docx_tables.
+
+Each approach builds and saves a document with a three-column test-result
+table. Slow approaches are skipped above --max-slow-rows.
+
+Usage:
+    python bench_tables.py --rows 1000 10000 100000
+"""
+import argparse
+import io
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from docx import Document
+from docxtpl import DocxTemplate
+
+from docx_tables import TableXml, add_table
+from kolumner import table_context
+
+HEADER = ['test', 'rpv2', 'cv90']
+
+
+def make_rows(count: int) -> List[List[str]]:
+    return [[f'test_{i}', 'passed' if i % 7 else 'failed', 'passed'] for i in range(count)]
+
+
+def add_row_document(rows: List[List[str]]) -> None:
+    document = Document()
+    table = document.add_table(rows=1, cols=len(HEADER))
+    for cell, text in zip(table.rows[0].cells, HEADER):
+        cell.text = text
+    for row in rows:
+        for cell, text in zip(table.add_row().cells, row):
+            cell.text = text
+    document.save(io.BytesIO())
+
+
+def make_templates(directory: Path) -> None:
+    doc = Document()
+    table = doc.add_table(rows=3, cols=3)
+    table.cell(0, 0).text = '{%tr for row in tbl_contents %}'
+    for i in range(3):
+        table.cell(1, i).text = f'{{{{ row.cols[{i}] }}}}'
+    table.cell(2, 0).text = '{%tr endfor %}'
+    doc.save(str(directory / 'loop.docx'))
+
+    doc = Document()
+    doc.add_paragraph('{{p tbl_xml }}')
+    doc.save(str(directory / 'bulk.docx'))
+
+
+def template_document(template: Path, context: dict) -> None:
+    doc = DocxTemplate(template)
+    doc.render(context)
+    doc.save(io.BytesIO())
+
+
+def bulk_document(rows: List[List[str]]) -> None:
+    document = Document()
+    add_table(document, rows, header=HEADER)
+    document.save(io.BytesIO())
+
+
+def seconds(build: Callable[[], None], rows: int, max_rows: Optional[int]) -> str:
+    if max_rows is not None and rows > max_rows:
+        return f"{'-':>12}"
+    start = time.perf_counter()
+    build()
+    return f"{time.perf_counter() - start:12.2f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Table sizes to benchmark')
+    parser.add_argument('--max-slow-rows', type=int, default=10000,
+                        help='Skip add_row and the docxtpl loop above this many rows')
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}{'add_row s':>12}{'tr loop s':>12}{'add_table s':>12}{'{{p}} s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        make_templates(tmp)
+        for count in args.rows:
+            rows = make_rows(count)
+            print(f"{count:8}"
+                  + seconds(lambda: add_row_document(rows), count, args.max_slow_rows)
+                  + seconds(lambda: template_document(tmp / 'loop.docx',
+                                                      table_context([HEADER] + rows)),
+                            count, args.max_slow_rows)
+                  + seconds(lambda: bulk_document(rows), count, None)
+                  + seconds(lambda: template_document(tmp / 'bulk.docx',
+                                                      {'tbl_xml': TableXml(rows, HEADER)}),
+                            count, None),
+                  flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk letter generation against one generate_document_from_template
+call per letter.
+
+A letter template with a header, core properties, a table loop and a shared
+logo is generated in a temporary directory, then the same contexts are
+rendered with both approaches. Reported numbers are documents per second.
+
+Usage:
+    python bench_templates.py --documents 500
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from docx import Document
+
+from doc_add_piechart import ChartRenderer
+from give_me_a_doc_w_img import generate_document_from_template, generate_documents_from_template
+
+
+def make_template(directory: Path) -> Path:
+    doc = Document()
+    doc.core_properties.title = 'Letter for {{ name }}'
+    doc.sections[0].header.paragraphs[0].text = '{{ company }} - {{ city }}'
+    doc.add_heading('Invoice {{ number }}', level=1)
+    doc.add_paragraph('Dear {{ name }},')
+    doc.add_paragraph('{{ image }}')
+    for i in range(20):
+        doc.add_paragraph(f'Paragraph {i} of the standard letter body for {{{{ name }}}}.')
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = '{%tr for item in items %}'
+    table.cell(1, 0).text = '{{ item }}'
+    table.cell(1, 1).text = '{%tr endfor %}'
+    path = directory / 'letter.docx'
+    doc.save(str(path))
+    return path
+
+
+def make_contexts(count: int) -> List[Dict]:
+    return [{'name': f'Customer {i}', 'company': 'Acme', 'city': 'Lund', 'number': i,
+             'items': [f'Item {j}' for j in range(i % 5)]} for i in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--documents', type=int, default=500, help='Letters to generate')
+    args = parser.parse_args()
+
+    contexts = make_contexts(args.documents)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        template = make_template(tmp)
+        image = tmp / 'logo.png'
+        image.write_bytes(ChartRenderer(dpi=30).pie_chart([1, 2, 3], ['a', 'b', 'c'], '').getvalue())
+
+        start = time.perf_counter()
+        for i, context in enumerate(contexts):
+            generate_document_from_template(template, tmp / 'single' / f'{i}.docx', dict(context),
+                                            image_path=str(image), image_size={'width': 20})
+        before = len(contexts) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        generate_documents_from_template(template, contexts, str(tmp / 'bulk' / '{index}.docx'),
+                                         image_path=str(image), image_size={'width': 20})
+        after = len(contexts) / (time.perf_counter() - start)
+
+    print(f"{args.documents} letters")
+    print(f"{'':10}{'docs/s':>10}")
+    print(f"{'before':10}{before:10.1f}")
+    print(f"{'after':10}{after:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
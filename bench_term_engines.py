@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Compare the regex and Aho-Corasick term engines for growing vocabularies.
+
+For each vocabulary size a synthetic term list is generated, every engine is
+built, and the same synthetic document is searched. Reported numbers are
+build time, match time and the number of matches.
+
+Usage:
+    python bench_term_engines.py --sizes 10 1000 50000 --pages 50
+"""
+import argparse
+import random
+import string
+import time
+from typing import List
+
+from term_engines import ENGINES
+
+
+def make_vocabulary(size: int, rng: random.Random) -> List[str]:
+    vocabulary = set()
+    while len(vocabulary) < size:
+        length = rng.randint(3, 12)
+        vocabulary.add(''.join(rng.choices(string.ascii_lowercase, k=length)))
+    return sorted(vocabulary)
+
+
+def make_document(vocabulary: List[str], pages: int, rng: random.Random) -> str:
+    # Roughly one word in twenty is a search term, the rest is noise
+    words = []
+    for _ in range(pages * 400):
+        if rng.random() < 0.05:
+            words.append(rng.choice(vocabulary).upper() if rng.random() < 0.5 else rng.choice(vocabulary))
+        else:
+            words.append(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))))
+    return ' '.join(words)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 50000],
+                        help='Vocabulary sizes to test')
+    parser.add_argument('--pages', type=int, default=50,
+                        help='Size of the searched document in ~400-word pages')
+    args = parser.parse_args()
+
+    print(f"{'terms':>8} {'engine':>14} {'build s':>10} {'match s':>10} {'matches':>9}")
+    for size in args.sizes:
+        rng = random.Random(size)
+        vocabulary = make_vocabulary(size, rng)
+        document = make_document(vocabulary, args.pages, rng)
+        for name, engine in ENGINES.items():
+            start = time.perf_counter()
+            matcher = engine(vocabulary)
+            built = time.perf_counter()
+            matches = sum(1 for _ in matcher.find(document))
+            done = time.perf_counter()
+            print(f"{size:>8} {name:>14} {built - start:>10.3f} {done - built:>10.3f} {matches:>9}")
+
+
+if __name__ == "__main__":
+    main()
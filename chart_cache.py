@@ -0,0 +1,125 @@
+"""
+Content-addressed on-disk cache for rendered chart images (and other
+processed images, see docx_images).
+
+Images are stored as ``<directory>/<key[:2]>/<key><suffix>``, with the
+suffix ``.png`` for charts and ``.img`` for docx_images. The key is a hash
+of everything that determines the image (see
+doc_add_piechart.chart_cache_key), so an unchanged chart is read back
+instead of re-rendered and a changed one can never be served stale.
+
+The cache is bounded in size: a hit refreshes the file's mtime, and when
+the total size exceeds the limit the least recently used images are
+deleted. Writes go through a temporary file and os.replace, so concurrent
+processes sharing a directory never see partial images.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def content_key(payload: Dict[str, Any]) -> str:
+    """Stable hex SHA-256 of a JSON-serializable description of an image."""
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ChartCache:
+    """Size-bounded LRU cache of PNG images keyed by content hash.
+
+    Example:
+        >>> cache = ChartCache('.chart_cache', max_size_mb=100)
+        >>> png = cache.get(key)
+        >>> if png is None:
+        ...     png = render()
+        ...     cache.put(key, png)
+    """
+
+    def __init__(self, directory: Union[str, Path], max_size_mb: float = 256,
+                 suffix: str = '.png'):
+        """
+        Open (or create) the cache.
+
+        Args:
+            directory: Directory holding the cached images
+            max_size_mb: Total size above which old images are evicted
+            suffix: File name suffix of the cached images
+        """
+        self.directory = Path(directory)
+        self.max_size = int(max_size_mb * MB)
+        self.suffix = suffix
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f'{key}{self.suffix}'
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob(f'*/*{self.suffix}'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached image, or None on a miss."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store an image, evicting old ones if the cache grows too large."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except OSError as e:
+            logger.warning(f"Could not cache image {key}: {e}")
+            Path(tmp_name).unlink(missing_ok=True)
+            return
+        self._size += len(data) - replaced
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used images until the cache is back under
+        90% of its limit, so a full cache is not rescanned on every put."""
+        entries = sorted(self._entries())
+        target = self.max_size * 0.9
+        # Rescan instead of trusting the running total, since other
+        # processes may share the directory
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self._size -= size
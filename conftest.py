@@ -1,6 +1,9 @@
 import pytest
 import logging
 
+# --matrix-db and friends: stream results into a test x target matrix
+pytest_plugins = ['pytest_matrix']
+
 class ColorFormatter(logging.Formatter):
     # Define ANSI escape sequences for colors.
     COLORS = {
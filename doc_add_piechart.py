@@ -1,23 +1,29 @@
 """
-Document generation with random charts as images using python-docx-template.
+Document generation with random charts as images using python-docx.
 
 This module demonstrates how to generate random pie charts and bar charts,
-save them as PNG files, and embed them in a Word document.
+render them as PNG images in memory, and embed them in a Word document.
 """
+import io
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 import random
-import os
 
-import matplotlib.pyplot as plt
+import matplotlib
 import numpy as np
 from docx import Document
 from docx.shared import Inches
 import logging
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.figure import Figure
 from docx.shared import Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
+from chart_cache import ChartCache, content_key
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,67 +31,300 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+PIE_FIGSIZE = (8, 6)
+BAR_FIGSIZE = (10, 6)
+_SUBPLOT_PARAMS = ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')
+# Bump when ChartRenderer output changes, to invalidate cached images
+CHART_STYLE_VERSION = 2
+
+
+def random_pie_data(rng: Optional[random.Random] = None) -> Tuple[List[int], List[str]]:
+    """Random slice sizes and labels for a pie chart.
+
+    Args:
+        rng: Random number generator; the global one if not given.
+    """
+    rng = rng or random
+    sizes = [rng.randint(5, 20) for _ in range(5)]
+    labels = [f'Category {i+1}' for i in range(len(sizes))]
+    return sizes, labels
+
+
+def random_bar_data(rng: Optional[random.Random] = None) -> Tuple[List[int], List[str]]:
+    """Random quarterly values and their categories for a bar chart.
+
+    Args:
+        rng: Random number generator; the global one if not given.
+    """
+    rng = rng or random
+    categories = [f'Q{i+1}' for i in range(4)]
+    values = [rng.randint(10, 100) for _ in categories]
+    return values, categories
+
+
+class ChartRenderer:
+    """Render charts to in-memory PNG images.
+
+    Uses the object-oriented Agg API instead of pyplot, so no global figure
+    state is involved, and keeps one figure per chart size that is cleared
+    and redrawn for every chart instead of building a new one.
+
+    Example:
+        >>> renderer = ChartRenderer()
+        >>> doc.add_picture(renderer.pie_chart([10, 20], ['A', 'B'], 'Split'), width=Inches(6))
+    """
+
+    def __init__(self, dpi: int = 100):
+        """
+        Args:
+            dpi: Resolution of the rendered images.
+        """
+        self.dpi = dpi
+        self._axes: Dict[Tuple[float, float], Axes] = {}
+
+    def _axes_for(self, figsize: Tuple[float, float]) -> Axes:
+        ax = self._axes.get(figsize)
+        if ax is None:
+            fig = Figure(figsize=figsize, dpi=self.dpi)
+            FigureCanvasAgg(fig)
+            ax = self._axes[figsize] = fig.add_subplot()
+        else:
+            # Start the layout from the defaults so a chart renders the same
+            # whatever was drawn on the figure before it
+            ax.clear()
+            ax.figure.subplots_adjust(**{
+                name: matplotlib.rcParams[f'figure.subplot.{name}'] for name in _SUBPLOT_PARAMS
+            })
+        return ax
+
+    def _render(self, ax: Axes) -> io.BytesIO:
+        fig = ax.figure
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=self.dpi, bbox_inches='tight')
+        buffer.seek(0)
+        return buffer
+
+    def pie_chart(self, sizes: List[float], labels: List[str],
+                  title: str = 'Sample Pie Chart') -> io.BytesIO:
+        """Render a pie chart.
+
+        Args:
+            sizes: Slice sizes.
+            labels: Slice labels.
+            title: Title of the chart.
+
+        Returns:
+            Buffer with the PNG image, positioned at the start.
+        """
+        ax = self._axes_for(PIE_FIGSIZE)
+        colors = matplotlib.colormaps['Pastel1'](range(len(sizes)))
+        ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+        ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
+        ax.set_title(title)
+        return self._render(ax)
+
+    def bar_chart(self, values: List[float], categories: List[str],
+                  title: str = 'Sample Bar Chart') -> io.BytesIO:
+        """Render a bar chart with the values printed above the bars.
+
+        Args:
+            values: Bar heights.
+            categories: Bar labels.
+            title: Title of the chart.
+
+        Returns:
+            Buffer with the PNG image, positioned at the start.
+        """
+        ax = self._axes_for(BAR_FIGSIZE)
+        colors = matplotlib.colormaps['viridis'](np.linspace(0.2, 0.9, len(categories)))
+        bars = ax.bar(categories, values, color=colors)
+
+        # Add value labels on top of bars
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height + 1,
+                    f'{height:.0f}', ha='center', va='bottom')
+
+        ax.set_title(title)
+        ax.set_ylabel('Values')
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+        return self._render(ax)
+
+
+_renderers: Dict[int, ChartRenderer] = {}
+
+
+def _shared_renderer(dpi: int = 100) -> ChartRenderer:
+    renderer = _renderers.get(dpi)
+    if renderer is None:
+        renderer = _renderers[dpi] = ChartRenderer(dpi)
+    return renderer
+
+
+class ChartSpec(NamedTuple):
+    """Everything needed to render one chart, picklable for worker processes."""
+    kind: str  # 'pie' or 'bar'
+    data: List[int]
+    labels: List[str]
+    title: str
+
+
+def chart_cache_key(spec: ChartSpec, dpi: int = 100) -> str:
+    """Content hash of everything that determines a chart's image."""
+    return content_key({
+        'chart': spec._asdict(),
+        'dpi': dpi,
+        'figsize': PIE_FIGSIZE if spec.kind == 'pie' else BAR_FIGSIZE,
+        'matplotlib': matplotlib.__version__,
+        'style': CHART_STYLE_VERSION,
+    })
 
-def generate_pie_chart(output_path: str, title: str = 'Sample Pie Chart') -> None:
-    """Generate a random pie chart and save it as a PNG file.
+
+def render_chart(spec: ChartSpec, renderer: Optional[ChartRenderer] = None,
+                 cache: Optional[ChartCache] = None) -> bytes:
+    """Render a chart to PNG bytes.
+
+    Args:
+        spec: The chart to render.
+        renderer: Renderer to use; a per-process shared one if not given.
+        cache: Image cache consulted before rendering.
+    """
+    renderer = renderer or _shared_renderer()
+    if cache is not None:
+        key = chart_cache_key(spec, renderer.dpi)
+        image = cache.get(key)
+        if image is not None:
+            return image
+    render = renderer.pie_chart if spec.kind == 'pie' else renderer.bar_chart
+    image = render(spec.data, spec.labels, spec.title).getvalue()
+    if cache is not None:
+        cache.put(key, image)
+    return image
+
+
+def _render_in_worker(spec: ChartSpec, dpi: int) -> bytes:
+    return render_chart(spec, _shared_renderer(dpi))
+
+
+def generate_pie_chart(output_path: str, title: str = 'Sample Pie Chart',
+                       sizes: Optional[List[float]] = None,
+                       labels: Optional[List[str]] = None,
+                       cache: Optional[ChartCache] = None) -> None:
+    """Generate a pie chart and save it as a PNG file.
     
     Args:
         output_path: Path where to save the generated chart.
         title: Title of the chart.
+        sizes: Slice sizes; random if not given.
+        labels: Slice labels; 'Category N' if not given.
+        cache: Image cache consulted before rendering.
     """
-    # Generate random data
-    sizes = [random.randint(5, 20) for _ in range(5)]
-    labels = [f'Category {i+1}' for i in range(len(sizes))]
-    colors = plt.cm.Pastel1(range(len(sizes)))
-    
-    # Create figure
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-    ax.set_title(title)
-    
-    # Save the figure
-    plt.tight_layout()
-    fig.savefig(output_path, dpi=100, bbox_inches='tight')
-    plt.close()
+    if sizes is None:
+        sizes, default_labels = random_pie_data()
+    else:
+        default_labels = [f'Category {i+1}' for i in range(len(sizes))]
+    spec = ChartSpec('pie', list(sizes), list(labels or default_labels), title)
+    Path(output_path).write_bytes(render_chart(spec, cache=cache))
 
-def generate_bar_chart(output_path: str, title: str = 'Sample Bar Chart') -> None:
-    """Generate a random bar chart and save it as a PNG file.
+def generate_bar_chart(output_path: str, title: str = 'Sample Bar Chart',
+                       values: Optional[List[float]] = None,
+                       categories: Optional[List[str]] = None,
+                       cache: Optional[ChartCache] = None) -> None:
+    """Generate a bar chart and save it as a PNG file.
     
     Args:
         output_path: Path where to save the generated chart.
         title: Title of the chart.
+        values: Bar heights; random if not given.
+        categories: Bar labels; 'QN' if not given.
+        cache: Image cache consulted before rendering.
     """
-    # Generate random data
-    categories = [f'Q{i+1}' for i in range(4)]
-    values = [random.randint(10, 100) for _ in categories]
-    colors = plt.cm.viridis(np.linspace(0.2, 0.9, len(categories)))
-    
-    # Create figure
-    fig, ax = plt.subplots(figsize=(10, 6))
-    bars = ax.bar(categories, values, color=colors)
-    
-    # Add value labels on top of bars
-    for bar in bars:
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height + 1,
-                f'{height:.0f}', ha='center', va='bottom')
-    
-    ax.set_title(title)
-    ax.set_ylabel('Values')
-    ax.grid(axis='y', linestyle='--', alpha=0.7)
-    
-    # Save the figure
-    plt.tight_layout()
-    fig.savefig(output_path, dpi=100, bbox_inches='tight')
-    plt.close()
+    if values is None:
+        values, default_categories = random_bar_data()
+    else:
+        default_categories = [f'Q{i+1}' for i in range(len(values))]
+    spec = ChartSpec('bar', list(values), list(categories or default_categories), title)
+    Path(output_path).write_bytes(render_chart(spec, cache=cache))
+
+
+def random_chart_specs(num_charts: int, seed: int) -> List[ChartSpec]:
+    """Random charts alternating between pie and bar charts.
+
+    Every chart draws its data from its own generator seeded with ``seed``
+    and its index, so a chart's data does not depend on the other charts or
+    on which process renders it.
+
+    Args:
+        num_charts: Number of charts.
+        seed: Base seed for the charts' data.
+    """
+    specs = []
+    for i in range(num_charts):
+        rng = random.Random(f'{seed}-{i}')
+        if i % 2 == 0:
+            specs.append(ChartSpec('pie', *random_pie_data(rng), f'Random Data Distribution {i+1}'))
+        else:
+            specs.append(ChartSpec('bar', *random_bar_data(rng), f'Quarterly Performance {i+1}'))
+    return specs
+
+
+def render_charts(
+    specs: List[ChartSpec],
+    workers: int = 1,
+    renderer: Optional[ChartRenderer] = None,
+    cache: Optional[ChartCache] = None
+) -> Iterator[bytes]:
+    """Render charts, in a process pool when ``workers`` > 1.
+
+    Args:
+        specs: Charts to render.
+        workers: Number of worker processes; 1 renders in this process.
+        renderer: Renderer for in-process rendering; its dpi is used by the
+            workers too.
+        cache: Image cache; only charts missing from it are rendered.
+
+    Yields:
+        PNG bytes of each chart, in the order of ``specs``.
+    """
+    renderer = renderer or _shared_renderer()
+    if workers <= 1 or len(specs) <= 1:
+        for spec in specs:
+            yield render_chart(spec, renderer, cache)
+        return
+
+    # Look up cached images here and send only the misses to the pool
+    cached: List[Optional[bytes]] = [None] * len(specs)
+    if cache is not None:
+        keys = [chart_cache_key(spec, renderer.dpi) for spec in specs]
+        cached = [cache.get(key) for key in keys]
+    missing = [spec for spec, image in zip(specs, cached) if image is None]
+    if not missing:
+        yield from cached
+        return
+
+    workers = min(workers, len(missing))
+    chunksize = max(1, len(missing) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        rendered = executor.map(_render_in_worker, missing, repeat(renderer.dpi),
+                                chunksize=chunksize)
+        for i, image in enumerate(cached):
+            if image is None:
+                image = next(rendered)
+                if cache is not None:
+                    cache.put(keys[i], image)
+            yield image
 
 
 def generate_document(
     output_path: str,
     output_dir: str = 'output',
     num_charts: int = 3,
-    image_dir: str = 'chart_images'
+    image_dir: Optional[str] = None,
+    renderer: Optional[ChartRenderer] = None,
+    workers: int = 1,
+    seed: Optional[int] = None,
+    cache: Optional[ChartCache] = None
 ) -> None:
     """Generate a Word document with random charts.
     
@@ -93,7 +332,14 @@ def generate_document(
         output_path: Filename for the output document.
         output_dir: Directory where the output document will be saved.
         num_charts: Number of charts to generate.
-        image_dir: Directory to save temporary chart images.
+        image_dir: Unused; charts are rendered in memory. Kept for
+            compatibility with existing callers.
+        renderer: Chart renderer to reuse across documents.
+        workers: Number of processes rendering charts in parallel.
+        seed: Seed for the chart data; the same seed gives the same
+            document for any number of workers. Drawn from the global
+            random generator if not given.
+        cache: Image cache; charts already in it are not re-rendered.
         
     Raises:
         Exception: If there's an error during document generation.
@@ -101,11 +347,12 @@ def generate_document(
     try:
         # Ensure paths are Path objects
         output_dir = Path(output_dir)
-        image_dir = Path(image_dir)
+        if seed is None:
+            seed = random.randrange(2**32)
+        specs = random_chart_specs(num_charts, seed)
         
         # Create directories if they don't exist
         output_dir.mkdir(parents=True, exist_ok=True)
-        image_dir.mkdir(parents=True, exist_ok=True)
         
         # Initialize a new document
         doc = Document()
@@ -119,35 +366,22 @@ def generate_document(
         date_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
         doc.add_paragraph()  # Add some space
         
-        # Generate random charts
-        chart_paths = []
-        for i in range(num_charts):
-            # Alternate between pie and bar charts
-            if i % 2 == 0:
-                chart_type = 'pie'
-                chart_path = image_dir / f'pie_chart_{i+1}.png'
-                generate_pie_chart(str(chart_path), f'Random Data Distribution {i+1}')
-            else:
-                chart_type = 'bar'
-                chart_path = image_dir / f'bar_chart_{i+1}.png'
-                generate_bar_chart(str(chart_path), f'Quarterly Performance {i+1}')
-            
-            chart_paths.append((chart_path, chart_type))
-        
-        # Add charts to document
-        for i, (chart_path, chart_type) in enumerate(chart_paths):
+        # Charts come back in order however many processes render them
+        for i, (spec, image) in enumerate(zip(specs, render_charts(specs, workers, renderer, cache))):
+            chart_type = spec.kind
+
             # Add a heading for the chart
             doc.add_heading(f'Figure {i+1}: {chart_type.capitalize()} Chart', level=2)
             
-            # Add the image
-            doc.add_picture(str(chart_path), width=Inches(6))
+            # Add the image straight from memory
+            doc.add_picture(io.BytesIO(image), width=Inches(6))
             
             # Add description
             para = doc.add_paragraph(f'This is a randomly generated {chart_type} chart showing sample data.')
             para.paragraph_format.space_after = Pt(24)  # Add some space after each chart
             
             # Add a page break after each chart except the last one
-            if i < len(chart_paths) - 1:
+            if i < num_charts - 1:
                 doc.add_page_break()
         
         # Save the document
@@ -155,13 +389,6 @@ def generate_document(
         doc.save(str(output_file))
         logger.info(f"Document successfully generated: {output_file}")
         
-        # Clean up temporary image files
-        for chart_path, _ in chart_paths:
-            try:
-                os.remove(chart_path)
-            except Exception as e:
-                logger.warning(f"Could not remove temporary file {chart_path}: {e}")
-        
     except Exception as e:
         logger.error(f"Error generating document: {e}", exc_info=True)
         raise
@@ -169,13 +396,33 @@ def generate_document(
 
 def main() -> None:
     """Main function to demonstrate document generation with random charts."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate a Word document with random charts')
+    parser.add_argument('--charts', type=int, default=4,
+                        help='Number of charts, alternating pie and bar (default: 4)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes rendering charts in parallel (default: 1)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed for reproducible chart data')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Directory caching rendered charts between runs')
+    parser.add_argument('--cache-size-mb', type=float, default=256,
+                        help='Size limit of the chart cache (default: 256)')
+    args = parser.parse_args()
+    cache = ChartCache(args.cache_dir, args.cache_size_mb) if args.cache_dir else None
+
     try:
         generate_document(
             output_path="random_charts.docx",
             output_dir="output",
-            num_charts=4,  # Generate 2 pie charts and 2 bar charts
-            image_dir="temp_charts"
+            num_charts=args.charts,
+            workers=args.workers,
+            seed=args.seed,
+            cache=cache
         )
+        if cache is not None:
+            logger.info(f"Chart cache: {cache.hits} hits, {cache.misses} misses")
         print("Document generated successfully!")
     except Exception as e:
         logger.critical("Failed to generate document", exc_info=True)
@@ -5,13 +5,15 @@ This module demonstrates how to create Word documents with embedded images
 using Jinja2 templating and python-docx-template.
 """
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
 from docxtpl import DocxTemplate, InlineImage
 from docx.shared import Mm
 import jinja2
 import logging
 
+from docx_images import ImagePreprocessor
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,11 +22,31 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def inline_image(
+    template: DocxTemplate,
+    path: Path,
+    width_mm: Optional[float] = None,
+    height_mm: Optional[float] = None,
+    images: Optional[ImagePreprocessor] = None
+) -> InlineImage:
+    """Create an InlineImage, downsampled to its display size if images is given."""
+    if images is not None:
+        return images.inline_image(template, path, width_mm, height_mm)
+    return InlineImage(
+        template,
+        str(path),
+        width=Mm(width_mm) if width_mm else None,
+        height=Mm(height_mm) if height_mm else None
+    )
+
+
 def create_framework_dict(
     template: DocxTemplate,
     name: str,
     description: str,
-    height_mm: float = 10.0
+    height_mm: float = 10.0,
+    image_dir: Path = Path('.'),
+    images: Optional[ImagePreprocessor] = None
 ) -> Dict[str, Any]:
     """Create a dictionary representing a framework with its image and description.
     
@@ -33,21 +55,109 @@ def create_framework_dict(
         name: Name of the framework (used for the image filename).
         description: Description of the framework.
         height_mm: Height of the image in millimeters.
+        image_dir: Directory containing the image files.
+        images: Optional preprocessor that downsamples the image.
         
     Returns:
         Dictionary containing the framework's image and description.
     """
     return {
-        'image': InlineImage(template, str(Path(f"{name.lower()}.png")), height=Mm(height_mm)),
+        'image': inline_image(template, image_dir / f"{name.lower()}.png",
+                              height_mm=height_mm, images=images),
         'desc': description
     }
 
 
+FRAMEWORKS = [
+    ("Django", "The web framework for perfectionists with deadlines"),
+    (
+        "Zope", 
+        "Zope is a leading Open Source Application Server and "
+        "Content Management Framework"
+    ),
+    (
+        "Pyramid",
+        "Pyramid is a lightweight Python web framework aimed at taking "
+        "small web apps into big web apps."
+    ),
+    (
+        "Bottle",
+        "Bottle is a fast, simple and lightweight WSGI micro "
+        "web-framework for Python"
+    ),
+    (
+        "Tornado",
+        "Tornado is a Python web framework and asynchronous networking "
+        "library."
+    ),
+]
+
+
+def build_context(
+    template: DocxTemplate,
+    frameworks_data: List[Tuple[str, str]],
+    image_dir: Path,
+    images: Optional[ImagePreprocessor] = None
+) -> Dict[str, Any]:
+    """Build the template context with the logos and framework entries.
+    
+    Args:
+        template: The DocxTemplate instance.
+        frameworks_data: (name, description) pairs of the frameworks.
+        image_dir: Directory containing the image files.
+        images: Optional preprocessor that downsamples the images.
+        
+    Returns:
+        Context dictionary for rendering the template.
+    """
+    # Create framework entries with images
+    frameworks = [
+        create_framework_dict(template, name, desc, image_dir=image_dir, images=images)
+        for name, desc in frameworks_data
+    ]
+    
+    return {
+        'myimage': inline_image(template, image_dir / "python_logo.png", width_mm=20,
+                                images=images),
+        'myimageratio': inline_image(
+            template, 
+            image_dir / "python_jpeg.jpg", 
+            width_mm=30, 
+            height_mm=60,
+            images=images
+        ),
+        'frameworks': frameworks
+    }
+
+
+def prepare_context(
+    template: DocxTemplate,
+    context: Dict[str, Any],
+    image_dir: str = '.',
+    images: Optional[ImagePreprocessor] = None
+) -> Dict[str, Any]:
+    """Turn a plain context into a renderable one, for docx_pipeline.
+    
+    Args:
+        template: The template the context will be rendered with.
+        context: Optional 'frameworks' as [name, description] pairs (the
+            default frameworks if missing) plus any other template variables.
+        image_dir: Directory containing the image files.
+        images: Optional preprocessor that downsamples the images.
+        
+    Returns:
+        The context with the images and framework entries added.
+    """
+    frameworks_data = context.get('frameworks') or FRAMEWORKS
+    return {**context, **build_context(template, frameworks_data, Path(image_dir), images)}
+
+
 def generate_document(
     template_path: str,
     output_path: str,
     image_dir: str = '.',
-    output_dir: str = 'output'
+    output_dir: str = 'output',
+    images: Optional[ImagePreprocessor] = None
 ) -> None:
     """Generate a Word document with embedded images from a template.
     
@@ -56,6 +166,8 @@ def generate_document(
         output_path: Filename for the output document.
         image_dir: Directory containing the image files.
         output_dir: Directory where the output document will be saved.
+        images: Optional preprocessor that downsamples the images to their
+            display size before embedding them.
         
     Raises:
         FileNotFoundError: If the template file or any image is not found.
@@ -77,48 +189,7 @@ def generate_document(
         # Initialize template
         template = DocxTemplate(template_path)
         
-        # Define framework data
-        frameworks_data = [
-            ("Django", "The web framework for perfectionists with deadlines"),
-            (
-                "Zope", 
-                "Zope is a leading Open Source Application Server and "
-                "Content Management Framework"
-            ),
-            (
-                "Pyramid",
-                "Pyramid is a lightweight Python web framework aimed at taking "
-                "small web apps into big web apps."
-            ),
-            (
-                "Bottle",
-                "Bottle is a fast, simple and lightweight WSGI micro "
-                "web-framework for Python"
-            ),
-            (
-                "Tornado",
-                "Tornado is a Python web framework and asynchronous networking "
-                "library."
-            ),
-        ]
-        
-        # Create framework entries with images
-        frameworks = [
-            create_framework_dict(template, name, desc)
-            for name, desc in frameworks_data
-        ]
-        
-        # Prepare context
-        context = {
-            'myimage': InlineImage(template, str(image_dir / "python_logo.png"), width=Mm(20)),
-            'myimageratio': InlineImage(
-                template, 
-                str(image_dir / "python_jpeg.jpg"), 
-                width=Mm(30), 
-                height=Mm(60)
-            ),
-            'frameworks': frameworks
-        }
+        context = build_context(template, FRAMEWORKS, image_dir, images)
         
         # Render and save with autoescape=True
         #jinja_env = jinja2.Environment(autoescape=True)
@@ -145,7 +216,8 @@ def main() -> None:
             template_path="inline_image_tpl.docx",
             output_path="inline_image.docx",
             image_dir=".",
-            output_dir="output"
+            output_dir="output",
+            images=ImagePreprocessor(dpi=150)
         )
     except Exception as e:
         logger.critical("Failed to generate document", exc_info=True)
@@ -0,0 +1,154 @@
+"""
+Image preprocessing for InlineImage embedding.
+
+Source images are usually far larger than the space they get in a
+document: a 4000 px photo shown 30 mm wide needs about 180 px at 150 DPI.
+ImagePreprocessor downsamples each image to its display size, recompresses
+it, and caches the result on disk by content hash, so documents shrink
+and save faster and an unchanged image is only ever processed once.
+
+Processing is deterministic, so the same source at the same size always
+yields the same bytes; python-docx stores identical images as a single
+part, so an image repeated in a document (e.g. a logo per table row) is
+embedded once.
+
+Example:
+    >>> images = ImagePreprocessor(dpi=150, cache_dir='.image_cache')
+    >>> context = {'logo': images.inline_image(template, 'logo.png', width_mm=20)}
+"""
+import hashlib
+import io
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from docx.shared import Mm
+from docxtpl import InlineImage
+from PIL import Image, ImageOps
+
+from chart_cache import ChartCache, content_key
+
+logger = logging.getLogger(__name__)
+
+MM_PER_INCH = 25.4
+EXIF_ORIENTATION = 0x0112
+
+# Bump when the processing changes, so cached images are not reused
+IMAGE_PIPELINE_VERSION = 1
+
+
+class ImagePreprocessor:
+    """Downsample and recompress images to their display size in a document."""
+
+    def __init__(self, dpi: int = 150, jpeg_quality: int = 85,
+                 cache_dir: Optional[Union[str, Path]] = None, cache_size_mb: float = 256):
+        """
+        Args:
+            dpi: Resolution images are reduced to at their display size
+            jpeg_quality: Quality of recompressed JPEG images
+            cache_dir: Optional directory for processed images, shared between
+                runs and processes
+            cache_size_mb: Size limit of the disk cache
+        """
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+        self.cache = ChartCache(cache_dir, cache_size_mb, suffix='.img') if cache_dir else None
+        # Processed images by (path, mtime, size, width_mm, height_mm), so a
+        # repeated image is not even re-read
+        self._processed: Dict[tuple, bytes] = {}
+
+    def target_size(self, size: Tuple[int, int], width_mm: Optional[float] = None,
+                    height_mm: Optional[float] = None) -> Tuple[int, int]:
+        """Pixel size for showing an image of the given size at width_mm x
+        height_mm (either may be None to keep the aspect ratio). Images are
+        never enlarged."""
+        width, height = size
+        px_per_mm = self.dpi / MM_PER_INCH
+        if width_mm and height_mm:
+            target = (round(width_mm * px_per_mm), round(height_mm * px_per_mm))
+        elif width_mm:
+            target_width = round(width_mm * px_per_mm)
+            target = (target_width, round(height * target_width / width))
+        elif height_mm:
+            target_height = round(height_mm * px_per_mm)
+            target = (round(width * target_height / height), target_height)
+        else:
+            return size
+        return max(1, min(target[0], width)), max(1, min(target[1], height))
+
+    def convert(self, data: bytes, width_mm: Optional[float] = None,
+                height_mm: Optional[float] = None) -> bytes:
+        """Downsample and recompress an image; returns the original bytes if
+        that does not make it smaller."""
+        image = Image.open(io.BytesIO(data))
+        source_format = image.format
+        rotated = image.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8)
+        size = image.size[::-1] if rotated else image.size
+        target = self.target_size(size, width_mm, height_mm)
+        if source_format == 'JPEG':
+            # Let the decoder skip detail we are about to throw away
+            image.draft('RGB', target[::-1] if rotated else target)
+        dpi = image.info.get('dpi')
+        image = ImageOps.exif_transpose(image)
+        if image.size != target:
+            if image.mode in ('1', 'P'):
+                # Palette images only resize with NEAREST
+                image = image.convert('RGBA')
+            image = image.resize(target, Image.LANCZOS)
+            dpi = (self.dpi, self.dpi)
+
+        out = io.BytesIO()
+        if source_format == 'JPEG':
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(out, 'JPEG', quality=self.jpeg_quality, optimize=True,
+                       **({'dpi': dpi} if dpi else {}))
+        else:
+            image.save(out, 'PNG', optimize=True, **({'dpi': dpi} if dpi else {}))
+        converted = out.getvalue()
+        return converted if len(converted) < len(data) else data
+
+    def process(self, path: Union[str, Path], width_mm: Optional[float] = None,
+                height_mm: Optional[float] = None) -> bytes:
+        """
+        The image at path, prepared for display at width_mm x height_mm.
+
+        Args:
+            path: Image file
+            width_mm: Display width, or None to follow height_mm
+            height_mm: Display height, or None to follow width_mm
+
+        Returns:
+            The processed image (PNG or JPEG)
+        """
+        stat = os.stat(path)
+        memo_key = (str(path), stat.st_mtime_ns, stat.st_size, width_mm, height_mm)
+        processed = self._processed.get(memo_key)
+        if processed is not None:
+            return processed
+
+        data = Path(path).read_bytes()
+        key = content_key({
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'width_mm': width_mm,
+            'height_mm': height_mm,
+            'dpi': self.dpi,
+            'jpeg_quality': self.jpeg_quality,
+            'version': IMAGE_PIPELINE_VERSION,
+        })
+        processed = self.cache.get(key) if self.cache else None
+        if processed is None:
+            processed = self.convert(data, width_mm, height_mm)
+            logger.debug(f"Processed {path}: {len(data)} -> {len(processed)} bytes")
+            if self.cache:
+                self.cache.put(key, processed)
+        self._processed[memo_key] = processed
+        return processed
+
+    def inline_image(self, tpl, path: Union[str, Path], width_mm: Optional[float] = None,
+                     height_mm: Optional[float] = None) -> InlineImage:
+        """An InlineImage of the processed image, sized width_mm x height_mm."""
+        return InlineImage(tpl, io.BytesIO(self.process(path, width_mm, height_mm)),
+                           width=Mm(width_mm) if width_mm else None,
+                           height=Mm(height_mm) if height_mm else None)
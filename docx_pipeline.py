@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Multi-process mail merge for the docxtpl-based generators.
+
+Contexts are streamed to worker processes through a bounded queue, so a
+huge context file never sits in memory and a fast reader cannot run ahead
+of the renderers. Each worker parses the template once into a
+BulkDocxTemplate and then renders and saves documents until the queue is
+drained. A document that fails (bad context, unwritable path, ...) is
+reported with its error and the batch carries on.
+
+Each generator contributes a ``prepare_context(template, context)`` that
+turns a plain context (as read from CSV or JSON Lines) into a renderable
+one, e.g. by adding images:
+
+    give_me_a_doc_w_img  adds the shared image given by --image
+    doc_create_again     adds the framework table and images from --image-dir
+    kolumner             turns {"rows": [[...], ...]} into the column table
+
+Usage:
+    python docx_pipeline.py letter.docx people.csv 'out/{index:05d}_{name}.docx' \\
+        --generator give_me_a_doc_w_img --image logo.png --workers 4
+"""
+import argparse
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# How long the parent waits for a result before checking on the workers
+POLL_INTERVAL = 0.5
+
+Prepare = Callable[[Any, Dict[str, Any]], Dict[str, Any]]
+
+
+class DocumentError(NamedTuple):
+    index: int
+    output: Optional[str]
+    context: Dict[str, Any]
+    error: str
+
+
+class PipelineResult(NamedTuple):
+    written: int
+    failed: int
+    errors: List[DocumentError]
+
+
+def _describe(error: BaseException) -> str:
+    return f"{type(error).__name__}: {error}"
+
+
+def _worker(template_path: str, prepare: Optional[Prepare], tasks, results) -> None:
+    """Render (index, output, context) tasks until a None sentinel arrives."""
+    from give_me_a_doc_w_img import BulkDocxTemplate
+
+    try:
+        template = BulkDocxTemplate(template_path)
+    except Exception as e:
+        results.put(('fatal', None, None, _describe(e)))
+        return
+
+    created_dirs = set()
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        index, output, context = task
+        error = None
+        try:
+            if prepare is not None:
+                context = prepare(template, context)
+            template.render(context)
+            path = Path(output)
+            if path.parent not in created_dirs:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                created_dirs.add(path.parent)
+            template.save(path)
+        except Exception as e:
+            error = _describe(e)
+            template.discard_relationships()
+        results.put(('done', index, output, error))
+
+
+def run_pipeline(
+    template_path: Union[str, Path],
+    contexts: Iterable[Dict[str, Any]],
+    output_path: str,
+    workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    prepare: Optional[Prepare] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    log_every: int = 1000
+) -> PipelineResult:
+    """
+    Render one document per context in a pool of worker processes.
+
+    Args:
+        template_path: Path to the .docx template file with Jinja2 placeholders
+        contexts: Template contexts, e.g. from give_me_a_doc_w_img.iter_contexts;
+            consumed lazily
+        output_path: Format string for each document's path, using ``index``
+            and the context's keys (e.g. 'out/{index:05d}_{name}.docx')
+        workers: Number of worker processes (default: CPU count)
+        queue_size: Contexts waiting for a worker at most (default: 4 per worker)
+        prepare: Optional function of (template, context) returning the context
+            to render; it must be picklable, i.e. a module-level function or a
+            functools.partial of one
+        progress: Optional function called with (written, failed) after every
+            document
+        log_every: Log progress after every this many documents
+
+    Returns:
+        Counts of written and failed documents, and an error per failed one
+
+    Raises:
+        FileNotFoundError: If the template file is not found
+        RuntimeError: If the workers cannot load the template
+    """
+    template_path = Path(template_path)
+    if not template_path.exists():
+        raise FileNotFoundError(f"Template file not found: {template_path}")
+    workers = workers or os.cpu_count() or 1
+    queue_size = queue_size or workers * 4
+
+    mp = multiprocessing.get_context()
+    tasks = mp.Queue(queue_size)
+    results = mp.Queue()
+    processes = [mp.Process(target=_worker, args=(str(template_path), prepare, tasks, results),
+                            daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    # Contexts handed out but not yet reported, by index
+    pending: Dict[int, tuple] = {}
+    lock = threading.Lock()
+    stop = threading.Event()
+    feeder_state = {'submitted': 0, 'done': False, 'error': None}
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                tasks.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def feed() -> None:
+        try:
+            for index, context in enumerate(contexts):
+                try:
+                    output = output_path.format(index=index, **context)
+                    error = None
+                except (KeyError, IndexError, TypeError, ValueError) as e:
+                    output, error = None, f"Bad output path: {_describe(e)}"
+                with lock:
+                    pending[index] = (output, context)
+                    feeder_state['submitted'] += 1
+                if error is not None:
+                    results.put(('done', index, None, error))
+                elif not put((index, output, context)):
+                    return
+        except Exception as e:
+            feeder_state['error'] = e
+            stop.set()
+        finally:
+            feeder_state['done'] = True
+            for _ in processes:
+                if not put(None):
+                    break
+
+    feeder = threading.Thread(target=feed, name='docx-pipeline-feeder', daemon=True)
+    feeder.start()
+
+    written = 0
+    errors: List[DocumentError] = []
+    fatal = None
+    start = time.perf_counter()
+    try:
+        while True:
+            with lock:
+                finished = feeder_state['done'] and not pending
+            if finished or stop.is_set():
+                break
+            try:
+                kind, index, output, error = results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    # Whatever the workers still held is lost
+                    with lock:
+                        lost = sorted(pending.items()) if feeder_state['done'] else []
+                    if feeder_state['done']:
+                        for index, (output, context) in lost:
+                            errors.append(DocumentError(index, output, context,
+                                                        'Worker exited before finishing'))
+                        with lock:
+                            pending.clear()
+                    else:
+                        fatal = 'All workers exited'
+                        stop.set()
+                continue
+
+            if kind == 'fatal':
+                fatal = f"Could not load template {template_path}: {error}"
+                stop.set()
+                break
+            with lock:
+                _, context = pending.pop(index)
+            if error is None:
+                written += 1
+            else:
+                errors.append(DocumentError(index, output, context, error))
+                logger.warning(f"Document {index} failed: {error}")
+            done = written + len(errors)
+            if progress is not None:
+                progress(written, len(errors))
+            if done % log_every == 0:
+                rate = done / (time.perf_counter() - start)
+                logger.info(f"Processed {done} documents ({rate:.1f} docs/s)")
+    finally:
+        # Let the feeder hand the remaining sentinels to live workers
+        while feeder.is_alive() and not stop.is_set() and any(p.is_alive() for p in processes):
+            feeder.join(POLL_INTERVAL)
+        stop.set()
+        feeder.join()
+        for process in processes:
+            process.join(timeout=POLL_INTERVAL if fatal else 5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        tasks.cancel_join_thread()
+        results.cancel_join_thread()
+
+    if fatal:
+        raise RuntimeError(fatal)
+    if feeder_state['error'] is not None:
+        raise feeder_state['error']
+
+    errors.sort()
+    elapsed = time.perf_counter() - start
+    logger.info(f"Generated {written} documents from {template_path} in {elapsed:.1f}s "
+                f"({len(errors)} failed)")
+    return PipelineResult(written, len(errors), errors)
+
+
+def generator_prepare(name: str, args: argparse.Namespace) -> Prepare:
+    """The prepare_context of a generator module, bound to the CLI options."""
+    images = None
+    if args.image_dpi:
+        from docx_images import ImagePreprocessor
+        images = ImagePreprocessor(dpi=args.image_dpi, cache_dir=args.image_cache)
+    if name == 'give_me_a_doc_w_img':
+        import give_me_a_doc_w_img
+        image_size = {'width': args.image_width} if args.image_width else None
+        return functools.partial(give_me_a_doc_w_img.prepare_context,
+                                 image_path=args.image, image_size=image_size, images=images)
+    if name == 'doc_create_again':
+        import doc_create_again
+        return functools.partial(doc_create_again.prepare_context, image_dir=args.image_dir,
+                                 images=images)
+    import kolumner
+    return kolumner.prepare_context
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=__doc__.split('\n\n', 1)[1])
+    parser.add_argument('template', help='The .docx template')
+    parser.add_argument('contexts', help='CSV or JSON Lines file with one context per document')
+    parser.add_argument('output', help="Output path pattern, e.g. 'out/{index:05d}.docx'")
+    parser.add_argument('--generator', default='give_me_a_doc_w_img',
+                        choices=['give_me_a_doc_w_img', 'doc_create_again', 'kolumner'],
+                        help='Module whose prepare_context is applied (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--queue-size', type=int,
+                        help='Contexts waiting for a worker at most (default: 4 per worker)')
+    parser.add_argument('--image', help='give_me_a_doc_w_img: image embedded in every document')
+    parser.add_argument('--image-width', type=float,
+                        help='give_me_a_doc_w_img: image width in mm (default: 100)')
+    parser.add_argument('--image-dir', default='.',
+                        help='doc_create_again: directory containing the images')
+    parser.add_argument('--image-dpi', type=int,
+                        help='Downsample images to this resolution at their display size')
+    parser.add_argument('--image-cache',
+                        help='Directory caching downsampled images between runs')
+    parser.add_argument('--errors', help='Write failed documents as JSON Lines to this file')
+    args = parser.parse_args()
+
+    from give_me_a_doc_w_img import iter_contexts
+
+    if args.image and not Path(args.image).exists():
+        parser.error(f"Image file not found: {args.image}")
+
+    result = run_pipeline(args.template, iter_contexts(args.contexts), args.output,
+                          workers=args.workers, queue_size=args.queue_size,
+                          prepare=generator_prepare(args.generator, args))
+
+    if args.errors:
+        with open(args.errors, 'w', encoding='utf-8') as f:
+            for error in result.errors:
+                f.write(json.dumps(error._asdict(), ensure_ascii=False, default=str) + '\n')
+    print(f"Written: {result.written}, failed: {result.failed}")
+    sys.exit(1 if result.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
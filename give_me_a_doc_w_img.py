@@ -3,13 +3,22 @@ Create a Word document with an embedded image using python-docx-template and Jin
 
 This module provides functionality to generate Word documents by combining a template
 (.docx file with Jinja2 syntax) with dynamic content including embedded images.
+For batches, generate_documents_from_template renders any number of contexts from
+one parsed template (see BulkDocxTemplate).
 """
+import csv
+import io
+import json
+import re
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Iterable, Iterator, Optional, Set, Tuple, Union
 from docxtpl import DocxTemplate, InlineImage
 from docx.shared import Mm
+from jinja2 import Environment, Template
 import logging
 
+from docx_images import ImagePreprocessor
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,7 +32,8 @@ def generate_document_from_template(
     context: Dict[str, Any],
     image_path: Optional[str] = None,
     image_placeholder: str = 'image',
-    image_size: Optional[Dict[str, float]] = None
+    image_size: Optional[Dict[str, float]] = None,
+    images: Optional[ImagePreprocessor] = None
 ) -> None:
     """
     Generate a Word document by populating a template with provided context and optional image.
@@ -39,6 +49,8 @@ def generate_document_from_template(
         image_path: Optional path to an image file to embed in the document
         image_placeholder: The name of the placeholder in the template where the image should be inserted
         image_size: Optional dictionary with 'width' and/or 'height' in millimeters
+        images: Optional preprocessor that downsamples the image to its
+            display size before embedding it
 
     Raises:
         FileNotFoundError: If template or image file is not found
@@ -77,12 +89,16 @@ def generate_document_from_template(
                 image_size = {'width': 100}  # Default width of 100mm
 
             # Create InlineImage and add to context
-            img = InlineImage(
-                doc,
-                image_path,
-                width=Mm(image_size.get('width')) if 'width' in image_size else None,
-                height=Mm(image_size.get('height')) if 'height' in image_size else None
-            )
+            if images is not None:
+                img = images.inline_image(doc, image_path, image_size.get('width'),
+                                          image_size.get('height'))
+            else:
+                img = InlineImage(
+                    doc,
+                    str(image_path),
+                    width=Mm(image_size.get('width')) if 'width' in image_size else None,
+                    height=Mm(image_size.get('height')) if 'height' in image_size else None
+                )
             context[image_placeholder] = img
 
         # Render the template with context
@@ -100,6 +116,310 @@ def generate_document_from_template(
         logger.error(f"Error generating document: {e}")
         raise
 
+class SharedInlineImage(InlineImage):
+    """An InlineImage used by every document rendered from a BulkDocxTemplate.
+
+    The image part is added to the package and its drawing XML is built on
+    first use; later documents reuse both instead of re-reading the image.
+    """
+
+    def __init__(self, tpl: 'BulkDocxTemplate', image_descriptor, width=None, height=None):
+        super().__init__(tpl, image_descriptor, width=width, height=height)
+        self._xml: Dict[str, str] = {}
+
+    def _insert_image(self) -> str:
+        part = self.tpl.current_rendering_part
+        xml = self._xml.get(part.partname)
+        if xml is None:
+            rels_before = set(part.rels)
+            xml = self._xml[part.partname] = super()._insert_image()
+            self.tpl.keep_relationships(set(part.rels) - rels_before)
+        return xml
+
+
+class BulkDocxTemplate(DocxTemplate):
+    """A DocxTemplate that renders many documents from a single parse.
+
+    DocxTemplate reloads the .docx after every render, and re-cleans and
+    recompiles the template XML each time. Here the package is loaded once,
+    the pristine body, headers, footers and footnotes are kept aside, and
+    the cleaned-up XML and compiled Jinja2 templates (core properties
+    included) are cached, so each document costs one Jinja2 render and one
+    save.
+
+    This overrides DocxTemplate internals, so docxtpl is pinned to the
+    minor version it was written against (0.20) in pyproject.toml.
+
+    Example:
+        >>> template = BulkDocxTemplate('letter.docx')
+        >>> for i, context in enumerate(contexts):
+        ...     template.render(context)
+        ...     template.save(f'output/letter_{i}.docx')
+    """
+
+    PROPERTIES = ('author', 'comments', 'identifier', 'language', 'subject', 'title')
+    FOOTNOTES_TYPE = ('application/vnd.openxmlformats-officedocument'
+                      '.wordprocessingml.footnotes+xml')
+
+    def __init__(self, template_file, jinja_env: Optional[Environment] = None):
+        """
+        Load and parse the template.
+
+        Args:
+            template_file: Path or file object of the .docx template
+            jinja_env: Jinja2 environment used when render is not given one
+        """
+        super().__init__(template_file)
+        self.jinja_env = jinja_env or Environment()
+        self.init_docx()
+
+        main_part = self.docx._part
+        self._body_xml = self.xml_to_string(self.docx._element.body)
+        self._part_xml = {
+            rel_key: self.get_part_xml(part)
+            for uri in (self.HEADER_URI, self.FOOTER_URI)
+            for rel_key, part in self.get_headers_footers(uri)
+        }
+        self._properties = {prop: getattr(self.docx.core_properties, prop)
+                            for prop in self.PROPERTIES}
+        self._footnotes = {part: part.blob for part in main_part.package.parts
+                           if part.content_type == self.FOOTNOTES_TYPE}
+        self._base_rels: Set[str] = set(main_part.rels)
+        self._patched: Dict[str, str] = {}
+        # Compiled templates by environment and source
+        self._compiled: Dict[Tuple[Environment, str], Template] = {}
+        self._escaping_envs: Dict[Environment, Environment] = {}
+        self._shared_images: Dict[tuple, SharedInlineImage] = {}
+
+    def init_docx(self, reload: bool = False) -> None:
+        # Never reload: rendering always starts from the saved pristine XML
+        if not self.docx:
+            super().init_docx()
+
+    def get_xml(self) -> str:
+        return self._body_xml
+
+    def patch_xml(self, src_xml: str) -> str:
+        patched = self._patched.get(src_xml)
+        if patched is None:
+            patched = self._patched[src_xml] = super().patch_xml(src_xml)
+        return patched
+
+    def _compile(self, source: str, jinja_env: Optional[Environment] = None,
+                 split_paragraphs: bool = False) -> Template:
+        # Keyed on the source as given, so a hit costs no rewriting
+        jinja_env = jinja_env or self.jinja_env
+        template = self._compiled.get((jinja_env, source))
+        if template is None:
+            text = re.sub(r"<w:p([ >])", r"\n<w:p\1", source) if split_paragraphs else source
+            template = self._compiled[jinja_env, source] = jinja_env.from_string(text)
+        return template
+
+    def render_xml_part(self, src_xml, part, context, jinja_env=None):
+        # Same steps as DocxTemplate.render_xml_part with the compile cached
+        template = self._compile(src_xml, jinja_env, split_paragraphs=True)
+        self.current_rendering_part = part
+        dst_xml = template.render(context)
+        dst_xml = re.sub(r"\n<w:p([ >])", r"<w:p\1", dst_xml)
+        dst_xml = (
+            dst_xml.replace("{_{", "{{")
+            .replace("}_}", "}}")
+            .replace("{_%", "{%")
+            .replace("%_}", "%}")
+        )
+        return self.resolve_listing(dst_xml)
+
+    def build_headers_footers_xml(self, context, uri, jinja_env=None):
+        for rel_key, part in self.get_headers_footers(uri):
+            xml = self._part_xml[rel_key]
+            encoding = self.get_headers_footers_encoding(xml)
+            xml = self.render_xml_part(self.patch_xml(xml), part, context, jinja_env)
+            yield rel_key, xml.encode(encoding)
+
+    def render_properties(self, context, jinja_env=None) -> None:
+        for prop, source in self._properties.items():
+            setattr(self.docx.core_properties, prop,
+                    self._compile(source, jinja_env).render(context))
+
+    def render_footnotes(self, context, jinja_env=None) -> None:
+        for part, blob in self._footnotes.items():
+            part._blob = blob
+        super().render_footnotes(context, jinja_env or self.jinja_env)
+
+    def render(self, context: Dict[str, Any], jinja_env: Optional[Environment] = None,
+               autoescape: bool = False) -> None:
+        """
+        Render a context, like DocxTemplate.render.
+
+        Args:
+            context: Template variables
+            jinja_env: Jinja2 environment, default the constructor's
+            autoescape: Escape XML special characters in context values
+        """
+        jinja_env = jinja_env or self.jinja_env
+        if autoescape and not jinja_env.autoescape:
+            # An escaping copy, so the caller's environment is left as it is
+            escaping = self._escaping_envs.get(jinja_env)
+            if escaping is None:
+                escaping = self._escaping_envs[jinja_env] = jinja_env.overlay(autoescape=True)
+            jinja_env = escaping
+        super().render(context, jinja_env)
+
+    def shared_image(self, image_path: Union[str, Path], width=None, height=None,
+                     images: Optional[ImagePreprocessor] = None) -> SharedInlineImage:
+        """An image embedded once and reused by every rendered document,
+        downsampled to its display size if images is given."""
+        key = (str(image_path), width, height, images is not None)
+        image = self._shared_images.get(key)
+        if image is None:
+            descriptor = str(image_path)
+            if images is not None:
+                descriptor = io.BytesIO(images.process(image_path, width and width.mm,
+                                                       height and height.mm))
+            image = self._shared_images[key] = SharedInlineImage(
+                self, descriptor, width=width, height=height)
+        return image
+
+    def keep_relationships(self, rel_ids: Set[str]) -> None:
+        """Keep relationships (e.g. of shared images) across documents."""
+        self._base_rels |= rel_ids
+
+    def discard_relationships(self) -> None:
+        """Drop images and links the current document added, so they don't
+        pile up in the following documents. Called by save, and by callers
+        abandoning a document whose render failed."""
+        rels = self.docx._part.rels
+        for rel_id in set(rels) - self._base_rels:
+            del rels[rel_id]
+            # python-docx's cache of related parts, if it has one
+            getattr(rels, '_target_parts_by_rId', {}).pop(rel_id, None)
+
+    def save(self, filename, *args, **kwargs) -> None:
+        try:
+            super().save(filename, *args, **kwargs)
+        finally:
+            self.discard_relationships()
+
+
+def iter_contexts(data_path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Stream template contexts from a CSV (one context per row, keyed by the
+    header) or JSON Lines (one object per line) file.
+
+    Raises:
+        ValueError: If the file type is not supported
+    """
+    data_path = Path(data_path)
+    suffix = data_path.suffix.lower()
+    if suffix not in ('.csv', '.jsonl', '.ndjson'):
+        raise ValueError(f"Unsupported context file type: {data_path.suffix}")
+    with data_path.open(encoding='utf-8', newline='') as f:
+        if suffix == '.csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def prepare_context(
+    template: BulkDocxTemplate,
+    context: Dict[str, Any],
+    image_path: Optional[str] = None,
+    image_placeholder: str = 'image',
+    image_size: Optional[Dict[str, float]] = None,
+    images: Optional[ImagePreprocessor] = None
+) -> Dict[str, Any]:
+    """
+    Add the shared image, if any, to a context for a bulk template.
+
+    Args:
+        template: Template the context will be rendered with
+        context: Template variables
+        image_path: Optional image embedded in every document
+        image_placeholder: The name of the placeholder for the image
+        image_size: Optional dictionary with 'width' and/or 'height' in millimeters
+        images: Optional preprocessor that downsamples the image
+
+    Returns:
+        A new context with the image added
+    """
+    if not image_path:
+        return context
+    image_size = image_size or {'width': 100}  # Default width of 100mm
+    image = template.shared_image(
+        image_path,
+        width=Mm(image_size['width']) if 'width' in image_size else None,
+        height=Mm(image_size['height']) if 'height' in image_size else None,
+        images=images
+    )
+    return {**context, image_placeholder: image}
+
+
+def generate_documents_from_template(
+    template_path: str,
+    contexts: Iterable[Dict[str, Any]],
+    output_path: Union[str, Callable[[int, Dict[str, Any]], str]],
+    image_path: Optional[str] = None,
+    image_placeholder: str = 'image',
+    image_size: Optional[Dict[str, float]] = None,
+    images: Optional[ImagePreprocessor] = None,
+    log_every: int = 1000
+) -> int:
+    """
+    Generate one document per context from a template that is parsed only once.
+
+    Args:
+        template_path: Path to the .docx template file with Jinja2 placeholders
+        contexts: Template contexts, e.g. from iter_contexts
+        output_path: Output path per document; either a format string using
+            ``index`` and the context's keys (e.g. 'out/{index:05d}_{name}.docx'),
+            or a function of (index, context)
+        image_path: Optional image embedded in every document; it is added to
+            the package once and shared by all documents
+        image_placeholder: The name of the placeholder for the image
+        image_size: Optional dictionary with 'width' and/or 'height' in millimeters
+        images: Optional preprocessor that downsamples the image
+        log_every: Log progress after every this many documents
+
+    Returns:
+        Number of documents written
+
+    Raises:
+        FileNotFoundError: If template or image file is not found
+    """
+    template_path = Path(template_path)
+    if not template_path.exists():
+        raise FileNotFoundError(f"Template file not found: {template_path}")
+    template = BulkDocxTemplate(template_path)
+
+    if image_path and not Path(image_path).exists():
+        raise FileNotFoundError(f"Image file not found: {image_path}")
+
+    if isinstance(output_path, str):
+        pattern = output_path
+        output_path = lambda index, context: pattern.format(index=index, **context)
+
+    created_dirs = set()
+    count = 0
+    for index, context in enumerate(contexts):
+        context = prepare_context(template, context, image_path, image_placeholder, image_size,
+                                  images)
+        template.render(context)
+
+        path = Path(output_path(index, context))
+        if path.parent not in created_dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            created_dirs.add(path.parent)
+        template.save(path)
+        count += 1
+        if count % log_every == 0:
+            logger.info(f"Generated {count} documents")
+
+    logger.info(f"Generated {count} documents from {template_path}")
+    return count
+
+
 def main():
     """Example usage of the document generation function."""
     try:
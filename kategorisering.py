@@ -0,0 +1,247 @@
+"""
+Fast categorization of bank transactions by keyword.
+
+banken.kategorisera lowercases each description and tries every keyword of
+every category with ``in``, row by row through Series.apply. Categorizer
+gives the same answers (the first category, in table order, with a keyword
+that is a substring of the description) but:
+
+- categorizes each distinct description only once; bank exports repeat
+  the same merchant strings thousands of times, so a column of millions of
+  rows usually needs only a few thousand matches, which are then mapped
+  back with a numpy take, and
+- matches a column with one vectorized ``str.contains`` per category,
+  using a single regex alternation of the category's keywords. With
+  pandas' Arrow-backed strings (pyarrow installed) this runs in C++
+  instead of a Python loop.
+
+With a cache_path, the categories of normalized descriptions are also kept
+in a bounded LRU cache that is stored in SQLite between runs, so a repeat
+import only matches merchants it has never seen. The cache remembers the
+keyword table it was built with and starts over when the table changes.
+
+Example:
+    >>> from banken import kategorier
+    >>> with Categorizer(kategorier, cache_path='kategorier.sqlite') as categorizer:
+    ...     df["Kategori"] = categorizer.categorize_series(df["Text"])
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY = 'Övrigt'
+
+
+def normalize(description) -> str:
+    """The cache key of a description: its text lowercased, which is all the
+    matching looks at."""
+    return str(description).lower()
+
+
+class CategoryCache:
+    """Bounded LRU map of normalized description -> category, kept in SQLite.
+
+    Entries live in memory while in use and are written back by save (or
+    close), most recently used first, so the next run starts with the
+    entries that were most useful.
+    """
+
+    def __init__(self, db_path: Union[str, Path], signature: str, max_entries: int = 100_000):
+        """
+        Open (or create) the cache.
+
+        Args:
+            db_path: SQLite database file
+            signature: Identifies the keyword table; a change drops all entries
+            max_entries: Entries kept, least recently used ones are evicted
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS categories (
+                description TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                rank INTEGER NOT NULL
+            );
+        """)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        if row is None or row[0] != signature:
+            if row is not None:
+                logger.info("Keyword table changed, invalidating category cache")
+            self._conn.execute("DELETE FROM categories")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)", (signature,))
+            self._conn.commit()
+
+        # Least recently used first
+        rows = self._conn.execute(
+            "SELECT description, category FROM categories ORDER BY rank DESC LIMIT ?",
+            (max_entries,)).fetchall()
+        self._entries: 'OrderedDict[str, str]' = OrderedDict(reversed(rows))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        """The cached category of a normalized description, or None."""
+        category = self._entries.get(key)
+        if category is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return category
+
+    def put(self, key: str, category: str) -> None:
+        self._entries[key] = category
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the entries back to disk, most recently used first."""
+        if not self._dirty:
+            return
+        with self._conn:
+            self._conn.execute("DELETE FROM categories")
+            self._conn.executemany(
+                "INSERT INTO categories (description, category, rank) VALUES (?, ?, ?)",
+                ((key, category, rank) for rank, (key, category)
+                 in enumerate(reversed(self._entries.items()))))
+        self._dirty = False
+
+    def close(self) -> None:
+        self.save()
+        self._conn.close()
+
+
+class Categorizer:
+    """Keyword table compiled for matching many descriptions."""
+
+    def __init__(self, categories: Dict[str, List[str]], default: str = DEFAULT_CATEGORY,
+                 cache_path: Optional[Union[str, Path]] = None, cache_size: int = 100_000):
+        """
+        Args:
+            categories: Keywords per category; earlier categories win when
+                keywords of several categories match. Keywords match
+                case-insensitively anywhere in a description.
+            default: Category of descriptions without a matching keyword
+            cache_path: Optional SQLite file caching categories between runs
+            cache_size: Descriptions kept in the cache
+        """
+        self.default = default
+        # (keyword, category) by priority; a repeated keyword keeps its first category
+        keywords: Dict[str, str] = {}
+        for category, words in categories.items():
+            for word in words:
+                if word:
+                    keywords.setdefault(word.lower(), category)
+        self._keywords: List[Tuple[str, str]] = list(keywords.items())
+        self._patterns: List[Tuple[str, str]] = [
+            (category, '|'.join(re.escape(word) for word, owner in self._keywords
+                                if owner == category))
+            for category in categories
+            if any(owner == category for _, owner in self._keywords)
+        ]
+        self.cache: Optional[CategoryCache] = None
+        if cache_path is not None:
+            self.cache = CategoryCache(cache_path, self.signature, cache_size)
+
+    @property
+    def signature(self) -> str:
+        """Stable hash of the keyword table and default category."""
+        payload = json.dumps([self.default, self._keywords], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _match(self, text: str) -> str:
+        for keyword, category in self._keywords:
+            if keyword in text:
+                return category
+        return self.default
+
+    def categorize(self, description) -> str:
+        """The category of one description."""
+        text = normalize(description)
+        if self.cache is None:
+            return self._match(text)
+        category = self.cache.get(text)
+        if category is None:
+            category = self._match(text)
+            self.cache.put(text, category)
+        return category
+
+    def _categorize_texts(self, texts: pd.Series) -> np.ndarray:
+        """Categories of normalized descriptions."""
+        result = np.full(len(texts), self.default, dtype=object)
+        # Later categories first, so earlier ones overwrite them
+        for category, pattern in reversed(self._patterns):
+            matches = texts.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+            result[matches] = category
+        return result
+
+    def _categorize_keys(self, keys: List[str]) -> np.ndarray:
+        """Categories of distinct normalized descriptions, through the cache."""
+        if self.cache is None:
+            return self._categorize_texts(pd.Series(keys, dtype='str'))
+        result = np.array([self.cache.get(key) for key in keys], dtype=object)
+        missing = np.flatnonzero(pd.isna(result))
+        if len(missing):
+            new_keys = [keys[i] for i in missing]
+            found = self._categorize_texts(pd.Series(new_keys, dtype='str'))
+            result[missing] = found
+            for key, category in zip(new_keys, found):
+                self.cache.put(key, category)
+        return result
+
+    def categorize_series(self, descriptions: pd.Series, dedup: bool = True) -> pd.Series:
+        """
+        Categorize a column.
+
+        Args:
+            descriptions: Transaction descriptions; missing values are
+                categorized as the text 'nan', like str() does
+            dedup: Match each distinct description once and map the results
+                back; only worth turning off when nearly all are distinct.
+                With a cache, descriptions are always deduplicated and each
+                distinct one is looked up in the cache
+
+        Returns:
+            The categories, with the index of descriptions
+        """
+        if dedup or self.cache is not None:
+            codes, uniques = pd.factorize(descriptions, use_na_sentinel=False)
+            keys = [normalize(value) for value in uniques]
+            categories = self._categorize_keys(keys).take(codes)
+        else:
+            texts = descriptions.astype('str').fillna('nan').str.lower()
+            categories = self._categorize_texts(texts)
+        return pd.Series(categories, index=descriptions.index, name=descriptions.name)
+
+    def close(self) -> None:
+        """Store the cache, if any."""
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self) -> 'Categorizer':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,19 +1,42 @@
+from typing import Any, Dict, Iterable, List
+
 from docxtpl import DocxTemplate
 
-# Ladda din Word-mall
-doc = DocxTemplate("kolumns.docx")
+from docx_tables import TableXml
+
+
+def table_context(rows: Iterable[List[str]]) -> Dict[str, Any]:
+    # Kontextdata: varje rad har en lista med kolumner
+    return {"tbl_contents": [{"cols": list(row)} for row in rows]}
+
+
+def prepare_context(template: DocxTemplate, context: Dict[str, Any]) -> Dict[str, Any]:
+    # För docx_pipeline: {"rows": [[...], ...]} blir tbl_contents, och
+    # tbl_xml för mallar med {{p tbl_xml }}; första raden blir rubrik.
+    # tbl_xml byggs bara om mallen använder den, och klarar stora tabeller
+    if "rows" in context:
+        rows = context["rows"]
+        context = {**context, **table_context(rows),
+                   "tbl_xml": TableXml(rows[1:], header=rows[0] if rows else None)}
+    return context
+
+
+def main():
+    # Ladda din Word-mall
+    doc = DocxTemplate("kolumns.docx")
+
+    context = table_context([
+        ["integration tests", "rpv2", "cv90"],
+        ["test_one", "passed", "passed"],
+        ["test_two", "failed", "passed"],
+    ])
+
+    # Rendera mallen med data
+    doc.render(context)
 
-# Kontextdata: varje rad har en lista med kolumner
-context = {
-    "tbl_contents": [
-        {"cols": ["integration tests", "rpv2", "cv90"]},
-        {"cols": ["test_one", "passed", "passed"]},
-        {"cols": ["test_two", "failed", "passed"]},
-    ]
-}
+    # Spara resultatet
+    doc.save("output.docx")
 
-# Rendera mallen med data
-doc.render(context)
 
-# Spara resultatet
-doc.save("output.docx")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Persistent analysis cache for sort_pdf_files.
+
+Results are stored in a SQLite database keyed by file path, size, mtime and
+a SHA-256 of the file contents. A file whose path, size and mtime are
+unchanged is served from the cache without being read; a file whose stat
+changed is hashed, and if the content matches a cached entry (touched,
+copied or moved files) that entry is reused.
+
+The cache remembers the configuration it was built with (search terms and
+other analysis options). Opening it with a different configuration drops all
+entries, since the stored results would no longer be valid.
+
+Index postings (``_postings``, see pdf_index) are kept out of the JSON
+result and stored in the index's compact varint form, so a cached file can
+still be added to a new index without being extracted again.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of stored results changes
+SCHEMA_VERSION = 3
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    """Return the hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with Path(path).open('rb') as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def config_signature(config: Dict[str, Any]) -> str:
+    """Stable hash of the analysis configuration a cache was built with."""
+    payload = json.dumps({'schema': SCHEMA_VERSION, **config}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """On-disk cache of PDFAnalyzer results.
+
+    Example:
+        >>> with AnalysisCache('cache.sqlite', {'search_terms': terms}) as cache:
+        ...     result = cache.get(path)
+        ...     if result is None:
+        ...         result = analyzer.analyze_pdf(path)
+        ...         cache.put(path, result)
+    """
+
+    def __init__(self, db_path: Union[str, Path], config: Dict[str, Any],
+                 rebuild: bool = False, commit_every: int = 200):
+        """
+        Open (or create) the cache.
+
+        Args:
+            db_path: SQLite database file
+            config: Analysis configuration; a change invalidates all entries
+            rebuild: Drop all entries before use
+            commit_every: Number of writes between commits
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self._uncommitted = 0
+        # path -> (size, mtime_ns, sha256) computed by get() for use by put()
+        self._stats: Dict[str, Tuple[int, int, str]] = {}
+
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        signature = config_signature(config)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        stale = rebuild or row is None or row[0] != signature
+        if stale:
+            # Recreated rather than emptied, in case an older schema built it
+            self._conn.execute("DROP TABLE IF EXISTS results")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                result TEXT NOT NULL,
+                postings BLOB
+            );
+            CREATE INDEX IF NOT EXISTS results_sha256 ON results (sha256, size);
+        """)
+
+        if stale:
+            if row is not None and not rebuild:
+                logger.info("Analysis settings changed, invalidating cache")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)",
+                (signature,)
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every cached result."""
+        self._conn.execute("DELETE FROM results")
+        self._conn.commit()
+
+    def get(self, pdf_path: Union[str, Path]) -> Optional[Dict]:
+        """Return the cached result for a file, or None if it must be analyzed."""
+        pdf_path = Path(pdf_path).absolute()
+        key = str(pdf_path)
+        try:
+            stat = pdf_path.stat()
+        except OSError:
+            return None
+
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, result, postings FROM results WHERE path = ?", (key,)
+        ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            self.hits += 1
+            return self._load(row[2], row[3])
+
+        # Stat changed or unknown path: fall back to the content hash
+        try:
+            sha256 = file_sha256(pdf_path)
+        except OSError:
+            return None
+        self._stats[key] = (stat.st_size, stat.st_mtime_ns, sha256)
+
+        row = self._conn.execute(
+            "SELECT result, postings FROM results WHERE sha256 = ? AND size = ? LIMIT 1",
+            (sha256, stat.st_size)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        result = self._load(*row)
+        result['filename'] = pdf_path.name
+        result['filepath'] = key
+        self.put(pdf_path, result)
+        return result
+
+    @staticmethod
+    def _load(result: str, postings: Optional[bytes]) -> Dict:
+        loaded = json.loads(result)
+        if postings is not None:
+            from pdf_index import decode_document_postings
+            loaded['_postings'] = decode_document_postings(postings)
+        return loaded
+
+    def put(self, pdf_path: Union[str, Path], result: Dict) -> None:
+        """Store a result. Failed analyses and per-run timings are not cached."""
+        pdf_path = Path(pdf_path).absolute()
+        key = str(pdf_path)
+        stats = self._stats.pop(key, None)
+        if result.get('status'):
+            return
+        if stats is None:
+            try:
+                stat = pdf_path.stat()
+                stats = (stat.st_size, stat.st_mtime_ns, file_sha256(pdf_path))
+            except OSError:
+                return
+
+        postings = result.get('_postings')
+        if postings is not None:
+            from pdf_index import encode_document_postings
+            postings = encode_document_postings(postings)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (path, size, mtime_ns, sha256, result, postings) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, *stats,
+             json.dumps({k: v for k, v in result.items() if k not in ('_timings', '_postings')},
+                        default=str),
+             postings)
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self._conn.commit()
+            self._uncommitted = 0
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self) -> 'AnalysisCache':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,142 @@
+"""
+Duplicate detection for sort_pdf_files.
+
+Two stages:
+
+- ExactDeduplicator runs before extraction. Files are grouped by size and
+  only hashed once a second file of the same size shows up, so unique files
+  are never read twice. Later copies of a file are reported as duplicates of
+  the first one and never extracted.
+- SimHash signatures of the extracted text find near-duplicates: the same
+  contract re-exported, re-scanned or with a changed date. Signatures are
+  64-bit, computed over word 3-shingles, and two documents are clustered
+  when their signatures differ in at most a few bits.
+"""
+import hashlib
+import logging
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pdf_cache import file_sha256
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+_WORD = re.compile(r'\w+')
+
+
+class ExactDeduplicator:
+    """Detect byte-identical files among those seen so far."""
+
+    def __init__(self):
+        # size -> [(path, sha256 or None until a size collision forces hashing)]
+        self._by_size: Dict[int, List[Tuple[Path, Optional[str]]]] = defaultdict(list)
+        self.duplicates = 0
+
+    def check(self, pdf_path: Path) -> Optional[Dict]:
+        """Return a 'duplicate' result if the file was seen before, else None."""
+        try:
+            size = pdf_path.stat().st_size
+        except OSError:
+            return None
+        seen = self._by_size[size]
+        if not seen:
+            seen.append((pdf_path, None))
+            return None
+
+        sha256 = file_sha256(pdf_path)
+        for i, (other, other_sha256) in enumerate(seen):
+            if other_sha256 is None:
+                other_sha256 = file_sha256(other)
+                seen[i] = (other, other_sha256)
+            if other_sha256 == sha256:
+                self.duplicates += 1
+                return {
+                    'filename': pdf_path.name,
+                    'filepath': str(pdf_path.absolute()),
+                    'size_mb': size / (1024 * 1024),
+                    'status': 'duplicate',
+                    'message': f'Duplicate of {other.absolute()}',
+                    'duplicate_of': str(other.absolute())
+                }
+        seen.append((pdf_path, sha256))
+        return None
+
+
+class SimHasher:
+    """Incrementally compute a 64-bit SimHash of text fed page by page."""
+
+    def __init__(self, shingle_size: int = 3):
+        self.shingle_size = shingle_size
+        self._features: Counter = Counter()
+
+    def update(self, text: str) -> None:
+        words = _WORD.findall(text.lower())
+        n = self.shingle_size
+        if len(words) < n:
+            if words:
+                self._features[' '.join(words)] += 1
+            return
+        self._features.update(' '.join(words[i:i + n]) for i in range(len(words) - n + 1))
+
+    def hexdigest(self) -> Optional[str]:
+        """Signature as 16 hex digits, or None if no text was seen."""
+        if not self._features:
+            return None
+        totals = [0] * SIMHASH_BITS
+        for feature, weight in self._features.items():
+            h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+            for bit, char in enumerate(format(h, '064b')):
+                totals[bit] += weight if char == '1' else -weight
+        value = 0
+        for total in totals:
+            value = (value << 1) | (total > 0)
+        return f'{value:016x}'
+
+
+class NearDuplicateIndex:
+    """Cluster documents whose SimHash signatures are within ``max_distance`` bits.
+
+    Signatures are split into ``max_distance + 1`` bands; by the pigeonhole
+    principle two signatures within the distance share at least one band
+    exactly, so only documents sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self._bands = max_distance + 1
+        self._signatures: Dict[str, int] = {}
+        self._buckets: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        self._parent: Dict[str, str] = {}
+
+    def _band_keys(self, signature: int) -> Iterable[Tuple[int, int]]:
+        width = SIMHASH_BITS // self._bands
+        for band in range(self._bands):
+            # The last band takes any leftover bits
+            bits = width if band < self._bands - 1 else SIMHASH_BITS - width * band
+            yield band, (signature >> (band * width)) & ((1 << bits) - 1)
+
+    def _find(self, key: str) -> str:
+        while self._parent[key] != key:
+            self._parent[key] = self._parent[self._parent[key]]
+            key = self._parent[key]
+        return key
+
+    def add(self, document: str, signature_hex: str) -> None:
+        signature = int(signature_hex, 16)
+        self._signatures[document] = signature
+        self._parent[document] = document
+        for band_key in self._band_keys(signature):
+            for other in self._buckets[band_key]:
+                if bin(signature ^ self._signatures[other]).count('1') <= self.max_distance:
+                    self._parent[self._find(document)] = self._find(other)
+            self._buckets[band_key].append(document)
+
+    def clusters(self) -> List[List[str]]:
+        """Groups of two or more near-duplicate documents."""
+        groups: Dict[str, List[str]] = defaultdict(list)
+        for document in self._signatures:
+            groups[self._find(document)].append(document)
+        return sorted(sorted(group) for group in groups.values() if len(group) > 1)
@@ -0,0 +1,165 @@
+"""
+Streaming PDF file discovery for sort_pdf_files.
+
+Walks a directory tree with ``os.scandir`` and yields matching files as they
+are found, so analysis can start immediately instead of waiting for the whole
+tree to be listed. Entries within a directory are visited in sorted order so
+repeated runs see files in the same order (which resumed scans rely on).
+"""
+import fnmatch
+import logging
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# How symbolic links are treated while walking
+SYMLINK_POLICIES = ('ignore', 'files', 'follow')
+
+
+def _matches(rel_path: str, name: str, patterns: Sequence[str]) -> bool:
+    return any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def iter_pdf_files(
+    directory: Union[str, Path],
+    recursive: bool = True,
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None,
+    max_depth: Optional[int] = None,
+    symlinks: str = 'files',
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    extensions: Sequence[str] = ('.pdf',)
+) -> Iterator[Path]:
+    """
+    Yield PDF files under a directory as they are discovered.
+
+    Args:
+        directory: Directory to walk
+        recursive: Whether to descend into subdirectories
+        include: Glob patterns a file must match (relative path or name)
+        exclude: Glob patterns for files and directories to leave out;
+            excluded directories are not descended into
+        max_depth: Deepest subdirectory level to visit (0 = top level only)
+        symlinks: 'ignore' skips all links, 'files' includes linked files but
+            does not enter linked directories, 'follow' follows both
+        min_size: Ignore files smaller than this many bytes
+        max_size: Ignore files larger than this many bytes
+        extensions: File extensions to accept, compared case-insensitively
+
+    Yields:
+        Path of each matching file
+    """
+    if symlinks not in SYMLINK_POLICIES:
+        raise ValueError(f"Unknown symlink policy {symlinks!r}, choose from {SYMLINK_POLICIES}")
+    if not recursive:
+        max_depth = 0
+    extensions = tuple(ext.lower() for ext in extensions)
+    include = list(include or [])
+    exclude = list(exclude or [])
+    follow = symlinks == 'follow'
+
+    root = Path(directory)
+    visited: Set[Tuple[int, int]] = set()
+    # Stack of (directory path, path relative to root, depth)
+    stack: List[Tuple[str, str, int]] = [(str(root), '', 0)]
+    while stack:
+        current, rel_dir, depth = stack.pop()
+        try:
+            if follow:
+                # Guard against symlink loops
+                stat = os.stat(current)
+                if (stat.st_dev, stat.st_ino) in visited:
+                    continue
+                visited.add((stat.st_dev, stat.st_ino))
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            logger.warning(f"Cannot read directory {current}: {e}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+            try:
+                is_link = entry.is_symlink()
+                if is_link and symlinks == 'ignore':
+                    continue
+                if entry.is_dir(follow_symlinks=follow):
+                    if (max_depth is None or depth < max_depth) and \
+                            not _matches(rel_path, entry.name, exclude):
+                        subdirs.append((entry.path, rel_path, depth + 1))
+                    continue
+                if not entry.is_file(follow_symlinks=True):
+                    continue
+            except OSError:
+                continue
+
+            if not entry.name.lower().endswith(extensions):
+                continue
+            if include and not _matches(rel_path, entry.name, include):
+                continue
+            if exclude and _matches(rel_path, entry.name, exclude):
+                continue
+            if min_size is not None or max_size is not None:
+                try:
+                    size = entry.stat(follow_symlinks=True).st_size
+                except OSError:
+                    continue
+                if (min_size is not None and size < min_size) or \
+                        (max_size is not None and size > max_size):
+                    continue
+            yield Path(entry.path)
+
+        # Push in reverse so subdirectories are walked in sorted order
+        stack.extend(reversed(subdirs))
+
+
+def file_matches(
+    pdf_path: Union[str, Path],
+    directory: Union[str, Path],
+    recursive: bool = True,
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None,
+    max_depth: Optional[int] = None,
+    symlinks: str = 'files',
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    extensions: Sequence[str] = ('.pdf',)
+) -> bool:
+    """Check a single file against the filters of iter_pdf_files.
+
+    Used for files reported one at a time (e.g. by a file watcher) rather
+    than found by walking the tree.
+    """
+    pdf_path = Path(pdf_path)
+    try:
+        rel_parts = pdf_path.relative_to(directory).parts
+    except ValueError:
+        return False
+    if not recursive:
+        max_depth = 0
+    if max_depth is not None and len(rel_parts) - 1 > max_depth:
+        return False
+    if not pdf_path.name.lower().endswith(tuple(ext.lower() for ext in extensions)):
+        return False
+
+    # Every enclosing directory must survive the exclude patterns too
+    for i in range(1, len(rel_parts) + 1):
+        if _matches('/'.join(rel_parts[:i]), rel_parts[i - 1], exclude or []):
+            return False
+    if include and not _matches('/'.join(rel_parts), pdf_path.name, include):
+        return False
+
+    try:
+        if pdf_path.is_symlink() and symlinks == 'ignore':
+            return False
+        if not pdf_path.is_file():
+            return False
+        size = pdf_path.stat().st_size
+    except OSError:
+        return False
+    return not ((min_size is not None and size < min_size) or
+                (max_size is not None and size > max_size))
@@ -0,0 +1,357 @@
+"""
+Inverted full-text index for sort_pdf_files.
+
+While a PDF is analyzed its page text can be tokenized into postings
+(word -> pages and word positions on each page). InvertedIndex stores them in
+a SQLite database so later questions are answered without re-extracting any
+text:
+
+    invoice AND 2023
+    (tax OR vat) AND NOT draft
+    "purchase order" 2023
+
+Adjacent terms are implicitly ANDed, quoted phrases match consecutive words
+on one page, and NOT binds tighter than AND, which binds tighter than OR.
+
+Postings are stored one row per (word, document) as a varint-encoded blob of
+page numbers and delta-encoded word positions, which keeps the index a
+fraction of the size of the extracted text.
+"""
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# word -> [[page, position, position, ...], ...], JSON-serializable so
+# postings survive the worker pipe unchanged
+Postings = Dict[str, List[List[int]]]
+# Query result: document id -> pages where the query matched
+Matches = Dict[int, Set[int]]
+
+_WORD = re.compile(r'\w+')
+_QUERY_TOKEN = re.compile(r'\s*(\(|\)|"[^"]*"?|[^\s()"]+)')
+_OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase words, as they are indexed."""
+    return _WORD.findall(text.lower())
+
+
+def add_page_postings(postings: Postings, page_number: int, text: str) -> None:
+    """Add the words of one page to a document's postings."""
+    page_positions: Dict[str, List[int]] = {}
+    for position, word in enumerate(tokenize(text)):
+        page_positions.setdefault(word, []).append(position)
+    for word, positions in page_positions.items():
+        postings.setdefault(word, []).append([page_number, *positions])
+
+
+def _encode_varints(numbers: List[int], out: bytearray) -> None:
+    for n in numbers:
+        while n >= 0x80:
+            out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        out.append(n)
+
+
+def _decode_varints(data: bytes) -> Iterator[int]:
+    n = shift = 0
+    for byte in data:
+        n |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield n
+            n = shift = 0
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        n |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return n, offset
+        shift += 7
+
+
+def encode_postings(pages: List[List[int]]) -> bytes:
+    """Encode one word's [[page, positions...], ...] for a document."""
+    out = bytearray()
+    previous_page = 0
+    for page, *positions in sorted(pages):
+        _encode_varints([page - previous_page, len(positions)], out)
+        previous_position = 0
+        for position in positions:
+            _encode_varints([position - previous_position], out)
+            previous_position = position
+        previous_page = page
+    return bytes(out)
+
+
+def decode_postings(data: bytes) -> Dict[int, List[int]]:
+    """Decode a postings blob into {page: [positions]}."""
+    numbers = _decode_varints(data)
+    pages: Dict[int, List[int]] = {}
+    page = 0
+    for page_delta in numbers:
+        page += page_delta
+        positions = pages[page] = []
+        position = 0
+        for _ in range(next(numbers)):
+            position += next(numbers)
+            positions.append(position)
+    return pages
+
+
+def encode_document_postings(postings: Postings) -> bytes:
+    """Encode all postings of a document, in the index's varint form, into one blob."""
+    out = bytearray()
+    for term, pages in postings.items():
+        word = term.encode('utf-8')
+        data = encode_postings(pages)
+        _encode_varints([len(word), len(data)], out)
+        out += word
+        out += data
+    return bytes(out)
+
+
+def decode_document_postings(data: bytes) -> Postings:
+    """Decode a blob from encode_document_postings."""
+    postings: Postings = {}
+    offset = 0
+    while offset < len(data):
+        word_length, offset = _read_varint(data, offset)
+        data_length, offset = _read_varint(data, offset)
+        term = data[offset:offset + word_length].decode('utf-8')
+        offset += word_length
+        pages = decode_postings(data[offset:offset + data_length])
+        offset += data_length
+        postings[term] = [[page, *positions] for page, positions in pages.items()]
+    return postings
+
+
+def parse_query(query: str) -> Tuple:
+    """
+    Parse a boolean query into a tree of tuples.
+
+    Nodes are ('term', word), ('phrase', [words]), ('not', node) and
+    ('and' | 'or', left, right).
+
+    Raises:
+        ValueError: If the query is empty or malformed
+    """
+    tokens = _QUERY_TOKEN.findall(query)
+    position = 0
+
+    def peek() -> Optional[str]:
+        return tokens[position] if position < len(tokens) else None
+
+    def take() -> str:
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or() -> Tuple:
+        node = parse_and()
+        while peek() == 'OR':
+            take()
+            node = ('or', node, parse_and())
+        return node
+
+    def parse_and() -> Tuple:
+        node = parse_not()
+        while peek() not in (None, ')', 'OR'):
+            if peek() == 'AND':
+                take()
+            node = ('and', node, parse_not())
+        return node
+
+    def parse_not() -> Tuple:
+        if peek() == 'NOT':
+            take()
+            return ('not', parse_not())
+        return parse_atom()
+
+    def parse_atom() -> Tuple:
+        token = peek()
+        if token is None:
+            raise ValueError(f"Unexpected end of query: {query!r}")
+        if token == ')' or token in _OPERATORS:
+            raise ValueError(f"Unexpected {token!r} in query: {query!r}")
+        take()
+        if token == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise ValueError(f"Missing ')' in query: {query!r}")
+            take()
+            return node
+        if token.startswith('"') and (len(token) == 1 or not token.endswith('"')):
+            raise ValueError(f"Unterminated phrase in query: {query!r}")
+        words = tokenize(token)
+        if not words:
+            raise ValueError(f"No searchable words in {token!r}")
+        if len(words) == 1:
+            return ('term', words[0])
+        return ('phrase', words)
+
+    node = parse_or()
+    if peek() is not None:
+        raise ValueError(f"Unexpected {peek()!r} in query: {query!r}")
+    return node
+
+
+class InvertedIndex:
+    """On-disk inverted index of PDF page text.
+
+    Example:
+        >>> with InvertedIndex('pdfs.index') as index:
+        ...     index.add(result['filepath'], result['_postings'])
+        ...     index.search('invoice AND "tax report"')
+        [('/docs/a.pdf', [1, 3])]
+    """
+
+    def __init__(self, db_path: Union[str, Path], commit_every: int = 200):
+        """
+        Open (or create) the index.
+
+        Args:
+            db_path: SQLite database file
+            commit_every: Commit after this many added documents
+        """
+        self.db_path = Path(db_path)
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self._term_ids: Dict[str, int] = {}
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "  id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS terms ("
+            "  id INTEGER PRIMARY KEY, term TEXT UNIQUE NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "  term_id INTEGER NOT NULL, doc_id INTEGER NOT NULL, data BLOB NOT NULL,"
+            "  PRIMARY KEY (term_id, doc_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS postings_by_doc ON postings (doc_id);"
+        )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO terms (term) VALUES (?)", (term,))
+            term_id = self._conn.execute(
+                "SELECT id FROM terms WHERE term = ?", (term,)).fetchone()[0]
+            self._term_ids[term] = term_id
+        return term_id
+
+    def add(self, path: Union[str, Path], postings: Postings) -> None:
+        """Index a document, replacing any earlier version of it."""
+        key = str(Path(path).absolute())
+        self.remove(key)
+        doc_id = self._conn.execute(
+            "INSERT INTO documents (path) VALUES (?)", (key,)).lastrowid
+        self._conn.executemany(
+            "INSERT INTO postings (term_id, doc_id, data) VALUES (?, ?, ?)",
+            ((self._term_id(term), doc_id, encode_postings(pages))
+             for term, pages in postings.items())
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def remove(self, path: Union[str, Path]) -> None:
+        """Drop a document from the index, if present."""
+        key = str(Path(path).absolute())
+        row = self._conn.execute("SELECT id FROM documents WHERE path = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM postings WHERE doc_id = ?", row)
+            self._conn.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def _postings(self, term: str) -> Iterator[Tuple[int, bytes]]:
+        return self._conn.execute(
+            "SELECT p.doc_id, p.data FROM terms t JOIN postings p ON p.term_id = t.id "
+            "WHERE t.term = ?", (term,))
+
+    def _match_term(self, term: str) -> Matches:
+        return {doc_id: set(decode_postings(data)) for doc_id, data in self._postings(term)}
+
+    def _match_phrase(self, words: List[str]) -> Matches:
+        # Narrow down to documents holding every word before decoding positions
+        per_word = [dict(self._postings(word)) for word in words]
+        candidates = set.intersection(*(set(p) for p in per_word))
+        matches: Matches = {}
+        for doc_id in candidates:
+            decoded = [decode_postings(p[doc_id]) for p in per_word]
+            pages = set.intersection(*(set(d) for d in decoded))
+            for page in pages:
+                starts = set(decoded[0][page])
+                for offset, positions in enumerate(decoded[1:], 1):
+                    starts &= {position - offset for position in positions[page]}
+                if starts:
+                    matches.setdefault(doc_id, set()).add(page)
+        return matches
+
+    def _evaluate(self, node: Tuple) -> Matches:
+        kind = node[0]
+        if kind == 'term':
+            return self._match_term(node[1])
+        if kind == 'phrase':
+            return self._match_phrase(node[1])
+        if kind == 'not':
+            excluded = self._evaluate(node[1])
+            return {doc_id: set() for (doc_id,) in self._conn.execute("SELECT id FROM documents")
+                    if doc_id not in excluded}
+        left, right = self._evaluate(node[1]), self._evaluate(node[2])
+        if kind == 'and':
+            return {doc_id: left[doc_id] | right[doc_id] for doc_id in left.keys() & right.keys()}
+        for doc_id, pages in right.items():
+            left[doc_id] = left.get(doc_id, set()) | pages
+        return left
+
+    def search(self, query: str) -> List[Tuple[str, List[int]]]:
+        """
+        Find documents matching a boolean query.
+
+        Args:
+            query: Query string, see the module docstring for the syntax
+
+        Returns:
+            (path, pages) pairs sorted by path; pages lists where the positive
+            terms of the query matched and is empty for purely negated queries
+
+        Raises:
+            ValueError: If the query is malformed
+        """
+        matches = self._evaluate(parse_query(query))
+        if not matches:
+            return []
+        paths = {}
+        ids = list(matches)
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            paths.update(self._conn.execute(
+                f"SELECT id, path FROM documents WHERE id IN ({','.join('?' * len(batch))})",
+                batch))
+        return sorted((paths[doc_id], sorted(pages)) for doc_id, pages in matches.items())
+
+    def commit(self) -> None:
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self) -> 'InvertedIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,98 @@
+"""
+Checkpoint journal for resumable sort_pdf_files runs.
+
+Every time the report writer flushes a batch, the journal appends one line
+recording the files completed since the previous checkpoint and the report
+size at that point. Each line is written with a single ``os.write`` on an
+``O_APPEND`` descriptor and fsynced, after the report itself has been
+fsynced. A process killed mid-write can therefore leave at most one torn
+last line, which is ignored (and cut off) when the journal is reopened.
+
+On resume the report is truncated back to the last checkpointed size, so
+rows written after the final checkpoint are not duplicated, and every file
+listed in the journal is skipped.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+
+class ScanJournal:
+    """Append-only record of the files a scan has completed."""
+
+    def __init__(self, path: Union[str, Path], resume: bool = True):
+        """
+        Args:
+            path: Journal file
+            resume: Load an existing journal; otherwise start a fresh one
+        """
+        self.path = Path(path)
+        self.completed: Set[str] = set()
+        self.report_offset: Optional[int] = None
+        if resume:
+            self._load()
+        elif self.path.exists():
+            self.path.unlink()
+        self._fd = os.open(str(self.path), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        data = self.path.read_bytes()
+        good = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            self.completed.update(entry['files'])
+            self.report_offset = entry['report_offset']
+            good += len(line)
+        if good < len(data):
+            logger.warning(f"Discarding torn entry at the end of {self.path}")
+            os.truncate(str(self.path), good)
+        if self.completed:
+            logger.info(f"Resuming: {len(self.completed)} files already done")
+
+    def restore_report(self, report_path: Union[str, Path]) -> None:
+        """Cut the report back to its size at the last checkpoint before
+        resuming; a report without any checkpoint is deleted.
+
+        If the report has gone missing the journal is worthless, so it is
+        reset and the scan starts over.
+        """
+        report_path = Path(report_path)
+        if self.report_offset is None:
+            if report_path.exists():
+                report_path.unlink()
+            return
+        if not report_path.exists() or report_path.stat().st_size < self.report_offset:
+            logger.warning(f"{report_path} does not match {self.path}, starting over")
+            self.completed.clear()
+            self.report_offset = None
+            os.truncate(str(self.path), 0)
+            if report_path.exists():
+                report_path.unlink()
+            return
+        os.truncate(str(report_path), self.report_offset)
+
+    def record(self, files: Iterable[str], report_offset: int) -> None:
+        """Durably record completed files and the report size covering them."""
+        files = list(files)
+        entry = json.dumps({'files': files, 'report_offset': report_offset}) + '\n'
+        os.write(self._fd, entry.encode('utf-8'))
+        os.fsync(self._fd)
+        self.completed.update(files)
+        self.report_offset = report_offset
+
+    def close(self, remove: bool = False) -> None:
+        """Close the journal, deleting it if the scan completed."""
+        os.close(self._fd)
+        if remove:
+            self.path.unlink()
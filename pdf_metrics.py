@@ -0,0 +1,263 @@
+"""
+Per-stage timing metrics for sort_pdf_files.
+
+A scan spends its time in five stages:
+
+- discovery: walking the directory tree for PDF files
+- parse: opening a PDF and reading its structure (PyPDF2.PdfReader)
+- extract: page.extract_text()
+- match: term matching and other work on the extracted text
+- report: writing results to the report
+
+PDFAnalyzer times parse, extract and match per file with a StageTimer and
+returns them under the private ``_timings`` key; the scan loop feeds results
+to ScanMetrics, which also times discovery and report writing. With metrics
+disabled the Null* variants are used, whose methods do nothing.
+"""
+import heapq
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+STAGES = ('discovery', 'parse', 'extract', 'match', 'report')
+
+# Counter of results that were skipped, failed or deduplicated, by status
+_STATUS_COUNTERS = {'skipped': 'skipped', 'error': 'errors', 'duplicate': 'duplicates'}
+
+# Upper bucket bounds of the timing histograms, in milliseconds
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class StageTimer:
+    """Accumulate time per stage for one file with lap-style measurements."""
+
+    def __init__(self):
+        self.times: Dict[str, float] = {}
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        """Charge the time since the previous lap to ``stage``."""
+        now = time.perf_counter()
+        self.times[stage] = self.times.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def result(self) -> Dict[str, float]:
+        return {**self.times, 'total': time.perf_counter() - self._start}
+
+
+class NullStageTimer:
+    """StageTimer stand-in used when timings are not collected."""
+
+    def lap(self, stage: str) -> None:
+        pass
+
+
+NULL_STAGE_TIMER = NullStageTimer()
+
+
+class Histogram:
+    """Count, total, extremes and log-scale buckets of durations in seconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        milliseconds = seconds * 1000
+        for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if milliseconds <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def to_dict(self) -> Dict:
+        labels = [f'<={bound}ms' for bound in HISTOGRAM_BOUNDS_MS]
+        labels.append(f'>{HISTOGRAM_BOUNDS_MS[-1]}ms')
+        return {
+            'count': self.count,
+            'total_s': round(self.total, 6),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else None,
+            'min_ms': round(self.min * 1000, 3) if self.count else None,
+            'max_ms': round(self.max * 1000, 3),
+            'histogram': {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class _StageContext:
+    __slots__ = ('metrics', 'stage', 'start')
+
+    def __init__(self, metrics: 'ScanMetrics', stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.metrics.add(self.stage, time.perf_counter() - self.start)
+
+
+class ScanMetrics:
+    """Timing histograms and throughput counters for a whole scan.
+
+    Example:
+        >>> metrics = ScanMetrics()
+        >>> with metrics.stage('report'):
+        ...     writer.write(result)
+        >>> metrics.record_file(result)
+        >>> print(metrics.summary())
+    """
+
+    enabled = True
+
+    def __init__(self, slowest: int = 10):
+        """
+        Args:
+            slowest: Number of slowest files to keep
+        """
+        self.slowest_count = slowest
+        self.stages: Dict[str, Histogram] = {}
+        self.files = Histogram()
+        self.counters = {'files': 0, 'cached': 0, 'skipped': 0, 'errors': 0, 'duplicates': 0,
+                         'pages': 0, 'bytes': 0}
+        # Min-heap of (seconds, path) holding the slowest files
+        self._slowest: List[Tuple[float, str]] = []
+        self._started = time.perf_counter()
+        self._stopped: Optional[float] = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Record time spent in a stage."""
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.add(seconds)
+
+    def stage(self, stage: str) -> _StageContext:
+        """Context manager timing the enclosed block as ``stage``."""
+        return _StageContext(self, stage)
+
+    def record_file(self, result: Dict) -> None:
+        """Count an analysis result and fold in its ``_timings``.
+
+        Results that were not analyzed are counted by their status; one
+        without a status or timings was served from the cache.
+        """
+        timings = result.pop('_timings', None)
+        status = result.get('status')
+        self.counters['files'] += 1
+        self.counters['pages'] += result.get('pages_scanned', result.get('page_count', 0))
+        self.counters['bytes'] += result.get('bytes_read', 0)
+        if status in _STATUS_COUNTERS:
+            self.counters[_STATUS_COUNTERS[status]] += 1
+        elif status is None and timings is None:
+            self.counters['cached'] += 1
+        if timings is None:
+            return
+        total = timings.pop('total')
+        for stage, seconds in timings.items():
+            self.add(stage, seconds)
+        self.files.add(total)
+        entry = (total, result.get('filepath', ''))
+        if len(self._slowest) < self.slowest_count:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def stop(self) -> None:
+        """Mark the end of the scan for throughput figures."""
+        self._stopped = time.perf_counter()
+
+    @property
+    def wall_time(self) -> float:
+        return (self._stopped or time.perf_counter()) - self._started
+
+    def to_dict(self) -> Dict:
+        wall = self.wall_time
+        rate = (lambda n: round(n / wall, 3)) if wall > 0 else (lambda n: None)
+        return {
+            'wall_time_s': round(wall, 6),
+            'counters': dict(self.counters),
+            'throughput': {
+                'files_per_s': rate(self.counters['files']),
+                'pages_per_s': rate(self.counters['pages']),
+                'bytes_per_s': rate(self.counters['bytes']),
+            },
+            'stages': {stage: self.stages[stage].to_dict()
+                       for stage in sorted(self.stages, key=_stage_order)},
+            'files': self.files.to_dict(),
+            'slowest_files': [{'file': path, 'seconds': round(seconds, 6)}
+                              for seconds, path in sorted(self._slowest, reverse=True)],
+        }
+
+    def summary(self) -> str:
+        """Human-readable summary of the metrics."""
+        data = self.to_dict()
+        throughput = data['throughput']
+        lines = [
+            f"Timing ({data['wall_time_s']:.2f}s wall):",
+            f"- {throughput['files_per_s'] or 0:.1f} files/s, "
+            f"{throughput['pages_per_s'] or 0:.1f} pages/s, "
+            f"{(throughput['bytes_per_s'] or 0) / (1024 * 1024):.2f} MB/s",
+        ]
+        counters = data['counters']
+        not_analyzed = [f"{counters[name]} {name}" for name in
+                        ('cached', 'skipped', 'errors', 'duplicates') if counters[name]]
+        if not_analyzed:
+            lines.append(f"- Not analyzed: {', '.join(not_analyzed)}")
+        for stage, stats in data['stages'].items():
+            lines.append(f"- {stage:<9} {stats['total_s']:8.3f}s total, "
+                         f"{stats['count']:6d} calls, mean {stats['mean_ms']:.2f} ms, "
+                         f"max {stats['max_ms']:.2f} ms")
+        if data['slowest_files']:
+            lines.append("- Slowest files:")
+            lines.extend(f"    {entry['seconds']:.3f}s  {entry['file']}"
+                         for entry in data['slowest_files'])
+        return '\n'.join(lines)
+
+    def write(self, path: Union[str, Path]) -> None:
+        """Write the metrics as JSON."""
+        with Path(path).open('w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def _stage_order(stage: str) -> Tuple[int, str]:
+    return (STAGES.index(stage) if stage in STAGES else len(STAGES), stage)
+
+
+class NullMetrics:
+    """ScanMetrics stand-in used when metrics are disabled."""
+
+    enabled = False
+
+    class _NullContext:
+        def __enter__(self) -> None:
+            pass
+
+        def __exit__(self, *exc) -> None:
+            pass
+
+    _null_context = _NullContext()
+
+    def add(self, stage: str, seconds: float) -> None:
+        pass
+
+    def stage(self, stage: str) -> '_NullContext':
+        return self._null_context
+
+    def record_file(self, result: Dict) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,285 @@
+"""
+Incremental report writers for sort_pdf_files.
+
+Each writer receives analysis results one at a time and flushes them to disk
+in batches, so memory stays flat regardless of corpus size and a run that
+dies half-way leaves a usable partial report. Supported formats:
+
+- ``text``: the human readable report
+- ``jsonl``: one JSON object per line, the full result
+- ``csv``: one row per file with flattened columns
+- ``parquet``: same columns as CSV, one row group per batch (needs pyarrow)
+
+Example:
+    >>> with open_report_writer('jsonl', 'report.jsonl') as writer:
+    ...     for result in analyze_files(pdf_files):
+    ...         writer.write(result)
+"""
+import csv
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Type, Union
+
+logger = logging.getLogger(__name__)
+
+# Flattened columns used by the CSV and Parquet writers
+COLUMNS = [
+    'filename', 'filepath', 'size_mb', 'bytes_read', 'page_count', 'has_text', 'score',
+    'found_terms', 'term_hits', 'title', 'author', 'potential_title',
+    'status', 'message',
+]
+
+
+def format_pages(pages: List[int]) -> str:
+    """Format page numbers compactly, e.g. [1, 2, 3, 7] -> '1-3, 7'."""
+    ranges = []
+    for page in pages:
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ', '.join(str(a) if a == b else f'{a}-{b}' for a, b in ranges)
+
+
+def flatten_result(result: Dict) -> Dict:
+    """Flatten an analysis result into the scalar COLUMNS."""
+    meta = result.get('metadata') or {}
+    return {
+        'filename': result.get('filename'),
+        'filepath': result.get('filepath'),
+        'size_mb': result.get('size_mb'),
+        'bytes_read': result.get('bytes_read'),
+        'page_count': result.get('page_count'),
+        'has_text': result.get('has_text'),
+        'score': result.get('score', 0),
+        'found_terms': ';'.join(result.get('found_terms', [])),
+        'term_hits': json.dumps(result.get('term_hits', {}), sort_keys=True),
+        'title': None if meta.get('title') is None else str(meta['title']),
+        'author': None if meta.get('author') is None else str(meta['author']),
+        'potential_title': result.get('potential_title'),
+        'status': result.get('status'),
+        'message': result.get('message'),
+    }
+
+
+class ReportWriter:
+    """Base class: buffers results and writes them out every ``batch_size``."""
+
+    format = ''
+    # Whether the report can be continued by a later run (see pdf_journal)
+    resumable = True
+
+    def __init__(self, output_path: Union[str, Path], append: bool = False,
+                 batch_size: int = 100,
+                 on_flush: Optional[Callable[['ReportWriter'], None]] = None):
+        """
+        Args:
+            output_path: Report file to write
+            append: Continue an existing report instead of overwriting it
+            batch_size: Number of results buffered between flushes
+            on_flush: Called after each batch has been written and fsynced
+        """
+        self.output_path = Path(output_path)
+        self.append = append and self.output_path.exists() and self.output_path.stat().st_size > 0
+        self.batch_size = max(1, batch_size)
+        self.on_flush = on_flush
+        self.count = 0
+        self._batch: List[Dict] = []
+
+    def write(self, result: Dict) -> None:
+        self._batch.append(result)
+        self.count += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._batch:
+            self._write_batch(self._batch)
+            self._batch = []
+            if self.on_flush is not None:
+                self.sync()
+                self.on_flush(self)
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        raise NotImplementedError
+
+    def tell(self) -> int:
+        """Size in bytes of the report written so far."""
+        self._file.flush()
+        return os.fstat(self._file.fileno()).st_size
+
+    def sync(self) -> None:
+        """Force written batches to disk."""
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> 'ReportWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TextReportWriter(ReportWriter):
+    format = 'text'
+
+    def __init__(self, output_path: Union[str, Path], append: bool = False,
+                 batch_size: int = 100,
+                 on_flush: Optional[Callable[[ReportWriter], None]] = None):
+        super().__init__(output_path, append, batch_size, on_flush)
+        self._number = 0
+        if self.append:
+            # Continue the numbering of the existing entries
+            with self.output_path.open(encoding='utf-8') as f:
+                self._number = sum(1 for line in f if re.match(r'\d+\. ', line))
+        self._file = self.output_path.open('a' if self.append else 'w', encoding='utf-8')
+        if not self.append:
+            self._file.write("PDF Analysis Report\n")
+            self._file.write("=" * 50 + "\n\n")
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        f = self._file
+        for result in batch:
+            self._number += 1
+            f.write(f"{self._number}. {result.get('filename', 'Unknown')}\n")
+            f.write(f"   Path: {result.get('filepath', 'N/A')}\n")
+            f.write(f"   Size: {result.get('size_mb', 0):.2f} MB\n")
+            f.write(f"   Pages: {result.get('page_count', 0)}\n")
+            if result.get('status'):
+                f.write(f"   Status: {result['status']} ({result.get('message', '')})\n")
+
+            # Add metadata
+            meta = result.get('metadata', {})
+            if meta.get('title'):
+                f.write(f"   Title: {meta['title']}\n")
+            if meta.get('author'):
+                f.write(f"   Author: {meta['author']}\n")
+
+            # Add found terms
+            if result.get('found_terms'):
+                f.write(f"   Found terms: {', '.join(result['found_terms'])}\n")
+                f.write(f"   Score: {result.get('score', 0)}\n")
+                for term, hits in result.get('term_hits', {}).items():
+                    label = 'page' if len(hits['pages']) == 1 else 'pages'
+                    f.write(f"     {term}: {hits['count']} "
+                            f"({label} {format_pages(hits['pages'])})\n")
+
+            f.write("\n" + "-" * 50 + "\n\n")
+        f.flush()
+
+    def close(self) -> None:
+        super().close()
+        self._file.close()
+
+
+class JsonLinesReportWriter(ReportWriter):
+    format = 'jsonl'
+
+    def __init__(self, output_path: Union[str, Path], append: bool = False,
+                 batch_size: int = 100,
+                 on_flush: Optional[Callable[[ReportWriter], None]] = None):
+        super().__init__(output_path, append, batch_size, on_flush)
+        self._file = self.output_path.open('a' if self.append else 'w', encoding='utf-8')
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        self._file.write(''.join(
+            json.dumps(result, default=str, ensure_ascii=False) + '\n' for result in batch
+        ))
+        self._file.flush()
+
+    def close(self) -> None:
+        super().close()
+        self._file.close()
+
+
+class CsvReportWriter(ReportWriter):
+    format = 'csv'
+
+    def __init__(self, output_path: Union[str, Path], append: bool = False,
+                 batch_size: int = 100,
+                 on_flush: Optional[Callable[[ReportWriter], None]] = None):
+        super().__init__(output_path, append, batch_size, on_flush)
+        self._file = self.output_path.open('a' if self.append else 'w',
+                                           encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=COLUMNS)
+        if not self.append:
+            self._writer.writeheader()
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        self._writer.writerows(flatten_result(result) for result in batch)
+        self._file.flush()
+
+    def close(self) -> None:
+        super().close()
+        self._file.close()
+
+
+class ParquetReportWriter(ReportWriter):
+    """Parquet output, one row group per batch.
+
+    Parquet files cannot be appended to, so ``append`` is not supported.
+    """
+
+    format = 'parquet'
+    resumable = False
+
+    def __init__(self, output_path: Union[str, Path], append: bool = False,
+                 batch_size: int = 1000,
+                 on_flush: Optional[Callable[[ReportWriter], None]] = None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet reports need pyarrow: pip install pyarrow")
+        if append:
+            raise ValueError("Parquet reports cannot be appended to")
+        super().__init__(output_path, False, batch_size, on_flush)
+        self._pa = pa
+        self._schema = pa.schema([
+            ('filename', pa.string()), ('filepath', pa.string()),
+            ('size_mb', pa.float64()), ('bytes_read', pa.int64()),
+            ('page_count', pa.int64()),
+            ('has_text', pa.bool_()), ('score', pa.int64()),
+            ('found_terms', pa.string()), ('term_hits', pa.string()),
+            ('title', pa.string()), ('author', pa.string()),
+            ('potential_title', pa.string()), ('status', pa.string()),
+            ('message', pa.string()),
+        ])
+        # Written through our own file so tell and sync work as for the others
+        self._file = self.output_path.open('wb')
+        self._writer = pq.ParquetWriter(self._file, self._schema)
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        rows = [flatten_result(result) for result in batch]
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self) -> None:
+        super().close()
+        self._writer.close()
+        self._file.close()
+
+
+REPORT_FORMATS: Dict[str, Type[ReportWriter]] = {
+    writer.format: writer
+    for writer in (TextReportWriter, JsonLinesReportWriter, CsvReportWriter, ParquetReportWriter)
+}
+
+
+def open_report_writer(report_format: str, output_path: Union[str, Path],
+                       append: bool = False, **kwargs) -> ReportWriter:
+    """Create a report writer by format name.
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    try:
+        writer = REPORT_FORMATS[report_format]
+    except KeyError:
+        raise ValueError(f"Unknown report format {report_format!r}, "
+                         f"choose from {', '.join(REPORT_FORMATS)}")
+    return writer(output_path, append=append, **kwargs)
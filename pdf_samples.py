@@ -0,0 +1,49 @@
+"""
+Generate small text PDFs for tests and benchmarks.
+
+PyPDF2 cannot lay out text, so each page gets a hand-written content stream
+that draws its text with the built-in Helvetica font.
+"""
+from pathlib import Path
+from typing import Iterable, Union
+
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+
+def _escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_text_pdf(path: Union[str, Path], page_texts: Iterable[str]) -> Path:
+    """Write a PDF with one page per entry in ``page_texts``.
+
+    Args:
+        path: Where to write the PDF.
+        page_texts: Text for each page; lines are split on newlines.
+
+    Returns:
+        The path of the written file.
+    """
+    path = Path(path)
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    }))
+    for text in page_texts:
+        page = PageObject.create_blank_page(None, 612, 792)
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/Font'): DictionaryObject({NameObject('/F1'): font})
+        })
+        lines = ' T* '.join(f'({_escape(line)}) Tj' for line in text.split('\n'))
+        content = DecodedStreamObject()
+        content.set_data(f'BT /F1 10 Tf 12 TL 72 740 Td {lines} ET'.encode('latin-1'))
+        page[NameObject('/Contents')] = writer._add_object(content)
+        writer.add_page(page)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('wb') as f:
+        writer.write(f)
+    return path
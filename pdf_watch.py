@@ -0,0 +1,225 @@
+"""
+Watch a directory and analyze PDFs as they land.
+
+Change notifications come from Linux inotify, called directly through ctypes
+so no extra package is needed. Where inotify is unavailable (other platforms,
+exhausted watch limits) the watcher falls back to polling the tree with
+pdf_discovery.iter_pdf_files.
+
+Files are debounced: a candidate is only analyzed once its size and mtime
+have stayed the same for ``settle`` seconds, so scanners and copy jobs that
+write a PDF in several steps are not picked up half-written.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from pdf_discovery import file_matches, iter_pdf_files
+
+logger = logging.getLogger(__name__)
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT_HEADER = struct.Struct('iIII')
+
+FileState = Tuple[int, int]  # (size, mtime_ns)
+
+
+class InotifyWatcher:
+    """Recursive inotify watch on a directory tree."""
+
+    def __init__(self, directory: Path, recursive: bool = True):
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.recursive = recursive
+        self._dirs: Dict[int, Path] = {}
+        self.overflowed = False
+        self._add_tree(directory)
+
+    def _add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch failed for {directory}: {os.strerror(errno)}")
+        self._dirs[wd] = directory
+
+    def _add_tree(self, directory: Path) -> None:
+        self._add_watch(directory)
+        if not self.recursive:
+            return
+        for root, dirs, _ in os.walk(directory):
+            for name in dirs:
+                self._add_watch(Path(root) / name)
+
+    def read(self, timeout: float) -> Set[Path]:
+        """Wait up to ``timeout`` seconds and return the paths that changed."""
+        changed: Set[Path] = set()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return changed
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & _IN_ISDIR:
+                if self.recursive and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    # New subdirectory: watch it and pick up anything already in it
+                    try:
+                        self._add_tree(path)
+                    except OSError as e:
+                        logger.warning(f"Cannot watch {path}: {e}")
+                    changed.update(p for p in path.rglob('*') if p.is_file())
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def _file_state(path: Path) -> Optional[FileState]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def watch_directory(
+    directory: Path,
+    analyze: Callable[[Path], Dict],
+    on_result: Callable[[Dict], None],
+    recursive: bool = True,
+    discovery_kwargs: Optional[Dict] = None,
+    settle: float = 1.0,
+    poll_interval: float = 2.0,
+    use_inotify: bool = True,
+    known_files: Iterable[Path] = (),
+    stop_event: Optional[threading.Event] = None
+) -> None:
+    """
+    Analyze PDFs as they are created or modified, until stopped.
+
+    Args:
+        directory: Directory to watch
+        analyze: Called with each settled file, returns its analysis
+        on_result: Called with every analysis result
+        recursive: Whether to watch subdirectories
+        discovery_kwargs: Filters as for pdf_discovery.iter_pdf_files
+        settle: Seconds a file's size and mtime must be stable before analysis
+        poll_interval: Seconds between rescans when polling
+        use_inotify: Use inotify when available instead of polling
+        known_files: Files already analyzed (e.g. by an initial scan); they
+            are only re-analyzed once they change
+        stop_event: Set to stop watching; Ctrl-C also stops
+    """
+    directory = Path(directory).absolute()
+    discovery_kwargs = discovery_kwargs or {}
+    # Size limits can only be judged once a file has settled
+    path_filters = {key: value for key, value in discovery_kwargs.items()
+                    if key not in ('min_size', 'max_size')}
+    stop_event = stop_event or threading.Event()
+    tick = min(0.25, settle / 2) if settle > 0 else 0.05
+
+    # Last analyzed (or rejected) state of each file and files waiting to settle
+    analyzed: Dict[Path, Optional[FileState]] = {
+        Path(p).absolute(): _file_state(Path(p)) for p in known_files
+    }
+    pending: Dict[Path, Tuple[Optional[FileState], float]] = {}
+
+    def poll() -> Set[Path]:
+        return {p.absolute() for p in iter_pdf_files(directory, recursive, **discovery_kwargs)}
+
+    watcher = None
+    if use_inotify:
+        try:
+            watcher = InotifyWatcher(directory, recursive)
+            logger.info(f"Watching {directory} with inotify")
+        except OSError as e:
+            logger.warning(f"inotify unavailable ({e}), falling back to polling")
+    if watcher is None:
+        logger.info(f"Polling {directory} every {poll_interval}s")
+    next_poll = time.monotonic()
+
+    try:
+        while not stop_event.is_set():
+            candidates: Set[Path] = set()
+            if watcher is not None:
+                candidates = {p.absolute() for p in watcher.read(tick)}
+                if watcher.overflowed:
+                    logger.warning("inotify queue overflowed, rescanning")
+                    watcher.overflowed = False
+                    candidates |= poll()
+            else:
+                if time.monotonic() >= next_poll:
+                    candidates = poll()
+                    next_poll = time.monotonic() + poll_interval
+                stop_event.wait(tick)
+
+            now = time.monotonic()
+            for path in candidates:
+                if not file_matches(path, directory, recursive, **path_filters):
+                    continue
+                state = _file_state(path)
+                if state is None or analyzed.get(path) == state:
+                    continue
+                if path not in pending or pending[path][0] != state:
+                    pending[path] = (state, now)
+
+            # Analyze files whose size and mtime have settled
+            for path, (state, since) in list(pending.items()):
+                current = _file_state(path)
+                if current is None:
+                    del pending[path]
+                elif current != state:
+                    pending[path] = (current, now)
+                elif now - since >= settle:
+                    del pending[path]
+                    # Empty or filtered files wait until they change again
+                    analyzed[path] = current
+                    if current[0] == 0 or not file_matches(path, directory, recursive,
+                                                           **discovery_kwargs):
+                        continue
+                    logger.info(f"Analyzing: {path}")
+                    on_result(analyze(path))
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
+    finally:
+        if watcher is not None:
+            watcher.close()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Test x target pass/fail matrix from pytest runs.
+
+As a pytest plugin (loaded by conftest.py) it streams the outcome of every
+test into a SQLite results store, one column per target (platform, image,
+configuration...), and can render the matrix as a Word document at the
+end of the run:
+
+    pytest --matrix-db results.sqlite --matrix-target rpv2
+    pytest --matrix-db results.sqlite --matrix-target cv90 --matrix-report matrix.docx
+
+A run only updates the results of its own target, so runs for several
+targets, in parallel or one after another, fill in one matrix; the latest
+outcome of each test counts. With run_pytest.sh the store lands in the
+mounted project directory:
+
+    MATRIX_TARGET=podman ./run_pytest.sh pytest --matrix-db results.sqlite
+
+The report can also be rendered from the store on its own:
+
+    python pytest_matrix.py results.sqlite matrix.docx
+"""
+import argparse
+import logging
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ('passed', 'failed', 'skipped', 'error', 'xfailed', 'xpassed')
+OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+MISSING = '-'
+
+
+class ResultStore:
+    """Latest outcome per (test, target) in SQLite.
+
+    Example:
+        >>> with ResultStore('results.sqlite') as store:
+        ...     store.add('test_main.py::test_one', 'rpv2', 'passed', 0.01)
+    """
+
+    def __init__(self, db_path: Union[str, Path], commit_every: int = 500):
+        """
+        Open (or create) the store.
+
+        Args:
+            db_path: SQLite database file
+            commit_every: Number of results buffered between writes
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.commit_every = commit_every
+        self._pending: List[Tuple[str, str, int, float, str]] = []
+        self._target_ids: Dict[str, int] = {}
+
+        # Several test runs may write to one store at the same time
+        self._conn = sqlite3.connect(str(self.db_path), timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS targets (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS tests (
+                id INTEGER PRIMARY KEY,
+                nodeid TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                test_id INTEGER NOT NULL,
+                target_id INTEGER NOT NULL,
+                outcome INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                run_id TEXT NOT NULL,
+                PRIMARY KEY (test_id, target_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                target_id INTEGER NOT NULL,
+                started REAL NOT NULL,
+                finished REAL
+            );
+        """)
+        self._conn.commit()
+
+    def target_id(self, target: str) -> int:
+        target_id = self._target_ids.get(target)
+        if target_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO targets (name) VALUES (?)", (target,))
+            target_id = self._conn.execute(
+                "SELECT id FROM targets WHERE name = ?", (target,)).fetchone()[0]
+            self._target_ids[target] = target_id
+        return target_id
+
+    def start_run(self, run_id: str, target: str, fresh: bool = False) -> None:
+        """Register a run. Its results replace earlier ones of the same tests
+        on the target; with fresh, all earlier results of the target are
+        dropped, so tests that no longer exist leave the matrix."""
+        target_id = self.target_id(target)
+        if fresh:
+            self._conn.execute("DELETE FROM results WHERE target_id = ?", (target_id,))
+        self._conn.execute("INSERT OR REPLACE INTO runs (run_id, target_id, started) VALUES (?, ?, ?)",
+                           (run_id, target_id, time.time()))
+        self._conn.commit()
+
+    def finish_run(self, run_id: str) -> None:
+        self.flush()
+        self._conn.execute("UPDATE runs SET finished = ? WHERE run_id = ?", (time.time(), run_id))
+        self._conn.commit()
+
+    def add(self, nodeid: str, target: str, outcome: str, duration: float,
+            run_id: str = '') -> None:
+        """Record a test outcome (one of OUTCOMES); written in batches."""
+        self._pending.append((nodeid, target, OUTCOME_CODES[outcome], duration, run_id))
+        if len(self._pending) >= self.commit_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        with self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO tests (nodeid) VALUES (?)",
+                                   [(nodeid,) for nodeid, *_ in pending])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (test_id, target_id, outcome, duration, run_id) "
+                "SELECT id, ?, ?, ?, ? FROM tests WHERE nodeid = ?",
+                [(self.target_id(target), outcome, duration, run_id, nodeid)
+                 for nodeid, target, outcome, duration, run_id in pending])
+
+    def targets(self) -> List[str]:
+        """Targets with results, in the order they were first seen."""
+        return [name for name, in self._conn.execute(
+            "SELECT name FROM targets WHERE id IN (SELECT DISTINCT target_id FROM results) "
+            "ORDER BY id")]
+
+    def matrix(self, targets: Optional[List[str]] = None) -> Iterator[List[str]]:
+        """Rows of [nodeid, outcome per target], ordered by nodeid; MISSING
+        where a test did not run for a target."""
+        targets = targets or self.targets()
+        column = {self.target_id(target): i for i, target in enumerate(targets, 1)}
+        rows = self._conn.execute(
+            "SELECT t.nodeid, r.target_id, r.outcome FROM results r "
+            "JOIN tests t ON t.id = r.test_id ORDER BY t.nodeid")
+        row = None
+        for nodeid, target_id, outcome in rows:
+            if target_id not in column:
+                continue
+            if row is None or row[0] != nodeid:
+                if row is not None:
+                    yield row
+                row = [nodeid] + [MISSING] * len(targets)
+            row[column[target_id]] = OUTCOMES[outcome]
+        if row is not None:
+            yield row
+
+    def summary(self, targets: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Outcome counts per target."""
+        counts: Dict[str, Dict[str, int]] = {target: {} for target in targets or self.targets()}
+        for name, outcome, count in self._conn.execute(
+                "SELECT g.name, r.outcome, COUNT(*) FROM results r "
+                "JOIN targets g ON g.id = r.target_id GROUP BY g.name, r.outcome"):
+            if name in counts:
+                counts[name][OUTCOMES[outcome]] = count
+        return counts
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self) -> 'ResultStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def render_matrix(store: ResultStore, output_path: Union[str, Path],
+                  targets: Optional[List[str]] = None, template_path: Optional[str] = None,
+                  title: str = 'Test results') -> int:
+    """
+    Write the test x target matrix to a Word document.
+
+    Args:
+        store: Results to report
+        output_path: The .docx to write
+        targets: Columns of the matrix (default: every target in the store)
+        template_path: Optional docxtpl template; the matrix is rendered
+            where it has ``{{p matrix }}``, and ``summary`` holds the counts
+        title: Heading of the document when no template is given
+
+    Returns:
+        Number of tests in the matrix
+    """
+    from docx_tables import TableXml, add_table
+
+    targets = targets or store.targets()
+    header = ['test'] + targets
+    count = 0
+
+    def rows() -> Iterator[List[str]]:
+        nonlocal count
+        for row in store.matrix(targets):
+            count += 1
+            yield row
+
+    summary = store.summary(targets)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if template_path:
+        from docxtpl import DocxTemplate
+
+        template = DocxTemplate(template_path)
+        template.render({'matrix': TableXml(rows(), header), 'summary': summary,
+                         'targets': targets})
+        template.save(output_path)
+    else:
+        from docx import Document
+
+        document = Document()
+        document.add_heading(title, level=1)
+        for target, counts in summary.items():
+            document.add_paragraph(
+                f"{target}: " + ', '.join(f"{counts[o]} {o}" for o in OUTCOMES if counts.get(o)),
+                style='List Bullet')
+        section = document.sections[-1]
+        width = (section.page_width - section.left_margin - section.right_margin) // 635  # twips
+        # The test column gets the room the outcome columns don't need
+        outcome_width = min(1400, width // (2 * len(targets))) if targets else 0
+        widths = [width - outcome_width * len(targets)] + [outcome_width] * len(targets)
+        add_table(document, rows(), header=header, style='Table Grid', column_widths=widths)
+        document.save(output_path)
+    logger.info(f"Wrote a {count} x {len(targets)} test matrix to {output_path}")
+    return count
+
+
+def pytest_addoption(parser) -> None:
+    group = parser.getgroup('matrix', 'test x target result matrix')
+    group.addoption('--matrix-db', help='SQLite store that results are streamed into')
+    group.addoption('--matrix-target', default=os.environ.get('MATRIX_TARGET'),
+                    help='Column of this run in the matrix '
+                         '(default: $MATRIX_TARGET or the host name)')
+    group.addoption('--matrix-fresh', action='store_true',
+                    help="Drop the target's earlier results, e.g. of removed tests")
+    group.addoption('--matrix-report', help='Render the matrix of all targets to this .docx '
+                                            'at the end of the run')
+    group.addoption('--matrix-template', help='docxtpl template for --matrix-report, '
+                                              'with {{p matrix }}')
+
+
+class MatrixRecorder:
+    """Collects test outcomes and streams them into a ResultStore."""
+
+    def __init__(self, config, store: ResultStore, target: str):
+        self.config = config
+        self.store = store
+        self.target = target
+        self.run_id = f"{target}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        # Outcome and duration of tests whose teardown has not been reported yet
+        self._running: Dict[str, Tuple[str, float]] = {}
+
+    def pytest_sessionstart(self, session) -> None:
+        self.store.start_run(self.run_id, self.target, self.config.getoption('matrix_fresh'))
+
+    def pytest_runtest_logreport(self, report) -> None:
+        outcome, duration = self._running.get(report.nodeid, ('passed', 0.0))
+        duration += report.duration
+        xfail = hasattr(report, 'wasxfail')
+        if report.when == 'call':
+            if xfail:
+                outcome = 'xfailed' if report.skipped else 'xpassed'
+            else:
+                outcome = report.outcome
+        elif report.failed:
+            outcome = 'error'
+        elif report.skipped:
+            outcome = 'xfailed' if xfail else 'skipped'
+
+        if report.when == 'teardown':
+            self._running.pop(report.nodeid, None)
+            self.store.add(report.nodeid, self.target, outcome, duration, self.run_id)
+        else:
+            self._running[report.nodeid] = (outcome, duration)
+
+    def pytest_sessionfinish(self, session) -> None:
+        self.store.finish_run(self.run_id)
+        report = self.config.getoption('matrix_report')
+        if report:
+            render_matrix(self.store, report,
+                          template_path=self.config.getoption('matrix_template'))
+        self.store.close()
+
+
+def pytest_configure(config) -> None:
+    db_path = config.getoption('matrix_db')
+    # Under pytest-xdist only the controller records, from the workers' reports
+    if not db_path or hasattr(config, 'workerinput'):
+        return
+    target = config.getoption('matrix_target') or socket.gethostname()
+    config.pluginmanager.register(MatrixRecorder(config, ResultStore(db_path), target),
+                                  'matrix-recorder')
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('db', help='SQLite results store')
+    parser.add_argument('output', help='The .docx to write')
+    parser.add_argument('--targets', nargs='+', help='Columns of the matrix (default: all)')
+    parser.add_argument('--template', help='docxtpl template with {{p matrix }}')
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        parser.error(f"Results store not found: {args.db}")
+    with ResultStore(args.db) as store:
+        render_matrix(store, args.output, args.targets, args.template)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,19 +10,34 @@ and identifies potentially relevant information such as:
 - Keywords
 - Common important terms
 """
-import re
-import PyPDF2
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
-from collections import Counter
+from typing import (TYPE_CHECKING, BinaryIO, Deque, Dict, Iterable, Iterator, List,
+                    Optional, Set, Union)
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+import io
+import json
 import logging
+import mmap
+import signal
 import sys
+import threading
+
+from pdf_discovery import SYMLINK_POLICIES, iter_pdf_files
+from pdf_journal import ScanJournal
+from pdf_metrics import NULL_METRICS, NULL_STAGE_TIMER, ScanMetrics, StageTimer
+from pdf_reports import REPORT_FORMATS, TextReportWriter, format_pages, open_report_writer
+from term_engines import ENGINES, create_matcher
+
+# PyPDF2, the process pool, the SQLite cache and the dedup stage are imported
+# where they are first needed, so `--help` and scans of empty directories
+# start fast. See bench_startup.py.
+if TYPE_CHECKING:
+    import PyPDF2
+    from pdf_cache import AnalysisCache
+    from pdf_dedup import ExactDeduplicator
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # Common important terms to look for in documents
@@ -32,203 +47,1054 @@ IMPORTANT_TERMS = [
     'private', 'sensitive', 'proposal', 'nda', 'terms', 'conditions'
 ]
 
+# Anything analyze_pdf accepts: a path, an open binary stream or a PdfReader
+PDFSource = Union[str, Path, BinaryIO, 'PyPDF2.PdfReader']
+
+MB = 1024 * 1024
+
+
+class _CountingStream:
+    """Read-only stream wrapper that counts the bytes handed to PyPDF2."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self.raw.seek(offset, whence)
+        return self.raw.tell()
+
+    def tell(self) -> int:
+        return self.raw.tell()
+
+
+@contextmanager
+def _open_pdf_stream(pdf_path: Path, use_mmap: bool = True) -> Iterator[_CountingStream]:
+    """Open a PDF for reading, memory-mapped when possible.
+
+    Mapping lets the OS page the file in on demand instead of copying it
+    through Python's file buffers. Empty files and file systems without mmap
+    support fall back to a regular file object.
+    """
+    with pdf_path.open('rb') as file:
+        mapped = None
+        if use_mmap:
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                mapped = None
+        try:
+            yield _CountingStream(mapped if mapped is not None else file)
+        finally:
+            if mapped is not None:
+                mapped.close()
+
+
 class PDFAnalyzer:
-    def __init__(self, search_terms: Optional[List[str]] = None):
+    def __init__(
+        self,
+        search_terms: Optional[List[str]] = None,
+        presence_only: bool = False,
+        max_pages: Optional[int] = None,
+        engine: str = 'regex',
+        max_file_size_mb: Optional[float] = None,
+        max_page_count: Optional[int] = None,
+        use_mmap: bool = True,
+        near_duplicates: bool = False,
+        build_index: bool = False,
+        collect_timings: bool = False
+    ):
         """
         Initialize the PDF analyzer.
         
         Args:
             search_terms: Optional list of terms to search for in documents
+            presence_only: Stop extracting text as soon as every search term
+                has been seen; only term presence is reported reliably
+            max_pages: Optional limit on the number of pages extracted per file
+            engine: Term matching engine, see term_engines.ENGINES
+            max_file_size_mb: Skip files larger than this
+            max_page_count: Skip documents with more pages than this
+            use_mmap: Read files through a memory map
+            near_duplicates: Compute a SimHash signature of the extracted text
+                for near-duplicate detection (see pdf_dedup)
+            build_index: Return word postings of the extracted text under
+                the private ``_postings`` key, for pdf_index.InvertedIndex
+            collect_timings: Return per-stage timings under the private
+                ``_timings`` key, for pdf_metrics.ScanMetrics
         """
         self.search_terms = search_terms or IMPORTANT_TERMS
-        self.term_pattern = re.compile(
-            r'\b(' + '|'.join(map(re.escape, self.search_terms)) + r')\b',
-            re.IGNORECASE
-        )
-    
-    def extract_text_from_pdf(self, pdf_path: Union[str, Path]) -> str:
-        """Extract text content from a PDF file."""
+        self.presence_only = presence_only
+        self.max_pages = max_pages
+        self.max_file_size_mb = max_file_size_mb
+        self.max_page_count = max_page_count
+        self.use_mmap = use_mmap
+        self.near_duplicates = near_duplicates
+        self.build_index = build_index
+        self.collect_timings = collect_timings
+        self.matcher = create_matcher(self.search_terms, engine)
+        self._all_terms = frozenset(self.matcher.terms)
+
+    def iter_page_texts(self, reader: 'PyPDF2.PdfReader') -> Iterator[str]:
+        """Yield the text of each page, stopping at ``max_pages``.
+
+        Pages without extractable text yield an empty string so callers can
+        keep track of page numbers.
+        """
+        for number, page in enumerate(islice(reader.pages, self.max_pages), 1):
+            try:
+                yield page.extract_text() or ''
+            except Exception as e:
+                logger.error(f"Error extracting text from page {number}: {str(e)}")
+                yield ''
+
+    def _text_from_reader(self, reader: 'PyPDF2.PdfReader') -> str:
+        return '\n'.join(text for text in self.iter_page_texts(reader) if text).strip()
+
+    def extract_text_from_pdf(self, source: PDFSource) -> str:
+        """Extract text content from a PDF file, open binary stream or reader."""
+        import PyPDF2
+
         try:
-            with pdf_path.open('rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ''
-                for page in reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + '\n'
-                return text.strip()
+            if isinstance(source, PyPDF2.PdfReader):
+                return self._text_from_reader(source)
+            if isinstance(source, (str, Path)):
+                with Path(source).open('rb') as file:
+                    return self._text_from_reader(PyPDF2.PdfReader(file))
+            return self._text_from_reader(PyPDF2.PdfReader(source))
         except Exception as e:
-            logger.error(f"Error reading {pdf_path}: {str(e)}")
+            logger.error(f"Error reading {_source_name(source)}: {str(e)}")
             return ""
     
-    def analyze_pdf(self, pdf_path: Union[str, Path]) -> Dict:
-        """Analyze a PDF file and extract relevant information."""
-        pdf_path = Path(pdf_path)
-        if not pdf_path.exists():
-            return {
-                'status': 'error',
-                'message': f'File not found: {pdf_path}'
-            }
-        
-        file_info = {
-            'filename': pdf_path.name,
-            'filepath': str(pdf_path.absolute()),
-            'size_mb': pdf_path.stat().st_size / (1024 * 1024),
+    def analyze_pdf(self, source: PDFSource) -> Dict:
+        """
+        Analyze a PDF and extract relevant information.
+
+        The document is parsed exactly once: metadata, page count and text all
+        come from the same PdfReader.
+
+        Args:
+            source: Path to a PDF, an open binary stream (file, BytesIO, ...)
+                or an already constructed PdfReader
+
+        Returns:
+            Dictionary with file information, metadata and found terms
+        """
+        if isinstance(source, (str, Path)):
+            pdf_path = Path(source)
+            if not pdf_path.exists():
+                return {
+                    'status': 'error',
+                    'message': f'File not found: {pdf_path}'
+                }
+            size = pdf_path.stat().st_size
+            if self.max_file_size_mb is not None and size > self.max_file_size_mb * MB:
+                return {
+                    **self._file_info(pdf_path.name, str(pdf_path.absolute()), size),
+                    'status': 'skipped',
+                    'message': f'File size {size / MB:.1f} MB exceeds the '
+                               f'{self.max_file_size_mb} MB limit'
+                }
+            try:
+                with _open_pdf_stream(pdf_path, self.use_mmap) as stream:
+                    file_info = self._analyze_stream(stream, pdf_path)
+                    file_info['bytes_read'] = stream.bytes_read
+                    return file_info
+            except Exception as e:
+                logger.error(f"Error analyzing {pdf_path}: {str(e)}")
+                return {
+                    **self._file_info(pdf_path.name, str(pdf_path.absolute()),
+                                      pdf_path.stat().st_size),
+                    'status': 'error',
+                    'message': str(e)
+                }
+        return self._analyze_stream(source, None)
+
+    @staticmethod
+    def _file_info(filename: str, filepath: str, size_bytes: int) -> Dict:
+        return {
+            'filename': filename,
+            'filepath': filepath,
+            'size_mb': size_bytes / (1024 * 1024),
             'metadata': {},
             'found_terms': [],
+            'term_hits': {},
+            'score': 0,
             'page_count': 0,
             'has_text': False
         }
-        
+
+    def _analyze_stream(self, source: PDFSource, pdf_path: Optional[Path]) -> Dict:
+        import PyPDF2
+
+        timer = StageTimer() if self.collect_timings else NULL_STAGE_TIMER
+        if isinstance(source, PyPDF2.PdfReader):
+            reader, stream = source, source.stream
+        else:
+            reader, stream = None, source
+
+        if pdf_path is not None:
+            file_info = self._file_info(pdf_path.name, str(pdf_path.absolute()),
+                                        pdf_path.stat().st_size)
+        else:
+            name = _source_name(source)
+            position = stream.tell()
+            size = stream.seek(0, io.SEEK_END)
+            stream.seek(position)
+            file_info = self._file_info(Path(name).name, name, size)
+
         try:
-            with pdf_path.open('rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                
-                # Extract metadata
-                if reader.metadata:
-                    file_info['metadata'] = {
-                        'title': getattr(reader.metadata, 'title', None),
-                        'author': getattr(reader.metadata, 'author', None),
-                        'creator': getattr(reader.metadata, 'creator', None),
-                        'producer': getattr(reader.metadata, 'producer', None),
-                        'creation_date': getattr(reader.metadata, 'creation_date', None),
-                        'modification_date': getattr(reader.metadata, '/ModDate', None)
-                    }
-                
-                # Extract text and analyze content
-                text = self.extract_text_from_pdf(pdf_path)
-                file_info['has_text'] = bool(text.strip())
-                file_info['page_count'] = len(reader.pages)
-                
-                # Search for important terms
-                if text:
-                    found = set(self.term_pattern.findall(text.lower()))
-                    file_info['found_terms'] = sorted(list(found))
-                    
-                    # Extract potential title (first non-empty line)
-                    first_lines = [line.strip() for line in text.split('\n') if line.strip()]
-                    if first_lines:
-                        file_info['potential_title'] = first_lines[0][:200]  # Limit title length
-                
+            if reader is None:
+                reader = PyPDF2.PdfReader(stream)
+            
+            # Extract metadata
+            if reader.metadata:
+                file_info['metadata'] = {
+                    'title': getattr(reader.metadata, 'title', None),
+                    'author': getattr(reader.metadata, 'author', None),
+                    'creator': getattr(reader.metadata, 'creator', None),
+                    'producer': getattr(reader.metadata, 'producer', None),
+                    'creation_date': getattr(reader.metadata, 'creation_date', None),
+                    'modification_date': getattr(reader.metadata, '/ModDate', None)
+                }
+            
+            file_info['page_count'] = len(reader.pages)
+            timer.lap('parse')
+            if self.max_page_count is not None and file_info['page_count'] > self.max_page_count:
+                file_info['status'] = 'skipped'
+                file_info['message'] = (f"{file_info['page_count']} pages exceeds the "
+                                        f"{self.max_page_count} page limit")
                 return file_info
-                
+
+            # Stream page text from the same reader, matching terms per page
+            # term -> {'count': occurrences, 'pages': [1-based page numbers]}
+            term_hits: Dict[str, Dict] = {}
+            simhasher = None
+            if self.near_duplicates:
+                from pdf_dedup import SimHasher
+                simhasher = SimHasher()
+            postings = None
+            if self.build_index:
+                from pdf_index import add_page_postings
+                postings = {}
+            pages_scanned = 0
+            for page_number, page_text in enumerate(self.iter_page_texts(reader), 1):
+                timer.lap('extract')
+                pages_scanned += 1
+                if not page_text.strip():
+                    continue
+                file_info['has_text'] = True
+                if simhasher is not None:
+                    simhasher.update(page_text)
+                if postings is not None:
+                    add_page_postings(postings, page_number, page_text)
+                for term, count in self.matcher.count(page_text).items():
+                    hits = term_hits.setdefault(term, {'count': 0, 'pages': []})
+                    hits['count'] += count
+                    hits['pages'].append(page_number)
+
+                # Extract potential title (first non-empty line)
+                if 'potential_title' not in file_info:
+                    first_line = next(line.strip() for line in page_text.split('\n') if line.strip())
+                    file_info['potential_title'] = first_line[:200]  # Limit title length
+
+                timer.lap('match')
+                if self.presence_only and term_hits.keys() >= self._all_terms:
+                    break
+
+            file_info['found_terms'] = sorted(term_hits)
+            file_info['term_hits'] = {term: term_hits[term] for term in sorted(term_hits)}
+            file_info['score'] = sum(hits['count'] for hits in term_hits.values())
+            if simhasher is not None:
+                file_info['simhash'] = simhasher.hexdigest()
+            if postings is not None:
+                file_info['_postings'] = postings
+            if pages_scanned < file_info['page_count']:
+                file_info['pages_scanned'] = pages_scanned
+            if self.collect_timings:
+                file_info['_timings'] = timer.result()
+            
+            return file_info
+
+        except MemoryError:
+            logger.error(f"Memory budget exceeded analyzing {file_info['filepath']}")
+            file_info['status'] = 'skipped'
+            file_info['message'] = 'Memory budget exceeded'
+            return file_info
+            
         except Exception as e:
-            logger.error(f"Error analyzing {pdf_path}: {str(e)}")
+            logger.error(f"Error analyzing {file_info['filepath']}: {str(e)}")
             file_info['status'] = 'error'
             file_info['message'] = str(e)
             return file_info
 
-def scan_directory(directory: Path, recursive: bool = True) -> List[Dict]:
+
+def _source_name(source: PDFSource) -> str:
+    """Best-effort display name for a PDF source."""
+    if isinstance(source, (str, Path)):
+        return str(source)
+    import PyPDF2
+
+    if isinstance(source, PyPDF2.PdfReader):
+        source = source.stream
+    return str(getattr(source, 'name', '<stream>'))
+
+
+class AnalysisTimeout(BaseException):
+    """Raised inside an analysis when its per-file time budget runs out.
+
+    Derives from BaseException so the broad ``except Exception`` blocks in
+    PDFAnalyzer cannot swallow it half-way through a file.
+    """
+
+
+def _raise_timeout(signum, frame):
+    raise AnalysisTimeout()
+
+
+def _analyze_with_timeout(analyzer: PDFAnalyzer, pdf_path: Path,
+                          timeout: Optional[float] = None) -> Dict:
+    """Run ``analyzer.analyze_pdf`` with an optional wall-clock budget.
+
+    The budget is enforced with SIGALRM, so it only applies on platforms that
+    have it and when called from the main thread (which is always the case in
+    pool workers).
+    """
+    use_alarm = (
+        timeout is not None and timeout > 0
+        and hasattr(signal, 'setitimer')
+        and threading.current_thread() is threading.main_thread()
+    )
+    if not use_alarm:
+        return analyzer.analyze_pdf(pdf_path)
+
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return analyzer.analyze_pdf(pdf_path)
+    except AnalysisTimeout:
+        logger.error(f"Timed out after {timeout}s analyzing {pdf_path}")
+        return {
+            'filename': Path(pdf_path).name,
+            'filepath': str(Path(pdf_path).absolute()),
+            'status': 'skipped',
+            'message': f'Time budget of {timeout}s exceeded'
+        }
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+# Analyzer owned by each pool worker process, built once by _init_worker
+_worker_analyzer: Optional[PDFAnalyzer] = None
+
+
+def _init_worker(analyzer_kwargs: Dict, memory_limit_mb: Optional[float] = None) -> None:
+    global _worker_analyzer
+    if memory_limit_mb:
+        try:
+            import resource
+            limit = int(memory_limit_mb * MB)
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning(f"Could not apply worker memory limit: {e}")
+    _worker_analyzer = PDFAnalyzer(**analyzer_kwargs)
+
+
+def _analyze_chunk(pdf_paths: List[Path], timeout: Optional[float]) -> List[Dict]:
+    """Analyze a chunk of files inside a pool worker."""
+    results = []
+    for pdf_path in pdf_paths:
+        logger.info(f"Analyzing: {pdf_path}")
+        results.append(_analyze_with_timeout(_worker_analyzer, pdf_path, timeout))
+    return results
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _precomputed(pdf_file: Path, cache: Optional['AnalysisCache'],
+                 deduplicator: Optional['ExactDeduplicator']) -> Optional[Dict]:
+    """Result for a file that needs no analysis (exact duplicate or cached)."""
+    if deduplicator is not None:
+        duplicate = deduplicator.check(pdf_file)
+        if duplicate is not None:
+            return duplicate
+    return cache.get(pdf_file) if cache is not None else None
+
+
+def _store_results(results: Iterable[Dict], cache: Optional['AnalysisCache']) -> Iterator[Dict]:
+    """Pass fresh results through, saving them in the cache on the way."""
+    for result in results:
+        if cache is not None and not result.get('status'):
+            cache.put(result['filepath'], result)
+        yield result
+
+
+def _drain(pending: Deque, limit: int, ordered: bool,
+           cache: Optional['AnalysisCache']) -> Iterator[Dict]:
+    """Yield finished results until at most ``limit`` chunks are in flight.
+
+    In ordered mode ``pending`` holds futures and lists of ready (cached)
+    results in input order; otherwise it only holds futures.
+    """
+    if ordered:
+        in_flight = sum(not isinstance(entry, list) for entry in pending)
+        while pending and (isinstance(pending[0], list) or in_flight > limit):
+            entry = pending.popleft()
+            if isinstance(entry, list):
+                yield from entry
+            else:
+                in_flight -= 1
+                yield from _store_results(entry.result(), cache)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    while len(pending) > limit:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+            yield from _store_results(future.result(), cache)
+
+
+def analyze_files(
+    pdf_files: Iterable[Path],
+    analyzer_kwargs: Optional[Dict] = None,
+    workers: int = 1,
+    chunksize: int = 8,
+    ordered: bool = True,
+    timeout: Optional[float] = None,
+    cache: Optional['AnalysisCache'] = None,
+    memory_limit_mb: Optional[float] = None,
+    deduplicator: Optional['ExactDeduplicator'] = None
+) -> Iterator[Dict]:
+    """
+    Analyze PDF files, optionally fanned out over a process pool.
+
+    Files are submitted in chunks and at most ``2 * workers`` chunks are in
+    flight at any time, so ``pdf_files`` may be a lazy iterable.
+
+    Args:
+        pdf_files: PDF files to analyze
+        analyzer_kwargs: Keyword arguments for each PDFAnalyzer
+        workers: Number of worker processes (1 analyzes in-process)
+        chunksize: Number of files handed to a worker per task
+        ordered: Yield results in input order instead of as they complete
+        timeout: Per-file time budget in seconds (None for no limit)
+        cache: Optional analysis cache; unchanged files are not re-analyzed
+        memory_limit_mb: Address-space limit for each worker process; a file
+            that exhausts it is reported as skipped. Only applies with
+            workers > 1, since it would otherwise cap the calling process.
+        deduplicator: Optional exact-duplicate filter; copies of a file seen
+            earlier are reported as duplicates without being extracted
+
+    Yields:
+        Analysis result for each PDF file
+    """
+    analyzer_kwargs = analyzer_kwargs or {}
+    if workers <= 1:
+        analyzer = PDFAnalyzer(**analyzer_kwargs)
+        for pdf_file in pdf_files:
+            cached = _precomputed(pdf_file, cache, deduplicator)
+            if cached is not None:
+                yield cached
+                continue
+            logger.info(f"Analyzing: {pdf_file}")
+            yield from _store_results([_analyze_with_timeout(analyzer, pdf_file, timeout)], cache)
+        return
+
+    chunksize = max(1, chunksize)
+    max_pending = 2 * workers
+    executor = None
+
+    def submit(chunk: List[Path]):
+        # The pool is only started once there is something to analyze
+        nonlocal executor
+        if executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(analyzer_kwargs, memory_limit_mb)
+            )
+        return executor.submit(_analyze_chunk, chunk, timeout)
+
+    try:
+        pending: Deque = deque()
+        batch: List[Path] = []
+        for pdf_file in pdf_files:
+            cached = _precomputed(pdf_file, cache, deduplicator)
+            if cached is None:
+                batch.append(pdf_file)
+            # A cached hit closes the current batch so ordered output stays exact
+            if len(batch) >= chunksize or (batch and cached is not None and ordered):
+                pending.append(submit(batch))
+                batch = []
+            if cached is not None:
+                if ordered and pending:
+                    pending.append([cached])
+                else:
+                    yield cached
+            yield from _drain(pending, max_pending - 1, ordered, cache)
+        if batch:
+            pending.append(submit(batch))
+        yield from _drain(pending, 0, ordered, cache)
+    finally:
+        # Cancels queued chunks if the consumer stops early or is interrupted
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_scan_directory(
+    directory: Path,
+    recursive: bool = True,
+    analyzer_kwargs: Optional[Dict] = None,
+    workers: int = 1,
+    chunksize: int = 8,
+    ordered: bool = True,
+    timeout: Optional[float] = None,
+    cache: Optional['AnalysisCache'] = None,
+    skip_paths: Optional[Set[str]] = None,
+    memory_limit_mb: Optional[float] = None,
+    discovery_kwargs: Optional[Dict] = None,
+    deduplicator: Optional['ExactDeduplicator'] = None,
+    metrics: Optional[ScanMetrics] = None
+) -> Iterator[Dict]:
+    """
+    Scan a directory for PDF files and yield their analyses as they finish.
+
+    Files are fed to the analyzer while the directory tree is still being
+    walked, see pdf_discovery.iter_pdf_files.
+    
+    Args:
+        directory: Directory path to scan
+        recursive: Whether to scan subdirectories
+        analyzer_kwargs: Keyword arguments for each PDFAnalyzer
+        workers: Number of worker processes (1 analyzes in-process)
+        chunksize: Number of files handed to a worker per task
+        ordered: Yield results in discovery order instead of completion order
+        timeout: Per-file time budget in seconds (None for no limit)
+        cache: Optional analysis cache; unchanged files are not re-analyzed
+        skip_paths: Absolute paths of files to leave out, e.g. already
+            completed by an interrupted run
+        memory_limit_mb: Address-space limit for each worker process
+        discovery_kwargs: Filters for pdf_discovery.iter_pdf_files
+            (include, exclude, max_depth, symlinks, min_size, max_size)
+        deduplicator: Optional exact-duplicate filter applied before extraction
+        metrics: Optional ScanMetrics that directory walking time is charged to
+        
+    Yields:
+        Analysis result for each PDF file
+    """
+    if not directory.exists() or not directory.is_dir():
+        logger.error(f"Directory not found: {directory}")
+        return
+
+    discovered = 0
+    metrics = metrics or NULL_METRICS
+
+    def pdf_files() -> Iterator[Path]:
+        nonlocal discovered
+        found = iter_pdf_files(directory, recursive, **(discovery_kwargs or {}))
+        while True:
+            with metrics.stage('discovery'):
+                pdf_file = next(found, None)
+            if pdf_file is None:
+                return
+            discovered += 1
+            if skip_paths and str(pdf_file.absolute()) in skip_paths:
+                continue
+            yield pdf_file
+    
+    # Analyze each PDF as it is discovered
+    yield from analyze_files(
+        pdf_files(),
+        analyzer_kwargs=analyzer_kwargs,
+        workers=workers,
+        chunksize=chunksize,
+        ordered=ordered,
+        timeout=timeout,
+        cache=cache,
+        memory_limit_mb=memory_limit_mb,
+        deduplicator=deduplicator
+    )
+
+    if discovered:
+        logger.info(f"Discovered {discovered} PDF files in {directory}")
+    else:
+        logger.warning(f"No PDF files found in {directory}")
+
+
+def scan_directory(directory: Path, recursive: bool = True, **options) -> List[Dict]:
     """
     Scan a directory for PDF files and analyze them.
     
     Args:
         directory: Directory path to scan
         recursive: Whether to scan subdirectories
+        **options: Passed on to iter_scan_directory
         
     Returns:
         List of analysis results for each PDF file
     """
-    analyzer = PDFAnalyzer()
     results = []
     
     try:
-        if not directory.exists() or not directory.is_dir():
-            logger.error(f"Directory not found: {directory}")
-            return []
-            
-        # Get all PDF files in directory
-        pattern = '**/*.pdf' if recursive else '*.pdf'
-        pdf_files = list(directory.glob(pattern))
-        
-        if not pdf_files:
-            logger.warning(f"No PDF files found in {directory}")
-            return []
-            
-        logger.info(f"Found {len(pdf_files)} PDF files to analyze...")
-        
-        # Analyze each PDF
-        for pdf_file in pdf_files:
-            logger.info(f"Analyzing: {pdf_file}")
-            result = analyzer.analyze_pdf(pdf_file)
-            results.append(result)
-            
+        results.extend(iter_scan_directory(directory, recursive, **options))
     except Exception as e:
         logger.error(f"Error scanning directory {directory}: {str(e)}")
     
     return results
 
-def generate_report(results: List[Dict], output_file: Path = Path('pdf_analysis_report.txt')) -> None:
-    """Generate a text report from the analysis results."""
+
+def _is_selected(result: Dict, min_score: int, required: set) -> bool:
+    return (result.get('score', 0) >= min_score
+            and (not required or bool(required.intersection(result.get('found_terms', [])))))
+
+
+def filter_results(
+    results: Iterable[Dict],
+    sort_by: Optional[str] = None,
+    min_score: int = 0,
+    required_terms: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    Filter and order analysis results for triage.
+
+    Args:
+        results: Analysis results
+        sort_by: 'score' to put the files with most term occurrences first,
+            None to keep the input order
+        min_score: Drop results with fewer term occurrences than this
+        required_terms: Only keep results in which any of these terms was found
+
+    Returns:
+        The selected results
+    """
+    required = {term.lower() for term in required_terms or []}
+    selected = [r for r in results if _is_selected(r, min_score, required)]
+    if sort_by == 'score':
+        selected.sort(key=lambda r: r.get('score', 0), reverse=True)
+    elif sort_by is not None:
+        raise ValueError(f"Unknown sort key: {sort_by}")
+    return selected
+
+
+def generate_report(
+    results: List[Dict],
+    output_file: Path = Path('pdf_analysis_report.txt'),
+    sort_by: Optional[str] = None,
+    min_score: int = 0,
+    required_terms: Optional[List[str]] = None
+) -> None:
+    """
+    Generate a text report from the analysis results.
+
+    Args:
+        results: Analysis results
+        output_file: Report file to write
+        sort_by: 'score' to list the files with most term occurrences first
+        min_score: Leave out files with fewer term occurrences than this
+        required_terms: Only list files in which any of these terms was found
+    """
     if not results:
         logger.warning("No results to generate report")
         return
+
+    results = filter_results(results, sort_by, min_score, required_terms)
         
     output_path = Path(output_file)
     try:
-        with output_path.open('w', encoding='utf-8') as f:
-            f.write("PDF Analysis Report\n")
-            f.write("=" * 50 + "\n\n")
-            
-            for i, result in enumerate(results, 1):
-                f.write(f"{i}. {result.get('filename', 'Unknown')}\n")
-                f.write(f"   Path: {result.get('filepath', 'N/A')}\n")
-                f.write(f"   Size: {result.get('size_mb', 0):.2f} MB\n")
-                f.write(f"   Pages: {result.get('page_count', 0)}\n")
-                
-                # Add metadata
-                meta = result.get('metadata', {})
-                if meta.get('title'):
-                    f.write(f"   Title: {meta['title']}\n")
-                if meta.get('author'):
-                    f.write(f"   Author: {meta['author']}\n")
-                    
-                # Add found terms
-                if result.get('found_terms'):
-                    f.write(f"   Found terms: {', '.join(result['found_terms'])}\n")
-                    
-                f.write("\n" + "-" * 50 + "\n\n")
+        with TextReportWriter(output_path) as writer:
+            for result in results:
+                writer.write(result)
         
         logger.info(f"Report generated: {output_path.absolute()}")
     except Exception as e:
         logger.error(f"Error writing report to {output_path}: {str(e)}")
         raise
 
+def query_main(argv: List[str]) -> None:
+    """Search an index built with --index: ``sort_pdf_files.py query INDEX QUERY``."""
+    import argparse
+    import time
+    from pdf_index import InvertedIndex
+
+    parser = argparse.ArgumentParser(
+        prog='sort_pdf_files.py query',
+        description='Search an index built with --index. Terms are ANDed by default; '
+                    'use AND, OR, NOT, parentheses and "quoted phrases".'
+    )
+    parser.add_argument('index', help='Index file written by --index')
+    parser.add_argument('query', nargs='+', help='Query, e.g. invoice AND (2023 OR 2024)')
+    parser.add_argument('--limit', type=int, default=None,
+                      help='Show at most N matching documents')
+    args = parser.parse_args(argv)
+
+    index_path = Path(args.index).expanduser()
+    if not index_path.is_file():
+        parser.error(f'No index at {index_path}')
+    with InvertedIndex(index_path) as index:
+        start = time.perf_counter()
+        try:
+            matches = index.search(' '.join(args.query))
+        except ValueError as e:
+            parser.error(str(e))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for path, pages in matches[:args.limit]:
+        page_list = f" (pages {format_pages(pages)})" if pages else ''
+        print(f"{path}{page_list}")
+    print(f"{len(matches)} matching documents ({elapsed_ms:.1f} ms)")
+
+
 def main():
     import argparse
+
+    if sys.argv[1:2] == ['query']:
+        return query_main(sys.argv[2:])
+
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     
-    parser = argparse.ArgumentParser(description='Analyze PDF files in a directory')
+    parser = argparse.ArgumentParser(
+        description='Analyze PDF files in a directory',
+        epilog='Search an index built with --index using: %(prog)s query INDEX QUERY'
+    )
     parser.add_argument('directory', help='Directory to scan for PDF files')
-    parser.add_argument('--output', '-o', default='pdf_analysis_report.txt',
-                      help='Output report file (default: pdf_analysis_report.txt)')
+    parser.add_argument('--output', '-o', default=None,
+                      help='Output report file (default: pdf_analysis_report.<format>)')
+    parser.add_argument('--format', '-f', choices=list(REPORT_FORMATS), default='text',
+                      help='Report format (default: text); written incrementally')
+    parser.add_argument('--batch-size', type=int, default=100,
+                      help='Results buffered between report flushes (default: 100)')
+    parser.add_argument('--resume', action='store_true',
+                      help='Continue an interrupted scan, skipping files already in the report')
+    parser.add_argument('--watch', action='store_true',
+                      help='After the scan, keep running and analyze PDFs as they are added')
+    parser.add_argument('--settle', type=float, default=1.0,
+                      help='Seconds a new file must stay unchanged before analysis (default: 1)')
+    parser.add_argument('--poll', action='store_true',
+                      help='Watch by polling instead of inotify')
+    parser.add_argument('--poll-interval', type=float, default=2.0,
+                      help='Seconds between rescans when polling (default: 2)')
     parser.add_argument('--no-recursive', action='store_false', dest='recursive',
                       help='Do not scan subdirectories')
+    parser.add_argument('--include', action='append',
+                      help='Only scan files matching this glob (repeatable)')
+    parser.add_argument('--exclude', action='append',
+                      help='Skip files and directories matching this glob (repeatable)')
+    parser.add_argument('--max-depth', type=int, default=None,
+                      help='Deepest subdirectory level to scan (0 = top level only)')
+    parser.add_argument('--symlinks', choices=SYMLINK_POLICIES, default='files',
+                      help='ignore links, include linked files only (default) or follow all')
+    parser.add_argument('--min-size-kb', type=float, default=None,
+                      help='Ignore PDFs smaller than this many KB')
+    parser.add_argument('--max-size-kb', type=float, default=None,
+                      help='Ignore PDFs larger than this many KB')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                      help='Number of worker processes (default: 1)')
+    parser.add_argument('--chunksize', type=int, default=8,
+                      help='Files handed to a worker per task (default: 8)')
+    parser.add_argument('--unordered', action='store_false', dest='ordered',
+                      help='Report files as they finish instead of in discovery order')
+    parser.add_argument('--timeout', type=float, default=None,
+                      help='Per-file analysis time limit in seconds')
+    parser.add_argument('--cache', default=None,
+                      help='SQLite file caching results between runs; only new or '
+                           'changed PDFs are re-analyzed')
+    parser.add_argument('--rebuild', action='store_true',
+                      help='Discard the cache contents and re-analyze every PDF')
+    parser.add_argument('--metrics', default=None,
+                      help='Time the discovery, parse, extract, match and report stages, '
+                           'print a summary and write the metrics to this JSON file')
+    parser.add_argument('--index', default=None,
+                      help='SQLite file to add an inverted full-text index of the scanned '
+                           'PDFs to; search it with the "query" subcommand')
+    parser.add_argument('--presence-only', action='store_true',
+                      help='Stop reading a PDF once every search term has been found')
+    parser.add_argument('--max-pages', type=int, default=None,
+                      help='Only extract text from the first N pages of each PDF')
+    parser.add_argument('--max-file-size-mb', type=float, default=None,
+                      help='Skip PDFs larger than this many MB')
+    parser.add_argument('--max-page-count', type=int, default=None,
+                      help='Skip PDFs with more pages than this')
+    parser.add_argument('--memory-limit-mb', type=float, default=None,
+                      help='Memory budget per worker process (needs --workers > 1)')
+    parser.add_argument('--no-mmap', action='store_false', dest='use_mmap',
+                      help='Read PDFs through regular file I/O instead of mmap')
+    parser.add_argument('--dedup', action='store_true',
+                      help='Report byte-identical copies as duplicates without extracting them')
+    parser.add_argument('--near-duplicates', action='store_true',
+                      help='Group documents with near-identical text into clusters')
+    parser.add_argument('--near-duplicate-distance', type=int, default=3,
+                      help='Max differing SimHash bits for near-duplicates (default: 3)')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='regex',
+                      help='Term matching engine (default: regex); use aho-corasick '
+                           'for large term lists')
+    parser.add_argument('--terms-file', default=None,
+                      help='File with one search term per line (default: built-in terms)')
+    parser.add_argument('--sort-by', choices=['score'], default=None,
+                      help='List files with the most term occurrences first')
+    parser.add_argument('--min-score', type=int, default=0,
+                      help='Leave files with fewer term occurrences out of the report')
+    parser.add_argument('--require-term', action='append', dest='required_terms',
+                      help='Only report files containing this term (repeatable)')
     
     args = parser.parse_args()
+    if args.resume and args.sort_by:
+        parser.error('--resume cannot be combined with --sort-by')
+    if args.watch and args.sort_by:
+        parser.error('--watch cannot be combined with --sort-by')
+    if args.index and args.presence_only:
+        parser.error('--index needs the full text and cannot be combined with --presence-only')
+    if args.resume and not REPORT_FORMATS[args.format].resumable:
+        parser.error(f'{args.format} reports cannot be resumed')
     
     try:
         # Convert to Path objects
         directory = Path(args.directory).expanduser().resolve()
-        output_file = Path(args.output).expanduser().resolve()
+        default_output = f"pdf_analysis_report.{'txt' if args.format == 'text' else args.format}"
+        output_file = Path(args.output or default_output).expanduser().resolve()
         
         # Ensure output directory exists
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        # Scan directory and analyze PDFs
-        results = scan_directory(directory, args.recursive)
+        search_terms = IMPORTANT_TERMS
+        if args.terms_file:
+            with Path(args.terms_file).expanduser().open(encoding='utf-8') as f:
+                search_terms = [line.strip() for line in f if line.strip()]
+
+        analyzer_kwargs = {
+            'search_terms': search_terms,
+            'presence_only': args.presence_only,
+            'max_pages': args.max_pages,
+            'engine': args.engine,
+            'max_file_size_mb': args.max_file_size_mb,
+            'max_page_count': args.max_page_count,
+            'use_mmap': args.use_mmap,
+            'near_duplicates': args.near_duplicates,
+            'build_index': bool(args.index),
+            'collect_timings': bool(args.metrics)
+        }
+        metrics = ScanMetrics() if args.metrics else NULL_METRICS
+
+        discovery_kwargs = {
+            'include': args.include,
+            'exclude': args.exclude,
+            'max_depth': args.max_depth,
+            'symlinks': args.symlinks,
+            'min_size': None if args.min_size_kb is None else int(args.min_size_kb * 1024),
+            'max_size': None if args.max_size_kb is None else int(args.max_size_kb * 1024)
+        }
+
+        cache = None
+        if args.cache:
+            from pdf_cache import AnalysisCache
+            cache = AnalysisCache(
+                Path(args.cache).expanduser().resolve(),
+                {k: v for k, v in analyzer_kwargs.items() if k != 'collect_timings'},
+                rebuild=args.rebuild
+            )
+
+        index = None
+        if args.index:
+            from pdf_index import InvertedIndex
+            index = InvertedIndex(Path(args.index).expanduser().resolve())
         
-        if results:
-            # Generate report
-            generate_report(results, output_file)
-            
+        # Checkpoint journal so an interrupted scan can be resumed.
+        # Sorted reports are written in one go at the end and need none.
+        journal = None
+        pending_paths: List[str] = []
+        if not args.sort_by and REPORT_FORMATS[args.format].resumable:
+            journal = ScanJournal(output_file.with_name(output_file.name + '.journal'),
+                                  resume=args.resume)
+            # A fresh scan replaces the report only once it has a result to write
+            if args.resume:
+                journal.restore_report(output_file)
+
+        def checkpoint(report_writer) -> None:
+            if index is not None:
+                index.commit()
+            journal.record(pending_paths, report_writer.tell())
+            pending_paths.clear()
+
+        deduplicator = near_duplicates = None
+        if args.dedup or args.near_duplicates:
+            from pdf_dedup import ExactDeduplicator, NearDuplicateIndex
+            deduplicator = ExactDeduplicator() if args.dedup else None
+            near_duplicates = NearDuplicateIndex(args.near_duplicate_distance) \
+                if args.near_duplicates else None
+        exact_duplicates = []
+
+        # Scan directory and analyze PDFs, writing each result as it arrives.
+        # Sorting by score needs every result, so those are written at the end.
+        required = {term.lower() for term in args.required_terms or []}
+        total_files = 0
+        files_with_terms = 0
+        files_skipped = 0
+        bytes_read = 0
+        buffered = []
+        writer = None
+        completed = False
+
+        def open_writer():
+            nonlocal writer
+            if writer is None:
+                writer = open_report_writer(
+                    args.format, output_file,
+                    append=args.resume,
+                    batch_size=args.batch_size,
+                    on_flush=checkpoint if journal is not None else None
+                )
+            return writer
+
+        def handle_result(result: Dict) -> None:
+            nonlocal total_files, files_with_terms, files_skipped, bytes_read
+            metrics.record_file(result)
+            total_files += 1
+            files_with_terms += bool(result.get('found_terms'))
+            files_skipped += result.get('status') == 'skipped'
+            bytes_read += result.get('bytes_read', 0)
+            postings = result.pop('_postings', None)
+            if index is not None and postings is not None:
+                index.add(result['filepath'], postings)
+            if result.get('status') == 'duplicate':
+                exact_duplicates.append({'file': result['filepath'],
+                                         'duplicate_of': result['duplicate_of']})
+            if near_duplicates is not None and result.get('simhash'):
+                near_duplicates.add(result['filepath'], result['simhash'])
+            if 'filepath' in result:
+                pending_paths.append(result['filepath'])
+            if not _is_selected(result, args.min_score, required):
+                return
+            if args.sort_by:
+                open_writer()
+                buffered.append(result)
+            else:
+                with metrics.stage('report'):
+                    open_writer().write(result)
+
+        try:
+            scanned_files = []
+            for result in iter_scan_directory(
+                directory,
+                args.recursive,
+                analyzer_kwargs=analyzer_kwargs,
+                workers=args.workers,
+                chunksize=args.chunksize,
+                ordered=args.ordered,
+                timeout=args.timeout,
+                cache=cache,
+                skip_paths=journal.completed if journal is not None else None,
+                memory_limit_mb=args.memory_limit_mb,
+                discovery_kwargs=discovery_kwargs,
+                deduplicator=deduplicator,
+                metrics=metrics
+            ):
+                handle_result(result)
+                if args.watch and 'filepath' in result:
+                    scanned_files.append(Path(result['filepath']))
+            for result in filter_results(buffered, sort_by=args.sort_by):
+                with metrics.stage('report'):
+                    writer.write(result)
+
+            if args.watch:
+                from pdf_watch import watch_directory
+
+                # Report each new file as soon as it has been analyzed
+                open_writer().flush()
+                writer.batch_size = 1
+                if index is not None:
+                    index.commit_every = 1
+                analyzer = PDFAnalyzer(**analyzer_kwargs)
+
+                def analyze(pdf_path: Path) -> Dict:
+                    if deduplicator is not None:
+                        duplicate = deduplicator.check(pdf_path)
+                        if duplicate is not None:
+                            return duplicate
+                    result = _analyze_with_timeout(analyzer, pdf_path, args.timeout)
+                    if cache is not None and not result.get('status'):
+                        cache.put(pdf_path, result)
+                    return result
+
+                if journal is not None:
+                    scanned_files.extend(Path(p) for p in journal.completed)
+                print(f"Watching {directory} for new PDFs, press Ctrl-C to stop...")
+                watch_directory(
+                    directory,
+                    analyze,
+                    handle_result,
+                    recursive=args.recursive,
+                    discovery_kwargs=discovery_kwargs,
+                    settle=args.settle,
+                    poll_interval=args.poll_interval,
+                    use_inotify=not args.poll,
+                    known_files=scanned_files
+                )
+            completed = True
+        finally:
+            if writer is not None:
+                with metrics.stage('report'):
+                    writer.close()
+            metrics.stop()
+            if journal is not None:
+                if pending_paths and not completed and writer is not None:
+                    # Files filtered out of the report since the last flush.
+                    # Without a writer the report on disk is a previous run's.
+                    journal.record(pending_paths, output_file.stat().st_size)
+                journal.close(remove=completed)
+            if cache is not None:
+                logger.info(f"Cache: {cache.hits} hits, {cache.misses} misses")
+                cache.close()
+            if index is not None:
+                indexed_documents = len(index)
+                index.close()
+        
+        if total_files:
             # Print summary
-            total_files = len(results)
-            files_with_terms = sum(1 for r in results if r.get('found_terms'))
-            
             print("\nAnalysis complete!")
             print(f"- Total PDFs analyzed: {total_files}")
             print(f"- PDFs with important terms: {files_with_terms}")
-            print(f"- Report saved to: {output_file.absolute()}")
+            print(f"- PDFs skipped by limits: {files_skipped}")
+            print(f"- Data read: {bytes_read / MB:.1f} MB")
+            if deduplicator is not None or near_duplicates is not None:
+                clusters = near_duplicates.clusters() if near_duplicates is not None else []
+                duplicates_file = output_file.with_name(output_file.stem + '.duplicates.json')
+                with duplicates_file.open('w', encoding='utf-8') as f:
+                    json.dump({'exact_duplicates': exact_duplicates,
+                               'near_duplicate_clusters': clusters}, f, indent=2)
+                print(f"- Exact duplicates skipped: {len(exact_duplicates)}")
+                print(f"- Near-duplicate clusters: {len(clusters)}")
+                print(f"- Duplicates saved to: {duplicates_file}")
+            if index is not None:
+                print(f"- Index saved to: {index.db_path} ({indexed_documents} documents)")
+            if writer is not None:
+                print(f"- Report saved to: {output_file.absolute()}")
+            if metrics.enabled:
+                metrics_file = Path(args.metrics).expanduser()
+                metrics.write(metrics_file)
+                print(metrics.summary())
+                print(f"- Metrics saved to: {metrics_file}")
         else:
             print("No PDF files were analyzed.")
             
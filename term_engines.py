@@ -0,0 +1,140 @@
+"""
+Term matching engines for PDFAnalyzer.
+
+Every engine finds whole-word, case-insensitive occurrences of a fixed set of
+search terms in a piece of text and reports them as ``(term, offset)`` pairs,
+with ``term`` lowercased. Two engines are available:
+
+- ``regex``: one alternation regex. Cheap to build, fine for a few dozen
+  terms, but compile and match time grow with the vocabulary.
+- ``aho-corasick``: a pure-Python Aho-Corasick automaton. Matching time is
+  independent of the number of terms, which makes it the right choice for
+  watchlists with thousands of entries. Overlapping terms ("terms" and
+  "terms and conditions") are all reported.
+"""
+import re
+from collections import Counter, deque
+from typing import Dict, Iterable, Iterator, List, Tuple, Type
+
+Match = Tuple[str, int]
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class TermMatcher:
+    """Base class for term matching engines."""
+
+    name = ''
+
+    def __init__(self, terms: Iterable[str]):
+        # Lowercase and de-duplicate while keeping the caller's order
+        self.terms: List[str] = list(dict.fromkeys(t.lower() for t in terms if t))
+
+    def find(self, text: str) -> Iterator[Match]:
+        """Yield ``(term, offset)`` for every whole-word occurrence in ``text``."""
+        raise NotImplementedError
+
+    def count(self, text: str) -> Counter:
+        """Return the number of occurrences of each term found in ``text``."""
+        return Counter(term for term, _ in self.find(text))
+
+
+class RegexTermMatcher(TermMatcher):
+    """Match terms with a single ``\\b(a|b|...)\\b`` regex."""
+
+    name = 'regex'
+
+    def __init__(self, terms: Iterable[str]):
+        super().__init__(terms)
+        self.pattern = re.compile(
+            r'\b(' + '|'.join(map(re.escape, self.terms)) + r')\b',
+            re.IGNORECASE
+        )
+
+    def find(self, text: str) -> Iterator[Match]:
+        for match in self.pattern.finditer(text):
+            yield match.group(1).lower(), match.start()
+
+
+class AhoCorasickTermMatcher(TermMatcher):
+    """Match terms with an Aho-Corasick automaton over lowercased text.
+
+    A match counts when the characters on either side of it are not word
+    characters, mirroring ``\\b`` for terms that start and end with one.
+    """
+
+    name = 'aho-corasick'
+
+    def __init__(self, terms: Iterable[str]):
+        super().__init__(terms)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for term_id, term in enumerate(self.terms):
+            state = 0
+            for ch in term:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = next_state
+            self._out[state] += (term_id,)
+
+        # Breadth-first pass to set failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+
+        self._lengths = [len(term) for term in self.terms]
+
+    def find(self, text: str) -> Iterator[Match]:
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        terms, lengths = self.terms, self._lengths
+        end = len(text)
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            after_ok = i + 1 == end or not _is_word_char(text[i + 1])
+            for term_id in out[state]:
+                start = i - lengths[term_id] + 1
+                if (after_ok or not _is_word_char(text[i])) and \
+                        (start == 0 or not _is_word_char(text[start - 1]) or
+                         not _is_word_char(text[start])):
+                    yield terms[term_id], start
+
+
+ENGINES: Dict[str, Type[TermMatcher]] = {
+    RegexTermMatcher.name: RegexTermMatcher,
+    AhoCorasickTermMatcher.name: AhoCorasickTermMatcher,
+}
+
+
+def create_matcher(terms: Iterable[str], engine: str = 'regex') -> TermMatcher:
+    """Build a term matcher by engine name.
+
+    Raises:
+        ValueError: If the engine name is unknown
+    """
+    try:
+        return ENGINES[engine](terms)
+    except KeyError:
+        raise ValueError(f"Unknown term engine {engine!r}, choose from {', '.join(ENGINES)}")
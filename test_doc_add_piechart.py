@@ -0,0 +1,98 @@
+"""Tests for chart rendering in doc_add_piechart.py"""
+import os
+
+from assertpy import assert_that
+from docx import Document
+
+from chart_cache import ChartCache
+from doc_add_piechart import (ChartRenderer, ChartSpec, chart_cache_key, generate_document,
+                              generate_pie_chart, random_chart_specs, render_charts)
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def test_reused_figures_render_like_fresh_ones():
+    renderer = ChartRenderer()
+    renderer.pie_chart([1, 2], ['A much longer label', 'B'], 'A long title that shifts the layout')
+    renderer.bar_chart([3, 4], ['Q1', 'Q2'], 'Warm up')
+
+    pie = renderer.pie_chart([5, 6, 7], ['a', 'b', 'c'], 'Pie')
+    bar = renderer.bar_chart([10, 50, 30, 20], ['Q1', 'Q2', 'Q3', 'Q4'], 'Bar')
+
+    assert_that(pie.read(8)).is_equal_to(PNG_SIGNATURE)
+    assert_that(pie.getvalue()).is_equal_to(
+        ChartRenderer().pie_chart([5, 6, 7], ['a', 'b', 'c'], 'Pie').getvalue())
+    assert_that(bar.getvalue()).is_equal_to(
+        ChartRenderer().bar_chart([10, 50, 30, 20], ['Q1', 'Q2', 'Q3', 'Q4'], 'Bar').getvalue())
+
+
+def test_generate_document_embeds_charts_without_temp_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    generate_document('charts.docx', output_dir='out', num_charts=3)
+
+    doc = Document(str(tmp_path / 'out' / 'charts.docx'))
+    assert_that(doc.inline_shapes).is_length(3)
+    assert_that([p.name for p in tmp_path.iterdir()]).is_equal_to(['out'])
+
+
+def test_parallel_rendering_is_deterministic_and_ordered(tmp_path):
+    for workers in (1, 2):
+        generate_document(f'{workers}.docx', output_dir=str(tmp_path), num_charts=4,
+                          workers=workers, seed=7)
+
+    def images(name):
+        doc = Document(str(tmp_path / name))
+        return [doc.part.related_parts[shape._inline.graphic.graphicData.pic.blipFill.blip.embed].blob
+                for shape in doc.inline_shapes]
+
+    assert_that(images('2.docx')).is_equal_to(images('1.docx'))
+    assert_that(random_chart_specs(3, seed=7)[1]).is_equal_to(random_chart_specs(2, seed=7)[1])
+
+
+def test_cached_charts_are_not_rendered_again(tmp_path, monkeypatch):
+    cache = ChartCache(tmp_path / 'cache')
+    specs = random_chart_specs(4, seed=1)
+    first = list(render_charts(specs, cache=cache))
+
+    def fail(*args):
+        raise AssertionError('rendered a cached chart')
+    monkeypatch.setattr(ChartRenderer, 'pie_chart', fail)
+    monkeypatch.setattr(ChartRenderer, 'bar_chart', fail)
+
+    assert_that(list(render_charts(specs, workers=2, cache=cache))).is_equal_to(first)
+    assert_that((cache.hits, cache.misses)).is_equal_to((4, 4))
+    generate_pie_chart(str(tmp_path / 'pie.png'), specs[0].title,
+                       sizes=specs[0].data, labels=specs[0].labels, cache=cache)
+    assert_that((tmp_path / 'pie.png').read_bytes()).is_equal_to(first[0])
+
+
+def test_cache_keys_cover_data_and_parameters():
+    spec = ChartSpec('bar', [1, 2], ['Q1', 'Q2'], 'Title')
+
+    keys = {chart_cache_key(spec), chart_cache_key(spec, dpi=200),
+            chart_cache_key(spec._replace(data=[1, 3])),
+            chart_cache_key(spec._replace(title='Other'))}
+    assert_that(keys).is_length(4)
+    assert_that(chart_cache_key(spec)).is_equal_to(chart_cache_key(ChartSpec(*spec)))
+
+
+def test_cache_evicts_least_recently_used_images(tmp_path):
+    cache = ChartCache(tmp_path, max_size_mb=3.5 / 1024)  # 3.5 KB
+    for i, key in enumerate(['aa1', 'bb2', 'cc3']):
+        cache.put(key, b'x' * 1024)
+        os.utime(tmp_path / key[:2] / f'{key}.png', (i, i))
+    cache.get('aa1')  # Now the most recently used
+
+    cache.put('dd4', b'x' * 1024)
+
+    assert_that(sorted(p.stem for p in tmp_path.glob('*/*.png'))).is_equal_to(['aa1', 'cc3', 'dd4'])
+
+
+def test_cache_size_counts_overwritten_images_once(tmp_path):
+    cache = ChartCache(tmp_path, max_size_mb=10 / 1024, suffix='.img')  # 10 KB
+    for _ in range(3):
+        cache.put('aa1', b'x' * 1024)
+
+    assert_that(cache._size).is_equal_to(1024)
+    assert_that(cache.get('aa1')).is_length(1024)
@@ -1,6 +1,8 @@
 from docx import Document
 from docx.shared import Inches
 
+from docx_tables import add_table
+
 document = Document()
 
 document.add_heading('Document Title', 0)
@@ -28,16 +30,7 @@ records = (
     (4, '631', 'Spam, spam, eggs, and spam')
 )
 
-table = document.add_table(rows=1, cols=3)
-hdr_cells = table.rows[0].cells
-hdr_cells[0].text = 'Qty'
-hdr_cells[1].text = 'Id'
-hdr_cells[2].text = 'Desc'
-for qty, id, desc in records:
-    row_cells = table.add_row().cells
-    row_cells[0].text = str(qty)
-    row_cells[1].text = id
-    row_cells[2].text = desc
+table = add_table(document, records, header=('Qty', 'Id', 'Desc'))
 
 document.add_page_break()
 
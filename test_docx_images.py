@@ -0,0 +1,69 @@
+"""Tests for image preprocessing in docx_images.py"""
+import io
+from pathlib import Path
+
+from assertpy import assert_that
+from docx import Document
+from docxtpl import DocxTemplate
+from PIL import Image
+
+from doc_create_again import FRAMEWORKS, build_context
+from docx_images import ImagePreprocessor
+
+
+def make_photo(path, size=(2000, 1500)):
+    Image.effect_noise(size, 50).convert('RGB').save(path, quality=95)
+    return path
+
+
+def test_target_size_keeps_aspect_and_never_enlarges():
+    images = ImagePreprocessor(dpi=254)  # 10 px per mm
+
+    assert_that(images.target_size((2000, 1000), width_mm=50)).is_equal_to((500, 250))
+    assert_that(images.target_size((2000, 1000), height_mm=50)).is_equal_to((1000, 500))
+    assert_that(images.target_size((2000, 1000), 30, 60)).is_equal_to((300, 600))
+    assert_that(images.target_size((200, 100), width_mm=50)).is_equal_to((200, 100))
+    assert_that(images.target_size((200, 100))).is_equal_to((200, 100))
+
+
+def test_images_are_downsampled_and_cached(tmp_path, monkeypatch):
+    photo = make_photo(tmp_path / 'photo.jpg')
+
+    processed = ImagePreprocessor(dpi=100, cache_dir=tmp_path / 'cache').process(photo, width_mm=50.8)
+
+    image = Image.open(io.BytesIO(processed))
+    assert_that((image.format, image.size)).is_equal_to(('JPEG', (200, 150)))
+    assert_that(len(processed)).is_less_than(photo.stat().st_size // 10)
+
+    def fail(*args):
+        raise AssertionError('converted a cached image')
+    monkeypatch.setattr(ImagePreprocessor, 'convert', fail)
+    cached = ImagePreprocessor(dpi=100, cache_dir=tmp_path / 'cache')
+    assert_that(cached.process(photo, width_mm=50.8)).is_equal_to(processed)
+    assert_that((cached.cache.hits, cached.cache.misses)).is_equal_to((1, 0))
+
+
+def test_repeated_images_are_embedded_once(tmp_path):
+    doc = Document()
+    doc.add_paragraph('{{ myimage }}{{ myimageratio }}')
+    table = doc.add_table(rows=3, cols=1)
+    table.cell(0, 0).text = '{%tr for fw in frameworks %}'
+    table.cell(1, 0).text = '{{ fw.image }}'
+    table.cell(2, 0).text = '{%tr endfor %}'
+    doc.save(str(tmp_path / 'tpl.docx'))
+    make_photo(tmp_path / 'python_jpeg.jpg')
+    make_photo(tmp_path / 'python_logo.png', (1000, 1000))
+    for name, _ in FRAMEWORKS:
+        (tmp_path / f'{name.lower()}.png').write_bytes((tmp_path / 'python_logo.png').read_bytes())
+
+    template = DocxTemplate(tmp_path / 'tpl.docx')
+    template.render(build_context(template, FRAMEWORKS, tmp_path, ImagePreprocessor()))
+    template.save(tmp_path / 'out.docx')
+
+    result = Document(str(tmp_path / 'out.docx'))
+    media = [p for p in result.part.package.parts if 'media' in p.partname]
+    # The logo at two display sizes and the photo
+    assert_that(media).is_length(3)
+    assert_that(result.inline_shapes).is_length(2 + len(FRAMEWORKS))
+    assert_that(sum(len(p.blob) for p in media)).is_less_than(
+        Path(tmp_path / 'python_jpeg.jpg').stat().st_size)
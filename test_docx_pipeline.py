@@ -0,0 +1,78 @@
+"""Tests for the multi-process mail merge in docx_pipeline.py"""
+import functools
+
+import pytest
+from assertpy import assert_that
+from docx import Document
+
+import give_me_a_doc_w_img
+import kolumner
+from doc_add_piechart import ChartRenderer
+from docx_pipeline import run_pipeline
+
+
+@pytest.fixture
+def template(tmp_path):
+    doc = Document()
+    doc.add_paragraph('Dear {{ name }},')
+    doc.add_paragraph('{{ image }}')
+    doc.add_paragraph('{{ 100 / amount }}')
+    path = tmp_path / 'letter.docx'
+    doc.save(str(path))
+    return path
+
+
+def paragraphs(path):
+    return [p.text for p in Document(str(path)).paragraphs]
+
+
+def test_failed_documents_are_reported_without_stopping_the_batch(template, tmp_path):
+    image = tmp_path / 'logo.png'
+    image.write_bytes(ChartRenderer(dpi=20).pie_chart([1, 2], ['a', 'b'], '').getvalue())
+    contexts = [{'name': f'P{i}', 'amount': 0 if i == 3 else 4} for i in range(8)]
+    contexts[5] = {'amount': 4}  # No name for the output path
+    progress = []
+
+    result = run_pipeline(template, iter(contexts), str(tmp_path / 'out' / '{index}_{name}.docx'),
+                          workers=2, queue_size=2, progress=lambda *counts: progress.append(counts),
+                          prepare=functools.partial(give_me_a_doc_w_img.prepare_context,
+                                                    image_path=str(image),
+                                                    image_size={'width': 20}))
+
+    assert_that(result[:2]).is_equal_to((6, 2))
+    assert_that([(e.index, e.error.split(':')[0]) for e in result.errors]).is_equal_to(
+        [(3, 'ZeroDivisionError'), (5, 'Bad output path')])
+    assert_that(result.errors[0].context).is_equal_to(contexts[3])
+    assert_that(progress[-1]).is_equal_to((6, 2))
+    assert_that(sorted(p.name for p in (tmp_path / 'out').iterdir())).is_equal_to(
+        [f'{i}_P{i}.docx' for i in (0, 1, 2, 4, 6, 7)])
+    assert_that(paragraphs(tmp_path / 'out' / '4_P4.docx')).is_equal_to(['Dear P4,', '', '25.0'])
+    # The image from the failed render did not leak into later documents
+    media = [p for p in Document(str(tmp_path / 'out' / '7_P7.docx')).part.package.parts
+             if 'media' in p.partname]
+    assert_that(media).is_length(1)
+
+
+def test_kolumner_rows_become_table_rows(tmp_path):
+    doc = Document()
+    table = doc.add_table(rows=3, cols=1)
+    table.cell(0, 0).text = '{%tr for row in tbl_contents %}'
+    table.cell(1, 0).text = '{{ row.cols | join(",") }}'
+    table.cell(2, 0).text = '{%tr endfor %}'
+    doc.save(str(tmp_path / 'kolumns.docx'))
+
+    result = run_pipeline(tmp_path / 'kolumns.docx', [{'rows': [['a', 'b'], ['c', 'd']]}],
+                          str(tmp_path / '{index}.docx'), workers=1,
+                          prepare=kolumner.prepare_context)
+
+    assert_that(result.written).is_equal_to(1)
+    rows = Document(str(tmp_path / '0.docx')).tables[0].rows
+    assert_that([row.cells[0].text for row in rows]).is_equal_to(['a,b', 'c,d'])
+
+
+def test_unreadable_template_raises(tmp_path):
+    (tmp_path / 'broken.docx').write_text('not a docx')
+
+    with pytest.raises(RuntimeError, match='Could not load template'):
+        run_pipeline(tmp_path / 'broken.docx', [{'name': 'A'}], str(tmp_path / '{index}.docx'),
+                     workers=2)
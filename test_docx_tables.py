@@ -0,0 +1,98 @@
+"""Tests for bulk table building in docx_tables.py"""
+import io
+
+import pandas as pd
+import pytest
+from assertpy import assert_that
+from docx import Document
+from docxtpl import DocxTemplate
+
+import kolumner
+from docx_tables import add_table
+
+
+def texts(table):
+    return [[cell.text for cell in row.cells] for row in table.rows]
+
+
+def reopen(document):
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return Document(buffer)
+
+
+def test_add_table_matches_python_docx_text():
+    rows = [(3, '101', 'Spam & <eggs>'), (None, float('nan'), ' two  spaces '),
+            ('line\nbreak', 'tab\there', 'bad\x0bchar'), ('short', '', '')]
+    document = Document()
+
+    table = add_table(document, rows, header=('Qty', 'Id', 'Desc'), style='Table Grid')
+
+    expected = [['Qty', 'Id', 'Desc'], ['3', '101', 'Spam & <eggs>'], ['', '', ' two  spaces '],
+                ['line\nbreak', 'tab\there', 'badchar'], ['short', '', '']]
+    assert_that(texts(table)).is_equal_to(expected)
+    reopened = reopen(document)
+    assert_that(texts(reopened.tables[0])).is_equal_to(expected)
+    assert_that(reopened.tables[0].style.name).is_equal_to('Table Grid')
+    assert_that(reopened.tables[0].rows[0]._tr.trPr.xml).contains('tblHeader')
+
+
+def test_add_table_takes_dataframes_and_keeps_document_order():
+    frame = pd.DataFrame({'test': ['a', 'b'], 'result': ['passed', 'failed']})
+    document = Document()
+    document.add_paragraph('before')
+
+    add_table(document, frame)
+    document.add_paragraph('after')
+
+    reopened = reopen(document)
+    assert_that(texts(reopened.tables[0])).is_equal_to(
+        [['test', 'result'], ['a', 'passed'], ['b', 'failed']])
+    body = [child.tag.split('}')[1] for child in reopened.element.body]
+    assert_that(body[:3]).is_equal_to(['p', 'tbl', 'p'])
+    with pytest.raises(ValueError):
+        add_table(document, [])
+
+
+@pytest.mark.parametrize('rows, header', [
+    ([[1, 2, 3, 4]], ['a', 'b']),
+    ([[1]], ['a', 'b']),
+    ([[1, 2], [3]], None),
+    ([[1]], []),
+    ([[]], None),
+])
+def test_add_table_rejects_rows_that_do_not_match_the_columns(rows, header):
+    document = Document()
+
+    with pytest.raises(ValueError):
+        add_table(document, rows, header=header)
+    assert_that(document.tables).is_empty()
+
+
+def test_add_table_leaves_missing_values_empty():
+    frame = pd.DataFrame({'test': ['a', None, 'c'], 'runs': [1, None, 3],
+                          'ratio': [0.5, float('nan'), None]})
+    frame = frame.astype({'test': 'string', 'runs': 'Int64'})
+    document = Document()
+
+    add_table(document, frame)
+
+    assert_that(texts(reopen(document).tables[0])).is_equal_to(
+        [['test', 'runs', 'ratio'], ['a', '1', '0.5'], ['', '', ''], ['c', '3', '']])
+
+
+def test_kolumner_context_renders_table_xml_in_templates(tmp_path):
+    doc = Document()
+    doc.add_paragraph('Results')
+    doc.add_paragraph('{{p tbl_xml }}')
+    doc.save(str(tmp_path / 'tpl.docx'))
+    template = DocxTemplate(tmp_path / 'tpl.docx')
+
+    template.render(kolumner.prepare_context(template, {'rows': [
+        ['integration tests', 'rpv2', 'cv90'], ['test_one', 'passed', 'passed']]}))
+    template.save(tmp_path / 'out.docx')
+
+    result = Document(str(tmp_path / 'out.docx'))
+    assert_that([p.text for p in result.paragraphs]).is_equal_to(['Results'])
+    assert_that(texts(result.tables[0])).is_equal_to(
+        [['integration tests', 'rpv2', 'cv90'], ['test_one', 'passed', 'passed']])
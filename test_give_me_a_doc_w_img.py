@@ -0,0 +1,108 @@
+"""Tests for bulk template rendering in give_me_a_doc_w_img.py"""
+import json
+
+import pytest
+from assertpy import assert_that
+from docx import Document
+from docxtpl import DocxTemplate, InlineImage
+
+from doc_add_piechart import ChartRenderer
+from give_me_a_doc_w_img import (BulkDocxTemplate, generate_document_from_template,
+                                 generate_documents_from_template, iter_contexts)
+
+
+@pytest.fixture
+def template(tmp_path):
+    doc = Document()
+    doc.core_properties.title = 'Letter for {{ name }}'
+    doc.sections[0].header.paragraphs[0].text = '{{ company }}'
+    doc.add_paragraph('Dear {{ name }},')
+    doc.add_paragraph('{{ image }}')
+    doc.add_paragraph('{% if extra %}{{ extra }}{% endif %}')
+    path = tmp_path / 'letter.docx'
+    doc.save(str(path))
+    return path
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / 'logo.png'
+    path.write_bytes(ChartRenderer(dpi=20).bar_chart([1, 2], ['a', 'b'], 'Logo').getvalue())
+    return path
+
+
+def read(path):
+    doc = Document(str(path))
+    return {
+        'text': [p.text for p in doc.paragraphs],
+        'header': doc.sections[0].header.paragraphs[0].text,
+        'title': doc.core_properties.title,
+        'images': len(doc.inline_shapes),
+        'media': sorted(p.partname for p in doc.part.package.parts if 'media' in p.partname),
+    }
+
+
+def test_iter_contexts_streams_csv_and_jsonl(tmp_path):
+    (tmp_path / 'people.csv').write_text('name,company\nAda,Acme\nBob,Initech\n')
+    (tmp_path / 'people.jsonl').write_text(
+        '\n'.join(json.dumps(c) for c in [{'name': 'Ada'}, {'name': 'Bob', 'extra': 'PS'}]) + '\n')
+
+    assert_that(list(iter_contexts(tmp_path / 'people.csv'))).is_equal_to(
+        [{'name': 'Ada', 'company': 'Acme'}, {'name': 'Bob', 'company': 'Initech'}])
+    assert_that(list(iter_contexts(tmp_path / 'people.jsonl'))).is_length(2)
+    with pytest.raises(ValueError):
+        next(iter_contexts(tmp_path / 'letter.docx'))
+
+
+def test_bulk_documents_match_single_renders(template, image, tmp_path):
+    contexts = [{'name': 'Ada', 'company': 'Acme', 'extra': 'PS: hi'},
+                {'name': 'Bob', 'company': 'Initech'}]
+
+    count = generate_documents_from_template(
+        template, iter(contexts), str(tmp_path / 'bulk' / '{index}_{name}.docx'),
+        image_path=image, image_size={'width': 30})
+    for context in contexts:
+        generate_document_from_template(template, tmp_path / 'single' / f"{context['name']}.docx",
+                                        dict(context), image_path=image,
+                                        image_size={'width': 30})
+
+    assert_that(count).is_equal_to(2)
+    for index, name in enumerate(['Ada', 'Bob']):
+        bulk = read(tmp_path / 'bulk' / f'{index}_{name}.docx')
+        assert_that(bulk).is_equal_to(read(tmp_path / 'single' / f'{name}.docx'))
+    assert_that(read(tmp_path / 'bulk' / '1_Bob.docx')).has_text(['Dear Bob,', '', ''])
+    assert_that(read(tmp_path / 'bulk' / '1_Bob.docx')).has_title('Letter for Bob')
+
+
+def test_per_document_images_do_not_accumulate(template, image, tmp_path):
+    other = tmp_path / 'other.png'
+    other.write_bytes(ChartRenderer(dpi=20).pie_chart([1, 2], ['a', 'b'], 'Other').getvalue())
+    bulk = BulkDocxTemplate(template)
+
+    for i, path in enumerate([image, other, None]):
+        picture = InlineImage(bulk, str(path)) if path else ''
+        bulk.render({'name': str(i), 'company': 'Acme', 'image': picture})
+        bulk.save(tmp_path / f'{i}.docx')
+
+    assert_that([read(tmp_path / f'{i}.docx')['images'] for i in range(3)]).is_equal_to([1, 1, 0])
+    assert_that(read(tmp_path / '2.docx')['media']).is_empty()
+
+
+def test_autoescape_matches_docxtpl(template, tmp_path):
+    context = {'name': 'A & <B>', 'company': 'Smith & Co'}
+    single = DocxTemplate(template)
+    single.render(dict(context), autoescape=True)
+    single.save(tmp_path / 'single.docx')
+    bulk = BulkDocxTemplate(template)
+
+    bulk.render(dict(context), autoescape=True)
+    bulk.save(tmp_path / 'escaped.docx')
+    bulk.render({'name': 'Ada &amp; Bob', 'company': 'Acme'})
+    bulk.save(tmp_path / 'raw.docx')
+
+    escaped = read(tmp_path / 'escaped.docx')
+    assert_that(escaped).is_equal_to(read(tmp_path / 'single.docx'))
+    assert_that(escaped['text'][0]).is_equal_to('Dear A & <B>,')
+    assert_that(escaped['header']).is_equal_to('Smith & Co')
+    # Without autoescape values are inserted as XML, as with DocxTemplate
+    assert_that(read(tmp_path / 'raw.docx')['text'][0]).is_equal_to('Dear Ada & Bob,')
@@ -0,0 +1,77 @@
+"""Tests for the transaction categorizer in kategorisering.py"""
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from assertpy import assert_that
+
+from banken import kategorier, kategorisera
+from kategorisering import Categorizer
+
+TEXTS = ['ICA KVANTUM SOLNA', 'Willys Hemma', 'ALECTA PENSION', 'K*Spotify AB', 'Tesla',
+         'Okänd butik', 'LÖN', np.nan, 123, 'Pizza Stugan', 'ICA KVANTUM SOLNA', '']
+
+
+def apply_kategorisera(series):
+    # kategorisera prints every unmatched description
+    with contextlib.redirect_stdout(io.StringIO()):
+        return series.apply(kategorisera)
+
+
+@pytest.mark.parametrize('dedup', [True, False])
+def test_series_match_kategorisera(dedup):
+    texts = pd.Series(TEXTS, index=range(10, 10 + len(TEXTS)), name='Text', dtype=object)
+
+    result = Categorizer(kategorier).categorize_series(texts, dedup=dedup)
+
+    assert_that(result.tolist()).is_equal_to(apply_kategorisera(texts).tolist())
+    assert_that(result.index.tolist()).is_equal_to(texts.index.tolist())
+    # alecta is in two categories, the first one wins
+    assert_that(result[12]).is_equal_to('övriga kostnader')
+
+
+def test_single_descriptions_and_custom_tables():
+    categorizer = Categorizer({'mat': ['ICA', 'coop'], 'resa': ['sl', 'ica-resor'], 'tom': []},
+                              default='okänd')
+
+    assert_that([categorizer.categorize(text) for text in ['Ica Maxi', 'ICA-RESOR', 'SL',
+                                                           'Bio']]).is_equal_to(
+        ['mat', 'mat', 'resa', 'okänd'])
+    assert_that(categorizer.categorize_series(pd.Series(['x', 'SL'])).tolist()).is_equal_to(
+        ['okänd', 'resa'])
+
+
+def test_cache_is_reused_between_runs(tmp_path, monkeypatch):
+    texts = pd.Series(TEXTS, dtype=object)
+    with Categorizer(kategorier, cache_path=tmp_path / 'cache.sqlite') as categorizer:
+        first = categorizer.categorize_series(texts)
+        # Two spellings of the same normalized description share an entry
+        assert_that(categorizer.categorize('ica kvantum solna')).is_equal_to(first[0])
+        assert_that(categorizer.cache.misses).is_equal_to(len(TEXTS) - 1)
+
+    def not_called(texts):
+        raise AssertionError(f"matched {list(texts)}")
+
+    monkeypatch.setattr(Categorizer, '_categorize_texts', not_called)
+    with Categorizer(kategorier, cache_path=tmp_path / 'cache.sqlite') as categorizer:
+        assert_that(categorizer.categorize_series(texts).tolist()).is_equal_to(first.tolist())
+        assert_that(categorizer.cache.misses).is_zero()
+        assert_that(categorizer.cache.hits).is_equal_to(len(TEXTS) - 1)
+
+
+def test_cache_is_bounded_and_follows_the_table(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    with Categorizer({'mat': ['ica']}, cache_path=path, cache_size=2) as categorizer:
+        for text in ['ica 1', 'ica 2', 'ica 1', 'ica 3']:
+            categorizer.categorize(text)
+        # 'ica 2' was least recently used
+        assert_that(list(categorizer.cache._entries)).is_equal_to(['ica 1', 'ica 3'])
+
+    with Categorizer({'mat': ['ica']}, cache_path=path, cache_size=2) as categorizer:
+        assert_that(len(categorizer.cache)).is_equal_to(2)
+
+    with Categorizer({'mat': ['ica'], 'resa': ['3']}, cache_path=path) as categorizer:
+        assert_that(len(categorizer.cache)).is_zero()
+        assert_that(categorizer.categorize('ica 3')).is_equal_to('mat')
@@ -0,0 +1,106 @@
+"""Tests for the inverted full-text index in pdf_index.py"""
+import json
+import sys
+
+import pytest
+from assertpy import assert_that
+
+import sort_pdf_files
+from pdf_cache import AnalysisCache
+from pdf_index import (InvertedIndex, decode_document_postings, decode_postings,
+                       encode_document_postings, encode_postings, parse_query)
+from pdf_samples import write_text_pdf
+from sort_pdf_files import scan_directory
+
+
+@pytest.fixture
+def index(tmp_path):
+    write_text_pdf(tmp_path / 'a.pdf', ['Invoice 2023 for the purchase order', 'Tax report'])
+    write_text_pdf(tmp_path / 'b.pdf', ['Draft invoice 2024', 'order purchase'])
+    write_text_pdf(tmp_path / 'c.pdf', ['Meeting notes'])
+    with InvertedIndex(tmp_path / 'pdfs.index') as index:
+        for result in scan_directory(tmp_path, analyzer_kwargs={'build_index': True}):
+            index.add(result['filepath'], result.pop('_postings'))
+        yield index
+
+
+def names(matches):
+    return [(path.rsplit('/', 1)[-1], pages) for path, pages in matches]
+
+
+def test_postings_round_trip():
+    pages = [[1, 0, 5, 300], [7, 2], [1000, 100000]]
+
+    assert_that(decode_postings(encode_postings(pages))).is_equal_to(
+        {1: [0, 5, 300], 7: [2], 1000: [100000]})
+    postings = {'invoice': [[1, 0], [3, 4, 9]], 'åäö': [[200, 130]]}
+    assert_that(decode_document_postings(encode_document_postings(postings))).is_equal_to(
+        postings)
+
+
+def test_cache_keeps_postings_out_of_the_json_result(index, tmp_path):
+    db = tmp_path / 'cache.sqlite'
+    kwargs = {'build_index': True}
+    with AnalysisCache(db, kwargs) as cache:
+        scan_directory(tmp_path, analyzer_kwargs=kwargs, cache=cache)
+        stored = cache._conn.execute("SELECT result FROM results").fetchall()
+
+    with AnalysisCache(db, kwargs) as cache, InvertedIndex(tmp_path / 'new.index') as new:
+        for result in scan_directory(tmp_path, analyzer_kwargs=kwargs, cache=cache):
+            new.add(result['filepath'], result.pop('_postings'))
+        assert_that(cache.hits).is_equal_to(3)
+
+        assert_that([json.loads(row[0]) for row in stored]).extracting('filename').contains(
+            'a.pdf', 'b.pdf', 'c.pdf')
+        assert_that([key for row in stored for key in json.loads(row[0])]).does_not_contain(
+            '_postings')
+        query = '"purchase order" OR purchase'
+        assert_that(new.search(query)).is_equal_to(index.search(query))
+
+
+def test_query_precedence_and_implicit_and():
+    assert_that(parse_query('a b OR NOT c')).is_equal_to(
+        ('or', ('and', ('term', 'a'), ('term', 'b')), ('not', ('term', 'c'))))
+    for query in ['', 'a AND', '(a OR b', 'a )', '"open phrase']:
+        with pytest.raises(ValueError):
+            parse_query(query)
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('invoice', [('a.pdf', [1]), ('b.pdf', [1])]),
+    ('invoice AND 2023', [('a.pdf', [1])]),
+    ('tax OR meeting', [('a.pdf', [2]), ('c.pdf', [1])]),
+    ('invoice AND NOT draft', [('a.pdf', [1])]),
+    ('NOT invoice', [('c.pdf', [])]),
+    ('"purchase order"', [('a.pdf', [1])]),
+    ('"order purchase" (2023 OR 2024)', [('b.pdf', [1, 2])]),
+    ('unknown', []),
+])
+def test_search_boolean_and_phrase_queries(index, query, expected):
+    assert_that(names(index.search(query))).is_equal_to(expected)
+
+
+def test_reindexing_a_document_replaces_its_postings(index, tmp_path):
+    index.add(tmp_path / 'a.pdf', {'rewritten': [[1, 0]]})
+
+    assert_that(names(index.search('invoice'))).is_equal_to([('b.pdf', [1])])
+    assert_that(names(index.search('rewritten'))).is_equal_to([('a.pdf', [1])])
+    assert_that(len(index)).is_equal_to(3)
+
+
+def test_scan_builds_index_for_query_subcommand(tmp_path, monkeypatch, capsys):
+    write_text_pdf(tmp_path / 'docs' / 'a.pdf', ['Confidential invoice 2023'])
+    write_text_pdf(tmp_path / 'docs' / 'b.pdf', ['Invoice 2024'])
+    index_path = tmp_path / 'pdfs.index'
+
+    monkeypatch.setattr(sys, 'argv', ['sort_pdf_files.py', str(tmp_path / 'docs'),
+                                      '-o', str(tmp_path / 'report.txt'),
+                                      '--index', str(index_path)])
+    sort_pdf_files.main()
+    monkeypatch.setattr(sys, 'argv', ['sort_pdf_files.py', 'query', str(index_path),
+                                      'invoice', 'AND', '2023'])
+    sort_pdf_files.main()
+
+    output = capsys.readouterr().out.splitlines()
+    assert_that(output[-2]).ends_with('a.pdf (pages 1)')
+    assert_that(output[-1]).starts_with('1 matching documents')
@@ -0,0 +1,82 @@
+"""Tests for the test x target matrix plugin in pytest_matrix.py"""
+from assertpy import assert_that
+from docx import Document
+
+from pytest_matrix import ResultStore, render_matrix
+
+pytest_plugins = ['pytester']
+
+SUITE = """
+import pytest
+
+@pytest.fixture
+def broken():
+    raise RuntimeError('setup')
+
+def test_pass():
+    pass
+
+def test_fail():
+    assert {fail}
+
+def test_error(broken):
+    pass
+
+@pytest.mark.skip
+def test_skip():
+    pass
+
+@pytest.mark.xfail
+def test_xfail():
+    assert False
+"""
+
+
+def test_runs_for_two_targets_fill_one_matrix(pytester, tmp_path):
+    db = tmp_path / 'results.sqlite'
+    report = tmp_path / 'matrix.docx'
+
+    pytester.makepyfile(test_suite=SUITE.format(fail='False'))
+    # --option=value: pytest takes a separate existing path for a test path
+    # when it picks the rootdir, which would change the test ids
+    pytester.runpytest_inprocess('-p', 'pytest_matrix', f'--matrix-db={db}',
+                                 '--matrix-target=rpv2')
+    pytester.makepyfile(test_suite=SUITE.format(fail='True'))
+    pytester.makepyfile(test_extra='def test_new():\n    pass\n')
+    result = pytester.runpytest_inprocess('-p', 'pytest_matrix', f'--matrix-db={db}',
+                                          '--matrix-target=cv90', f'--matrix-report={report}')
+
+    result.assert_outcomes(passed=3, errors=1, skipped=1, xfailed=1)
+    table = Document(str(report)).tables[0]
+    assert_that([[cell.text for cell in row.cells] for row in table.rows]).is_equal_to([
+        ['test', 'rpv2', 'cv90'],
+        ['test_extra.py::test_new', '-', 'passed'],
+        ['test_suite.py::test_error', 'error', 'error'],
+        ['test_suite.py::test_fail', 'failed', 'passed'],
+        ['test_suite.py::test_pass', 'passed', 'passed'],
+        ['test_suite.py::test_skip', 'skipped', 'skipped'],
+        ['test_suite.py::test_xfail', 'xfailed', 'xfailed'],
+    ])
+    with ResultStore(db) as store:
+        assert_that(store.summary()['rpv2']).is_equal_to(
+            {'passed': 1, 'failed': 1, 'error': 1, 'skipped': 1, 'xfailed': 1})
+
+
+def test_rerun_replaces_results_and_fresh_drops_removed_tests(tmp_path):
+    with ResultStore(tmp_path / 'results.sqlite', commit_every=2) as store:
+        store.start_run('1', 'rpv2')
+        for name in ('a', 'b', 'c'):
+            store.add(f'test_{name}', 'rpv2', 'failed', 0.1)
+        store.finish_run('1')
+        store.start_run('2', 'rpv2')
+        store.add('test_a', 'rpv2', 'passed', 0.1)
+        store.finish_run('2')
+        assert_that(list(store.matrix())).is_equal_to(
+            [['test_a', 'passed'], ['test_b', 'failed'], ['test_c', 'failed']])
+
+        store.start_run('3', 'rpv2', fresh=True)
+        store.add('test_b', 'rpv2', 'passed', 0.1)
+        store.finish_run('3')
+        assert_that(list(store.matrix())).is_equal_to([['test_b', 'passed']])
+
+        assert_that(render_matrix(store, tmp_path / 'matrix.docx')).is_equal_to(1)
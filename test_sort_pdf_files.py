@@ -0,0 +1,457 @@
+"""Tests for the PDF scanning pipeline in sort_pdf_files.py"""
+import csv
+import io
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import PyPDF2
+import pytest
+from assertpy import assert_that
+
+import pdf_watch
+import sort_pdf_files
+from pdf_cache import AnalysisCache
+from pdf_dedup import ExactDeduplicator, NearDuplicateIndex
+from pdf_discovery import iter_pdf_files
+from pdf_metrics import ScanMetrics
+from pdf_reports import open_report_writer
+from pdf_samples import write_text_pdf
+from pdf_watch import watch_directory
+from sort_pdf_files import PDFAnalyzer, filter_results, generate_report, scan_directory
+
+
+@pytest.fixture
+def pdf_dir(tmp_path):
+    for i in range(6):
+        write_text_pdf(tmp_path / f'doc{i}.pdf', [f'Confidential invoice {i}', 'Tax report'])
+    write_text_pdf(tmp_path / 'sub' / 'plain.pdf', ['Nothing to see here'])
+    return tmp_path
+
+
+def test_discovery_filters_and_walks_in_sorted_order(tmp_path):
+    for name in ['b.PDF', 'a.pdf', 'notes.txt', 'drafts/x.pdf', 'deep/er/y.pdf', 'deep/z.pdf']:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_bytes(b'%PDF-1.4' + b'0' * len(name))
+    (tmp_path / 'deep' / 'loop').symlink_to(tmp_path)
+
+    def found(**kwargs):
+        return [p.relative_to(tmp_path).as_posix() for p in iter_pdf_files(tmp_path, **kwargs)]
+
+    assert_that(found()).is_equal_to(['a.pdf', 'b.PDF', 'deep/z.pdf', 'deep/er/y.pdf', 'drafts/x.pdf'])
+    assert_that(found(exclude=['drafts'], max_depth=1)).is_equal_to(['a.pdf', 'b.PDF', 'deep/z.pdf'])
+    assert_that(found(include=['deep/*'])).is_equal_to(['deep/z.pdf', 'deep/er/y.pdf'])
+    assert_that(found(recursive=False, min_size=14)).is_equal_to([])
+    assert_that(found(symlinks='follow')).is_length(5)
+
+
+def test_analyze_pdf_finds_terms(pdf_dir):
+    result = PDFAnalyzer().analyze_pdf(pdf_dir / 'doc0.pdf')
+
+    assert_that(result['page_count']).is_equal_to(2)
+    assert_that(result['found_terms']).is_equal_to(['confidential', 'invoice', 'report', 'tax'])
+    assert_that(result['potential_title']).is_equal_to('Confidential invoice 0')
+
+
+def test_analyze_pdf_records_term_counts_and_pages(tmp_path):
+    pdf = write_text_pdf(tmp_path / 'hot.pdf', ['tax tax invoice', 'nothing', 'Tax'])
+
+    result = PDFAnalyzer(['tax', 'invoice']).analyze_pdf(pdf)
+
+    assert_that(result['term_hits']).is_equal_to({
+        'invoice': {'count': 1, 'pages': [1]},
+        'tax': {'count': 3, 'pages': [1, 3]},
+    })
+    assert_that(result['score']).is_equal_to(4)
+
+
+def test_report_sorts_and_filters_by_score(tmp_path):
+    results = [
+        {'filename': 'cold.pdf', 'score': 1, 'found_terms': ['tax']},
+        {'filename': 'hot.pdf', 'score': 9, 'found_terms': ['ssn', 'tax'],
+         'term_hits': {'ssn': {'count': 6, 'pages': [1, 2, 3, 7]}, 'tax': {'count': 3, 'pages': [2]}}},
+        {'filename': 'warm.pdf', 'score': 4, 'found_terms': ['invoice']},
+    ]
+
+    selected = filter_results(results, sort_by='score', min_score=2)
+    assert_that([r['filename'] for r in selected]).is_equal_to(['hot.pdf', 'warm.pdf'])
+    assert_that(filter_results(results, required_terms=['SSN'])).is_length(1)
+
+    report = tmp_path / 'report.txt'
+    generate_report(results, report, sort_by='score')
+    text = report.read_text()
+    assert_that(text.index('hot.pdf')).is_less_than(text.index('cold.pdf'))
+    assert_that(text).contains('ssn: 6 (pages 1-3, 7)')
+
+
+def test_presence_only_stops_once_all_terms_are_seen(tmp_path):
+    pdf = write_text_pdf(tmp_path / 'long.pdf', ['invoice', 'tax'] + ['filler'] * 8)
+
+    result = PDFAnalyzer(['invoice', 'tax'], presence_only=True).analyze_pdf(pdf)
+
+    assert_that(result['found_terms']).is_equal_to(['invoice', 'tax'])
+    assert_that(result['page_count']).is_equal_to(10)
+    assert_that(result['pages_scanned']).is_equal_to(2)
+
+
+def test_max_pages_limits_extraction(tmp_path):
+    pdf = write_text_pdf(tmp_path / 'long.pdf', ['filler', 'filler', 'invoice'])
+
+    result = PDFAnalyzer(['invoice'], max_pages=2).analyze_pdf(pdf)
+
+    assert_that(result['found_terms']).is_empty()
+    assert_that(result['pages_scanned']).is_equal_to(2)
+
+
+def test_oversized_files_are_skipped_with_reason(pdf_dir):
+    too_big = PDFAnalyzer(max_file_size_mb=0.0001).analyze_pdf(pdf_dir / 'doc0.pdf')
+    too_long = PDFAnalyzer(max_page_count=1).analyze_pdf(pdf_dir / 'doc0.pdf')
+
+    assert_that(too_big).has_status('skipped')
+    assert_that(too_big['message']).contains('MB limit')
+    assert_that(too_long).has_status('skipped')
+    assert_that(too_long['message']).contains('2 pages')
+
+
+def test_mmap_and_file_reads_agree_and_count_bytes(pdf_dir):
+    mapped = PDFAnalyzer().analyze_pdf(pdf_dir / 'doc0.pdf')
+    buffered = PDFAnalyzer(use_mmap=False).analyze_pdf(pdf_dir / 'doc0.pdf')
+
+    assert_that(mapped).is_equal_to(buffered)
+    assert_that(mapped['bytes_read']).is_positive()
+
+
+def test_analyze_pdf_parses_each_file_once(pdf_dir):
+    reader_cls = PyPDF2.PdfReader
+    with patch.object(reader_cls, '__init__', autospec=True,
+                      side_effect=reader_cls.__init__) as reader_init:
+        result = PDFAnalyzer().analyze_pdf(pdf_dir / 'doc0.pdf')
+
+    assert_that(result['found_terms']).is_not_empty()
+    assert_that(reader_init.call_count).is_equal_to(1)
+
+
+def test_analyze_pdf_accepts_buffer_and_reader(pdf_dir):
+    data = (pdf_dir / 'doc1.pdf').read_bytes()
+    analyzer = PDFAnalyzer()
+
+    from_buffer = analyzer.analyze_pdf(io.BytesIO(data))
+    from_reader = analyzer.analyze_pdf(PyPDF2.PdfReader(io.BytesIO(data)))
+
+    assert_that(from_buffer['found_terms']).is_equal_to(['confidential', 'invoice', 'report', 'tax'])
+    assert_that(from_buffer['size_mb']).is_equal_to(len(data) / (1024 * 1024))
+    assert_that(from_reader['found_terms']).is_equal_to(from_buffer['found_terms'])
+
+
+def test_parallel_scan_matches_serial_scan(pdf_dir):
+    serial = scan_directory(pdf_dir)
+    parallel = scan_directory(pdf_dir, workers=2, chunksize=2)
+
+    assert_that(parallel).is_equal_to(serial)
+
+
+def test_unordered_scan_returns_every_file(pdf_dir):
+    results = scan_directory(pdf_dir, workers=2, chunksize=1, ordered=False)
+
+    assert_that(sorted(r['filename'] for r in results)).is_length(7)
+
+
+def test_timeout_skips_file_instead_of_stalling(pdf_dir, monkeypatch):
+    def hang(self, pdf_path):
+        time.sleep(5)
+
+    monkeypatch.setattr(PDFAnalyzer, 'analyze_pdf', hang)
+
+    result = sort_pdf_files._analyze_with_timeout(PDFAnalyzer(), pdf_dir / 'doc0.pdf', timeout=0.2)
+
+    assert_that(result['status']).is_equal_to('skipped')
+    assert_that(result['message']).contains('Time budget')
+
+
+def test_cached_rescan_skips_unchanged_files(pdf_dir, tmp_path_factory, monkeypatch):
+    db = tmp_path_factory.mktemp('cache') / 'cache.sqlite'
+    with AnalysisCache(db, {'search_terms': ['invoice']}) as cache:
+        first = scan_directory(pdf_dir, cache=cache)
+
+    write_text_pdf(pdf_dir / 'doc0.pdf', ['Changed contract'])
+    analyzed = []
+    original = PDFAnalyzer.analyze_pdf
+    monkeypatch.setattr(PDFAnalyzer, 'analyze_pdf',
+                        lambda self, p: analyzed.append(p) or original(self, p))
+
+    with AnalysisCache(db, {'search_terms': ['invoice']}) as cache:
+        second = scan_directory(pdf_dir, cache=cache)
+
+    assert_that(analyzed).is_equal_to([pdf_dir / 'doc0.pdf'])
+    assert_that([r['filepath'] for r in second]).is_equal_to([r['filepath'] for r in first])
+    changed = next(r for r in second if r['filename'] == 'doc0.pdf')
+    assert_that(changed['potential_title']).is_equal_to('Changed contract')
+
+
+def test_cache_forgets_stats_of_failed_analyses(pdf_dir, tmp_path_factory):
+    db = tmp_path_factory.mktemp('cache') / 'cache.sqlite'
+    with AnalysisCache(db, {}) as cache:
+        assert_that(cache.get(pdf_dir / 'doc0.pdf')).is_none()
+        cache.put(pdf_dir / 'doc0.pdf', {'status': 'error', 'message': 'Time budget'})
+
+        assert_that(cache._stats).is_empty()
+        assert_that(cache.get(pdf_dir / 'doc0.pdf')).is_none()
+
+
+def test_cache_is_invalidated_when_terms_change(pdf_dir, tmp_path_factory):
+    db = tmp_path_factory.mktemp('cache') / 'cache.sqlite'
+    with AnalysisCache(db, {'search_terms': ['invoice']}) as cache:
+        scan_directory(pdf_dir, cache=cache)
+
+    with AnalysisCache(db, {'search_terms': ['invoice', 'tax']}) as cache:
+        assert_that(cache.get(pdf_dir / 'doc0.pdf')).is_none()
+
+
+@pytest.mark.parametrize('report_format', ['jsonl', 'csv'])
+def test_report_writers_flush_in_batches(pdf_dir, tmp_path_factory, report_format):
+    output = tmp_path_factory.mktemp('reports') / f'report.{report_format}'
+    writer = open_report_writer(report_format, output, batch_size=2)
+    results = scan_directory(pdf_dir)
+
+    for result in results[:3]:
+        writer.write(result)
+    # The first batch is on disk before the writer is closed
+    assert_that(output.read_text().count('.pdf')).is_greater_than_or_equal_to(2)
+
+    for result in results[3:]:
+        writer.write(result)
+    writer.close()
+
+    if report_format == 'jsonl':
+        lines = [json.loads(line) for line in output.read_text().splitlines()]
+        assert_that([r['filepath'] for r in lines]).is_equal_to([r['filepath'] for r in results])
+    else:
+        rows = list(csv.DictReader(output.open(newline='')))
+        assert_that(rows).is_length(len(results))
+        assert_that(rows[0]['found_terms']).is_equal_to(';'.join(results[0]['found_terms']))
+
+
+def test_parquet_writer_reports_its_size_on_flush(pdf_dir, tmp_path_factory):
+    pq = pytest.importorskip('pyarrow.parquet')
+    output = tmp_path_factory.mktemp('reports') / 'report.parquet'
+    sizes = []
+    results = scan_directory(pdf_dir)
+
+    with open_report_writer('parquet', output, batch_size=3,
+                            on_flush=lambda writer: sizes.append(writer.tell())) as writer:
+        for result in results:
+            writer.write(result)
+
+    assert_that(sizes).is_length(3)
+    assert_that(sizes).is_sorted()
+    assert_that(sizes[-1]).is_less_than_or_equal_to(output.stat().st_size)
+    assert_that(pq.read_table(output).column('filepath').to_pylist()).is_equal_to(
+        [r['filepath'] for r in results])
+
+
+def test_empty_scan_keeps_existing_report(tmp_path, monkeypatch):
+    (tmp_path / 'empty').mkdir()
+    report = tmp_path / 'report.txt'
+    report.write_text('previous report')
+
+    monkeypatch.setattr('sys.argv', ['sort_pdf_files.py', str(tmp_path / 'empty'),
+                                     '-o', str(report)])
+    sort_pdf_files.main()
+
+    assert_that(report.read_text()).is_equal_to('previous report')
+    assert_that(report.with_name('report.txt.journal').exists()).is_false()
+
+
+def test_interrupted_scan_does_not_resume_onto_previous_report(pdf_dir, tmp_path_factory,
+                                                                monkeypatch):
+    report = tmp_path_factory.mktemp('reports') / 'report.jsonl'
+    report.write_text('{"filepath": "from the previous run"}\n')
+
+    def run(*extra):
+        monkeypatch.setattr('sys.argv', ['sort_pdf_files.py', str(pdf_dir), '-o', str(report),
+                                         '-f', 'jsonl', '--min-score', '1000', *extra])
+        sort_pdf_files.main()
+
+    original = PDFAnalyzer.analyze_pdf
+    calls = []
+
+    def interrupt_on_third_file(self, pdf_path):
+        calls.append(pdf_path)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return original(self, pdf_path)
+
+    # Every result is filtered out, so the writer never opens
+    monkeypatch.setattr(PDFAnalyzer, 'analyze_pdf', interrupt_on_third_file)
+    with pytest.raises(KeyboardInterrupt):
+        run()
+    monkeypatch.setattr(PDFAnalyzer, 'analyze_pdf', original)
+    run('--resume')
+
+    assert_that(report.exists()).is_false()
+
+
+@pytest.mark.parametrize('report_format', ['jsonl', 'csv', 'text'])
+def test_resumed_scan_matches_uninterrupted_scan(pdf_dir, tmp_path_factory, monkeypatch,
+                                                 report_format):
+    out_dir = tmp_path_factory.mktemp('reports')
+    full, resumed = out_dir / 'full.out', out_dir / 'resumed.out'
+
+    def run(output, *extra):
+        monkeypatch.setattr('sys.argv', ['sort_pdf_files.py', str(pdf_dir), '-o', str(output),
+                                         '-f', report_format, '--batch-size', '2', *extra])
+        sort_pdf_files.main()
+
+    run(full)
+
+    original = PDFAnalyzer.analyze_pdf
+    calls = []
+
+    def interrupt_on_fifth_file(self, pdf_path):
+        calls.append(pdf_path)
+        if len(calls) == 5:
+            raise KeyboardInterrupt
+        return original(self, pdf_path)
+
+    monkeypatch.setattr(PDFAnalyzer, 'analyze_pdf', interrupt_on_fifth_file)
+    with pytest.raises(KeyboardInterrupt):
+        run(resumed)
+    monkeypatch.setattr(PDFAnalyzer, 'analyze_pdf', original)
+
+    # Simulate a kill in the middle of writing both files
+    journal = resumed.with_name(resumed.name + '.journal')
+    with journal.open('a') as f:
+        f.write('{"files": ["/half/writ')
+    with resumed.open('a') as f:
+        f.write('garbage from a half written batch')
+
+    calls.clear()
+    monkeypatch.setattr(PDFAnalyzer, 'analyze_pdf', interrupt_on_fifth_file)
+    run(resumed, '--resume')
+
+    assert_that(calls).is_length(3)
+    assert_that(resumed.read_text()).is_equal_to(full.read_text())
+    assert_that(journal.exists()).is_false()
+
+
+def test_exact_duplicates_are_not_extracted(pdf_dir, monkeypatch):
+    (pdf_dir / 'zz_copy.pdf').write_bytes((pdf_dir / 'doc2.pdf').read_bytes())
+
+    results = scan_directory(pdf_dir, deduplicator=ExactDeduplicator())
+
+    copy = next(r for r in results if r['filename'] == 'zz_copy.pdf')
+    assert_that(copy).has_status('duplicate')
+    assert_that(copy['duplicate_of']).ends_with('doc2.pdf')
+    assert_that(copy).does_not_contain_key('found_terms')
+
+
+def test_near_duplicate_documents_are_clustered(tmp_path):
+    body = 'This agreement between Acme and Bob covers the supply of widgets. ' * 6
+    write_text_pdf(tmp_path / 'a.pdf', [body, 'Signed on the 1st of May'])
+    write_text_pdf(tmp_path / 'b.pdf', [body, 'Signed on the 2nd of May'])
+    write_text_pdf(tmp_path / 'c.pdf', ['An unrelated invoice for office chairs and desks'])
+
+    index = NearDuplicateIndex()
+    for result in scan_directory(tmp_path, analyzer_kwargs={'near_duplicates': True}):
+        index.add(result['filename'], result['simhash'])
+
+    assert_that(index.clusters()).is_equal_to([['a.pdf', 'b.pdf']])
+
+
+def test_scan_metrics_cover_every_stage(pdf_dir, tmp_path_factory):
+    metrics = ScanMetrics(slowest=3)
+    cache_path = tmp_path_factory.mktemp('cache') / 'cache.sqlite'
+    analyzer_kwargs = {'collect_timings': True}
+
+    with AnalysisCache(cache_path, {}) as cache:
+        results = scan_directory(pdf_dir, analyzer_kwargs=analyzer_kwargs, cache=cache,
+                                 metrics=metrics)
+        assert_that(results[0]['_timings']).contains_key('parse', 'extract', 'match', 'total')
+        for result in results:
+            metrics.record_file(result)
+            assert_that(result).does_not_contain_key('_timings')
+        cached = scan_directory(pdf_dir, analyzer_kwargs=analyzer_kwargs, cache=cache)
+    for result in cached[:2] + [{'status': 'error'}, {'status': 'skipped'},
+                                {'status': 'duplicate'}]:
+        metrics.record_file(result)
+    metrics.stop()
+
+    assert_that(cached[0]).does_not_contain_key('_timings')
+    data = metrics.to_dict()
+    assert_that(data['counters']).is_equal_to(
+        {'files': 12, 'cached': 2, 'skipped': 1, 'errors': 1, 'duplicates': 1,
+         'pages': 13 + cached[0]['page_count'] + cached[1]['page_count'],
+         'bytes': sum(r['bytes_read'] for r in results + cached[:2])})
+    assert_that(list(data['stages'])).is_equal_to(['discovery', 'parse', 'extract', 'match'])
+    assert_that(data['stages']['discovery']['count']).is_equal_to(8)
+    assert_that(data['slowest_files']).is_length(3)
+    assert_that(data['throughput']['files_per_s']).is_positive()
+    assert_that(metrics.summary()).contains('files/s', 'Slowest files',
+                                            'Not analyzed: 2 cached, 1 skipped, 1 errors')
+
+
+@pytest.mark.parametrize('use_inotify', [True, False], ids=['inotify', 'polling'])
+def test_watch_analyzes_new_files_once_they_settle(pdf_dir, use_inotify):
+    analyzer = PDFAnalyzer()
+    results = []
+    stop = threading.Event()
+    watcher = threading.Thread(target=watch_directory, kwargs={
+        'directory': pdf_dir,
+        'analyze': analyzer.analyze_pdf,
+        'on_result': results.append,
+        'settle': 0.2,
+        'poll_interval': 0.1,
+        'use_inotify': use_inotify,
+        'known_files': iter_pdf_files(pdf_dir),
+        'stop_event': stop,
+    })
+    watcher.start()
+    try:
+        time.sleep(0.3)
+        (pdf_dir / 'notes.txt').write_text('not a pdf')
+        write_text_pdf(pdf_dir / 'sub' / 'new.pdf', ['Fresh invoice'])
+        deadline = time.monotonic() + 5
+        while not results and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.5)
+    finally:
+        stop.set()
+        watcher.join()
+
+    assert_that([r['filename'] for r in results]).is_equal_to(['new.pdf'])
+    assert_that(results[0]['found_terms']).is_equal_to(['invoice'])
+
+
+@pytest.mark.parametrize('use_inotify', [True, False], ids=['inotify', 'polling'])
+def test_watch_stops_checking_empty_and_filtered_files(pdf_dir, use_inotify, monkeypatch):
+    checked = []
+    original = pdf_watch._file_state
+    monkeypatch.setattr(pdf_watch, '_file_state', lambda p: checked.append(p.name) or original(p))
+    results = []
+    stop = threading.Event()
+    watcher = threading.Thread(target=watch_directory, kwargs={
+        'directory': pdf_dir,
+        'analyze': PDFAnalyzer().analyze_pdf,
+        'on_result': results.append,
+        'settle': 0.05,
+        'poll_interval': 0.05,
+        'use_inotify': use_inotify,
+        'known_files': iter_pdf_files(pdf_dir),
+        'stop_event': stop,
+    })
+    watcher.start()
+    try:
+        time.sleep(0.2)
+        (pdf_dir / 'empty.pdf').touch()
+        for i in range(5):
+            (pdf_dir / 'notes.txt').write_text(f'not a pdf {i}')
+        time.sleep(1.5)
+    finally:
+        stop.set()
+        watcher.join()
+
+    assert_that(results).is_empty()
+    assert_that(checked).does_not_contain('notes.txt')
+    # Checked while settling, then no more often than a file already analyzed
+    assert_that(checked.count('empty.pdf') - checked.count('doc0.pdf')).is_less_than(15)
@@ -0,0 +1,27 @@
+"""Tests for the term matching engines in term_engines.py"""
+import pytest
+from assertpy import assert_that
+
+from term_engines import ENGINES, create_matcher
+
+TEXT = 'TAX: Confidential, taxes ids ID terms and conditions; pretax tax_id tax'
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+def test_engines_match_whole_words_case_insensitively(engine):
+    matcher = create_matcher(['confidential', 'Tax', 'id'], engine)
+
+    assert_that(list(matcher.find(TEXT))).is_equal_to(
+        [('tax', 0), ('confidential', 5), ('id', 29), ('tax', 68)]
+    )
+
+
+def test_aho_corasick_reports_overlapping_terms():
+    matcher = create_matcher(['terms', 'terms and conditions'], 'aho-corasick')
+
+    assert_that(matcher.count(TEXT)).is_equal_to({'terms': 1, 'terms and conditions': 1})
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        create_matcher(['tax'], 'grep')